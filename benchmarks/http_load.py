@@ -0,0 +1,494 @@
+"""
+    End-to-end HTTP load benchmark of every API route.
+
+    Boots ``main.app`` in process with fakeredis in place of Redis, the local SMTP server for the
+    mail worker and the filesystem avatar storage in place of Cloudinary, seeds a database, then
+    drives each endpoint in turn with concurrent requests through an ASGI transport. Requests never
+    touch the network, so the numbers measure the application, the database and the stand-ins.
+
+    Run from the project root::
+
+        python -m benchmarks.http_load --users 4 --contacts 10000 --concurrency 16 --requests 500 \\
+            --output bench.json
+
+    By default a fresh SQLite database is created in a temporary directory; pass ``--database-url``
+    to benchmark against another database (it must be empty or disposable, the schema is created
+    and benchmark users are added to it). Rate limits are disabled unless ``--rate-limits`` is given.
+
+    The report is JSON: ``meta`` describes the run, ``endpoints`` maps ``"METHOD /path"`` to the
+    number of requests, errors (also by status), requests per second and p50/p95/p99/max latency
+    in milliseconds of the successful requests.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable
+
+BENCH_PASSWORD = "bench123"
+
+ENV_DEFAULTS = {
+    "SECRET_KEY": "benchmark-secret-key-with-enough-entropy",
+    "ALGORITHM": "HS256",
+    "MAIL_USERNAME": "bench@example.com",
+    "MAIL_PASSWORD": "password",
+    "MAIL_FROM": "bench@example.com",
+    "MAIL_PORT": "465",
+    "MAIL_SERVER": "127.0.0.1",
+    "CLOUDINARY_NAME": "bench",
+    "CLOUDINARY_API_KEY": "bench",
+    "CLOUDINARY_API_SECRET": "bench",
+    "INTERNAL_API_TOKEN": "bench-internal-token",
+    "METRICS_ENABLED": "true",
+}
+
+
+def configure(args: argparse.Namespace, workdir: str) -> None:
+    """
+        Points the settings at the benchmark database and stand-ins; must run before ``src`` is imported.
+        """
+    for name, value in ENV_DEFAULTS.items():
+        os.environ.setdefault(name, value)
+    os.environ["SQLALCHEMY_DATABASE_URL"] = args.database_url or f"sqlite:///{workdir}/bench.db"
+    os.environ["AVATAR_STORAGE"] = "filesystem"
+    os.environ["AVATAR_STORAGE_PATH"] = os.path.join(workdir, "avatars")
+    os.environ["MAIL_SSL_TLS"] = "false"
+    os.environ["MAIL_VALIDATE_CERTS"] = "false"
+    if not args.rate_limits:
+        os.environ["RATE_LIMITS"] = json.dumps({"get_contacts": "0", "create_contact": "0"})
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+        Nearest-rank percentile of an already sorted list.
+        """
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], errors: dict[str, int], elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    total = len(latencies) + sum(errors.values())
+    return {
+        "requests": total,
+        "errors": sum(errors.values()),
+        "error_statuses": dict(sorted(errors.items())),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+@dataclass
+class BenchUser:
+    id: int
+    email: str
+    token: str
+    first_id: int
+    last_id: int
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@dataclass
+class Context:
+    users: list[BenchUser]
+    scratch_ids: list[int]
+    signup_emails: list[str]
+    batch_size: int
+    import_body: bytes
+    avatar: bytes
+    rng: random.Random
+    refresh_tokens: dict[int, str] = field(default_factory=dict)
+    signups: int = 0
+    confirmations: int = 0
+    email_requests: int = 0
+
+    def user(self, worker: int) -> BenchUser:
+        return self.users[worker % len(self.users)]
+
+    def contact_id(self, worker: int) -> int:
+        user = self.user(worker)
+        return self.rng.randint(user.first_id, user.last_id)
+
+    def contact_body(self, index: int) -> dict:
+        birth_date = date(1990, 1, 1) + timedelta(days=index % 365)
+        return {"name": f"Bench Contact {index}", "email": f"bench{index}@example.com",
+                "phone_number": "+380000000000", "birth_date": birth_date.isoformat(),
+                "additional_data": "benchmark"}
+
+
+def seed(args: argparse.Namespace, run_id: str) -> tuple[list[tuple[int, str, int, int]], list[int]]:
+    """
+        Creates the schema, the benchmark users and their contacts with executemany inserts.
+
+        :return: (user id, email, first contact id, last contact id) of every user and the
+            ids of the scratch contacts the delete endpoints consume.
+        """
+    from sqlalchemy import create_engine, func, insert, select
+
+    from src.database.models import Base, Contact, User, birthday_key
+    from src.services.passwords import pwd_context
+
+    engine = create_engine(os.environ["SQLALCHEMY_DATABASE_URL"])
+    if not args.database_url:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(args.seed)
+    password = pwd_context.hash(BENCH_PASSWORD)
+    per_user = max(args.contacts // args.users, 1)
+    users = []
+    with engine.begin() as conn:
+        for index in range(args.users):
+            email = f"bench-{run_id}-{index}@example.com"
+            user_id = conn.execute(insert(User).returning(User.id), {
+                "username": f"bench{index}", "email": email, "password": password, "confirmed": True,
+                "avatar": "",
+            }).scalar_one()
+            users.append((user_id, email))
+
+    def rows(user_id: int, count: int):
+        for _ in range(count):
+            birth_date = datetime(rng.randint(1950, 2005), rng.randint(1, 12), rng.randint(1, 28))
+            first = rng.choice(["Ivan", "Olena", "Petro", "Maria", "Taras", "Oksana", "Andriy", "Iryna"])
+            last = rng.choice(["Kovalenko", "Shevchenko", "Bondarenko", "Tkachenko", "Kravchenko", "Melnyk"])
+            yield {"name": f"{first} {last}", "email": f"{first.lower()}.{last.lower()}{rng.randint(1, 10**6)}@example.com",
+                   "phone_number": f"+380{rng.randint(10**8, 10**9 - 1)}", "birth_date": birth_date,
+                   "birth_mmdd": birthday_key(birth_date), "additional_data": "", "user_id": user_id}
+
+    def insert_rows(user_id: int, count: int) -> None:
+        generator = rows(user_id, count)
+        while chunk := [row for _, row in zip(range(10000), generator)]:
+            with engine.begin() as conn:
+                conn.execute(insert(Contact), chunk)
+
+    scratch = args.requests + args.requests * args.batch_size
+    for user_id, _ in users:
+        insert_rows(user_id, per_user)
+    insert_rows(users[0][0], scratch)
+    with engine.connect() as conn:
+        ranges = dict(conn.execute(
+            select(Contact.user_id, func.min(Contact.id)).group_by(Contact.user_id)
+        ).all())
+        scratch_ids = list(conn.execute(
+            select(Contact.id).filter(Contact.user_id == users[0][0]).order_by(Contact.id.desc()).limit(scratch)
+        ).scalars())
+    engine.dispose()
+    seeded = [(user_id, email, ranges[user_id], ranges[user_id] + per_user - 1) for user_id, email in users]
+    return seeded, scratch_ids
+
+
+Operation = Callable[["httpx.AsyncClient", Context, int, int], Awaitable["httpx.Response"]]
+
+
+def endpoints() -> list[tuple[str, float, Operation]]:
+    """
+        Returns ``(route, share of --requests, operation)`` for every route, in run order.
+
+        Read-only routes run first, writes next and deletes last, so reads see the seeded data.
+        The bcrypt bound routes (signup, login) and whole-table exports get a smaller share.
+        """
+    async def root(client, ctx, worker, i):
+        return await client.get("/")
+
+    async def signup(client, ctx, worker, i):
+        email = ctx.signup_emails[ctx.signups % len(ctx.signup_emails)]
+        ctx.signups += 1
+        return await client.post("/api/auth/signup", json={"username": f"signup{ctx.signups:06d}"[:16],
+                                                           "email": email, "password": BENCH_PASSWORD})
+
+    async def request_email(client, ctx, worker, i):
+        email = ctx.signup_emails[ctx.email_requests % len(ctx.signup_emails)]
+        ctx.email_requests += 1
+        return await client.post("/api/auth/request_email", json={"email": email})
+
+    async def confirmed_email(client, ctx, worker, i):
+        from src.services.auth import auth_service
+        email = ctx.signup_emails[ctx.confirmations % len(ctx.signup_emails)]
+        ctx.confirmations += 1
+        return await client.get(f"/api/auth/confirmed_email/{auth_service.create_email_token({'sub': email})}")
+
+    async def login(client, ctx, worker, i):
+        return await client.post("/api/auth/login", data={"username": ctx.user(worker).email,
+                                                          "password": BENCH_PASSWORD})
+
+    async def refresh_token(client, ctx, worker, i):
+        token = ctx.refresh_tokens.get(worker)
+        if token is None:
+            response = await login(client, ctx, worker, i)
+            token = response.json()["refresh_token"]
+        response = await client.get("/api/auth/refresh_token", headers={"Authorization": f"Bearer {token}"})
+        if response.status_code == 200:
+            ctx.refresh_tokens[worker] = response.json()["refresh_token"]
+        return response
+
+    async def list_contacts(client, ctx, worker, i):
+        return await client.get("/api/contacts/", params={"limit": 100, "skip": ctx.rng.randint(0, 1000)},
+                                headers=ctx.user(worker).headers)
+
+    async def birthdays(client, ctx, worker, i):
+        return await client.get("/api/contacts/birthdays", params={"days": 7}, headers=ctx.user(worker).headers)
+
+    async def search(client, ctx, worker, i):
+        query = ctx.rng.choice(["Ivan", "olena", "Kovalenko", "shev", "Taras M", "melnyk"])
+        return await client.get(f"/api/contacts/query/{query}", headers=ctx.user(worker).headers)
+
+    async def export(client, ctx, worker, i):
+        return await client.get("/api/contacts/export", params={"format": ctx.rng.choice(["ndjson", "csv", "vcf"])},
+                                headers=ctx.user(worker).headers)
+
+    async def get_batch(client, ctx, worker, i):
+        ids = [ctx.contact_id(worker) for _ in range(ctx.batch_size)]
+        return await client.get("/api/contacts/batch", params={"ids": ids}, headers=ctx.user(worker).headers)
+
+    async def get_contact(client, ctx, worker, i):
+        return await client.get(f"/api/contacts/{ctx.contact_id(worker)}", headers=ctx.user(worker).headers)
+
+    async def me(client, ctx, worker, i):
+        return await client.get("/api/users/me/", headers=ctx.user(worker).headers)
+
+    async def create_contact(client, ctx, worker, i):
+        return await client.post("/api/contacts/", json=ctx.contact_body(i), headers=ctx.user(worker).headers)
+
+    async def import_contacts(client, ctx, worker, i):
+        return await client.post("/api/contacts/import", content=ctx.import_body,
+                                 headers={**ctx.user(worker).headers, "Content-Type": "text/csv"})
+
+    async def update_contact(client, ctx, worker, i):
+        return await client.put(f"/api/contacts/{ctx.contact_id(worker)}", json=ctx.contact_body(i),
+                                headers=ctx.user(worker).headers)
+
+    async def patch_contact(client, ctx, worker, i):
+        return await client.patch(f"/api/contacts/{ctx.contact_id(worker)}", json={"additional_data": f"patch {i}"},
+                                  headers=ctx.user(worker).headers)
+
+    async def update_batch(client, ctx, worker, i):
+        body = [dict(ctx.contact_body(i), id=ctx.contact_id(worker)) for _ in range(ctx.batch_size)]
+        return await client.put("/api/contacts/batch", json=body, headers=ctx.user(worker).headers)
+
+    async def avatar(client, ctx, worker, i):
+        return await client.patch("/api/users/avatar", files={"file": ("avatar.jpg", ctx.avatar, "image/jpeg")},
+                                  headers=ctx.user(worker).headers)
+
+    async def remove_contact(client, ctx, worker, i):
+        return await client.delete(f"/api/contacts/{ctx.scratch_ids.pop()}", headers=ctx.users[0].headers)
+
+    async def remove_batch(client, ctx, worker, i):
+        ids = [ctx.scratch_ids.pop() for _ in range(min(ctx.batch_size, len(ctx.scratch_ids)))]
+        return await client.delete("/api/contacts/batch", params={"ids": ids}, headers=ctx.users[0].headers)
+
+    return [
+        ("GET /", 1, root),
+        ("GET /api/users/me/", 1, me),
+        ("GET /api/contacts/", 1, list_contacts),
+        ("GET /api/contacts/{contact_id}", 1, get_contact),
+        ("GET /api/contacts/batch", 1, get_batch),
+        ("GET /api/contacts/birthdays", 1, birthdays),
+        ("GET /api/contacts/query/{query}", 1, search),
+        ("GET /api/contacts/export", 0.02, export),
+        ("GET /api/internal/db/pool", 0.2, None),
+        ("GET /api/internal/cache", 0.2, None),
+        ("GET /api/internal/mail", 0.2, None),
+        ("GET /api/internal/health", 0.2, None),
+        ("GET /metrics", 0.2, None),
+        ("POST /api/auth/signup", 0.1, signup),
+        ("POST /api/auth/request_email", 0.1, request_email),
+        ("GET /api/auth/confirmed_email/{token}", 0.1, confirmed_email),
+        ("POST /api/auth/login", 0.1, login),
+        ("GET /api/auth/refresh_token", 1, refresh_token),
+        ("POST /api/contacts/", 1, create_contact),
+        ("POST /api/contacts/import", 0.1, import_contacts),
+        ("PUT /api/contacts/{contact_id}", 1, update_contact),
+        ("PATCH /api/contacts/{contact_id}", 1, patch_contact),
+        ("PUT /api/contacts/batch", 0.2, update_batch),
+        ("PATCH /api/users/avatar", 0.1, avatar),
+        ("DELETE /api/contacts/{contact_id}", 1, remove_contact),
+        ("DELETE /api/contacts/batch", 1, remove_batch),
+    ]
+
+
+def internal_operation(path: str) -> Operation:
+    async def operation(client, ctx, worker, i):
+        return await client.get(path, headers={"X-Internal-Token": os.environ["INTERNAL_API_TOKEN"]})
+    return operation
+
+
+async def drive(client, ctx: Context, operation: Operation, requests: int, concurrency: int, warmup: int) -> dict:
+    """
+        Sends ``requests`` requests with ``concurrency`` workers and summarizes their latencies.
+
+        Responses with a status of 400 or more count as errors, grouped by status
+        (``exception`` for requests that raised).
+        """
+    for i in range(warmup):
+        await operation(client, ctx, i, -1 - i)
+    latencies, errors, counter = [], Counter(), iter(range(requests))
+
+    async def worker(index: int) -> None:
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await operation(client, ctx, index, i)
+                error = str(response.status_code) if response.status_code >= 400 else None
+            except Exception:
+                error = "exception"
+            elapsed = time.perf_counter() - start
+            if error:
+                errors[error] += 1
+            else:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_import_body(rows: int) -> bytes:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["name", "email", "phone_number", "birth_date", "additional_data"])
+    for i in range(rows):
+        writer.writerow([f"Imported {i}", f"imported{i}@example.com", "+380000000000", "1990-05-17", "import"])
+    return output.getvalue().encode()
+
+
+def make_avatar() -> bytes:
+    from PIL import Image
+    output = io.BytesIO()
+    Image.new("RGB", (2400, 1800), "teal").save(output, format="JPEG")
+    return output.getvalue()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import fakeredis.aioredis
+    import httpx
+    from fastapi.routing import APIRoute
+
+    from main import app
+    from src.conf.config import settings
+    from src.services import cache, mail_queue, rate_limit, refresh_tokens
+    from src.services.auth import auth_service
+    from src.services.mail_worker import MailWorker, SMTPPool
+    from src.services.resources import lifespan, resources
+    from src.services.smtp_stub import LocalSMTPServer
+
+    run_id = f"{int(time.time())}"
+    seed_start = time.perf_counter()
+    seeded, scratch_ids = seed(args, run_id)
+    seed_seconds = time.perf_counter() - seed_start
+
+    fake = fakeredis.aioredis.FakeRedis()
+    for holder in (resources, cache.user_cache, cache.response_cache, mail_queue.mail_queue,
+                   refresh_tokens.refresh_tokens, rate_limit.rate_limiter):
+        holder.redis = fake
+
+    users = [BenchUser(user_id, email, await auth_service.create_access_token({"sub": email}), first_id, last_id)
+             for user_id, email, first_id, last_id in seeded]
+    signups = max(int(args.requests * 0.1), 1) + args.warmup
+    ctx = Context(users=users, scratch_ids=scratch_ids,
+                  signup_emails=[f"signup-{run_id}-{i}@example.com" for i in range(signups)],
+                  batch_size=args.batch_size, import_body=make_import_body(args.import_rows),
+                  avatar=make_avatar(), rng=random.Random(args.seed))
+
+    plan = [(route, share, operation or internal_operation(route.split(" ", 1)[1]))
+            for route, share, operation in endpoints()]
+    if args.only:
+        plan = [entry for entry in plan if any(part in entry[0] for part in args.only)]
+    routes = {f"{method} {route.path}" for route in app.routes if isinstance(route, APIRoute)
+              for method in route.methods}
+    uncovered = sorted(routes - {route for route, _, _ in endpoints()})
+    if uncovered:
+        print(f"Routes without a benchmark: {', '.join(uncovered)}", file=sys.stderr)
+
+    async with LocalSMTPServer() as smtp:
+        pool = SMTPPool(settings.mail_smtp_pool_size, hostname=smtp.host, port=smtp.port, use_tls=False,
+                        start_tls=False, username="bench", password="bench")
+        worker = MailWorker(mail_queue.mail_queue, pool, "bench", settings.mail_queue_batch_size, poll_timeout=0.05)
+        stop = asyncio.Event()
+        mail_task = asyncio.create_task(worker.run(stop))
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with lifespan(app), \
+                httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for route, share, operation in plan:
+                requests = max(int(args.requests * share), 1)
+                warmup = 0 if route.startswith("DELETE") else min(args.warmup, requests)
+                results[route] = await drive(client, ctx, operation, requests, args.concurrency, warmup)
+                print(f"{route}: {json.dumps(results[route])}", file=sys.stderr)
+            stop.set()
+            await mail_task
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "database": settings.sqlalchemy_database_url.split(":", 1)[0],
+            "users": args.users,
+            "contacts": args.contacts,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "batch_size": args.batch_size,
+            "seed_seconds": round(seed_seconds, 2),
+            "mail_sent": worker.sent,
+            "uncovered_routes": uncovered,
+        },
+        "endpoints": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP load benchmark of the contacts API")
+    parser.add_argument("--users", type=int, default=4, help="seeded users")
+    parser.add_argument("--contacts", type=int, default=10000, help="seeded contacts, split between the users")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint (bcrypt bound and "
+                                                                  "export endpoints get a fraction)")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests before each endpoint")
+    parser.add_argument("--batch-size", type=int, default=50, help="ids per batch request")
+    parser.add_argument("--import-rows", type=int, default=100, help="rows per import request")
+    parser.add_argument("--seed", type=int, default=1, help="random seed of data and requests")
+    parser.add_argument("--database-url", help="benchmark this database instead of a temporary SQLite file")
+    parser.add_argument("--rate-limits", action="store_true", help="keep the configured rate limits")
+    parser.add_argument("--only", nargs="*", help="run only routes containing one of these substrings")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="contacts-bench-") as workdir:
+        configure(args, workdir)
+        report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+    Compares JWT verification cost of the available backends, with and without the claims cache.
+
+    Run from the project root::
+
+        python -m benchmarks.jwt_decode --tokens 100 --calls 20000
+
+    Prints one JSON object with the mean microseconds per ``decode`` call of every variant.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Callable
+
+from jose import jwt
+
+from benchmarks.http_load import ENV_DEFAULTS
+
+SECRET = "benchmark-secret-key-with-enough-entropy"
+
+
+def make_tokens(count: int) -> list[str]:
+    now = int(time.time())
+    return [jwt.encode({"sub": f"user{i}@example.com", "iat": now, "exp": now + 900, "scope": "access_token"},
+                       SECRET, algorithm="HS256") for i in range(count)]
+
+
+def measure(decode: Callable[[str], dict], tokens: list[str], calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        decode(tokens[i % len(tokens)])
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(tokens: int, calls: int) -> dict:
+    for name, value in ENV_DEFAULTS.items():
+        os.environ.setdefault(name, value)
+    os.environ.setdefault("SQLALCHEMY_DATABASE_URL", "sqlite:///:memory:")
+    from src.services.tokens import BACKENDS, TokenDecoder
+
+    sample = make_tokens(tokens)
+    results = {}
+    for backend in BACKENDS:
+        for cached in (False, True):
+            try:
+                decoder = TokenDecoder(SECRET, ["HS256"], backend=backend, maxsize=tokens if cached else 0)
+            except ImportError:
+                continue
+            results[f"{backend}{'+cache' if cached else ''}"] = round(measure(decoder.decode, sample, calls), 2)
+    return {"tokens": tokens, "calls": calls, "us_per_call": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JWT verification")
+    parser.add_argument("--tokens", type=int, default=100, help="distinct tokens in rotation")
+    parser.add_argument("--calls", type=int, default=20000, help="decode calls per variant")
+    args = parser.parse_args()
+    print(json.dumps(main(args.tokens, args.calls), indent=2))
@@ -0,0 +1,107 @@
+"""
+    Compares the CPU cost of one page of contacts through the ORM path and the Core rows path.
+
+    The ORM path loads ``Contact`` objects and validates them into ``ResponseContact`` before
+    encoding, as the list endpoints used to; the rows path selects plain column tuples and
+    encodes them with ``dump_contact_rows``. Both read the same page of a temporary SQLite
+    database and produce the same JSON.
+
+    Run from the project root::
+
+        python -m benchmarks.serialization --contacts 1000 --limits 10 100 500 --pages 300
+
+    Prints one JSON object with the mean process CPU and wall microseconds per page of every
+    variant and limit, including the database round trip.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.http_load import ENV_DEFAULTS
+
+
+def seed(url: str, contacts: int) -> None:
+    from sqlalchemy import create_engine, insert
+
+    from src.database.models import Base, Contact, User, birthday_key
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), {"id": 1, "username": "bench", "email": "bench@example.com", "password": "x",
+                                    "confirmed": True, "avatar": ""})
+        conn.execute(insert(Contact), [{
+            "name": f"Contact {i}", "email": f"contact{i}@example.com", "phone_number": f"+380{500000000 + i}",
+            "birth_date": date(1990, 1 + i % 12, 1 + i % 28), "birth_mmdd": birthday_key(date(1990, 1 + i % 12, 1 + i % 28)),
+            "additional_data": "note", "user_id": 1,
+        } for i in range(contacts)])
+    engine.dispose()
+
+
+async def measure(url: str, limits: list[int], pages: int) -> dict:
+    from typing import List
+
+    from pydantic import TypeAdapter
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from src.database.db import get_async_url
+    from src.database.models import User
+    from src.repository import contacts as repository_contacts
+    from src.schemas import ResponseContact
+    from src.services.serializers import dump_contact_rows, orjson
+
+    adapter = TypeAdapter(List[ResponseContact])
+    engine = create_async_engine(get_async_url(url))
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    user = User(id=1)
+
+    async def orm_page(db: AsyncSession, limit: int) -> bytes:
+        contacts = await repository_contacts.get_contacts(0, limit, user, db)
+        return adapter.dump_json(adapter.validate_python(contacts, from_attributes=True))
+
+    async def rows_page(db: AsyncSession, limit: int) -> bytes:
+        return dump_contact_rows(await repository_contacts.get_contacts(0, limit, user, db, rows=True))
+
+    results = {}
+    for limit in limits:
+        async with sessions() as db:
+            if await orm_page(db, limit) != await rows_page(db, limit):
+                raise AssertionError(f"Serializers disagree for limit={limit}")
+        for name, page in (("orm", orm_page), ("rows", rows_page)):
+            async with sessions() as db:
+                cpu, wall = time.process_time(), time.perf_counter()
+                for _ in range(pages):
+                    await page(db, limit)
+                    db.expunge_all()
+                cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+            results.setdefault(str(limit), {})[name] = {
+                "cpu_us": round(cpu / pages * 1e6, 1),
+                "wall_us": round(wall / pages * 1e6, 1),
+            }
+        page_results = results[str(limit)]
+        page_results["cpu_speedup"] = round(page_results["orm"]["cpu_us"] / page_results["rows"]["cpu_us"], 2)
+    await engine.dispose()
+    return {"encoder": "orjson" if orjson is not None else "pydantic", "pages": pages, "limits": results}
+
+
+def main(contacts: int, limits: list[int], pages: int) -> dict:
+    for name, value in ENV_DEFAULTS.items():
+        os.environ.setdefault(name, value)
+    with tempfile.TemporaryDirectory() as workdir:
+        url = f"sqlite:///{workdir}/bench.db"
+        os.environ["SQLALCHEMY_DATABASE_URL"] = url
+        seed(url, contacts)
+        return asyncio.run(measure(url, limits, pages))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark contact list serialization")
+    parser.add_argument("--contacts", type=int, default=1000, help="contacts of the benchmark user")
+    parser.add_argument("--limits", type=int, nargs="+", default=[10, 100, 500], help="page sizes")
+    parser.add_argument("--pages", type=int, default=300, help="pages fetched per variant and limit")
+    args = parser.parse_args()
+    print(json.dumps(main(args.contacts, args.limits, args.pages), indent=2))
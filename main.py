@@ -1,11 +1,15 @@
+from pathlib import Path
+
 from fastapi import FastAPI
-import redis.asyncio as redis
-from fastapi_limiter import FastAPILimiter
-from src.routes import contacts,auth,users
+from fastapi.staticfiles import StaticFiles
 from src.conf.config import settings
+from src.routes import contacts,auth,users,internal,metrics
+from src.services.metrics import MetricsMiddleware
+from src.database.db import query_profiler
+from src.services.resources import lifespan
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = ["http://localhost:3000"]
 app.add_middleware(
@@ -14,16 +18,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 app.include_router(contacts.router, prefix='/api')
 app.include_router(auth.router, prefix='/api')
 app.include_router(users.router, prefix='/api')
+app.include_router(internal.router, prefix='/api')
+
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
+if settings.metrics_enabled or settings.debug:
+    app.add_middleware(MetricsMiddleware, routes=app.routes, profiler=query_profiler, debug_headers=settings.debug)
+
+if settings.avatar_storage == "filesystem":
+    Path(settings.avatar_storage_path).mkdir(parents=True, exist_ok=True)
+    app.mount(settings.avatar_base_url, StaticFiles(directory=settings.avatar_storage_path), name="avatars")
+
 
-@app.on_event("startup")
-async def startup():
-    r = await redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0, encoding="utf-8",
-                          decode_responses=True)
-    await FastAPILimiter.init(r)
 @app.get("/")
 def read_root():
     return {"message": "Hello World"}
@@ -0,0 +1,53 @@
+"""contacts search indexes
+
+Revision ID: 6c0f9d2e8b14
+Revises: 3b7e21c4d9a0
+Create Date: 2026-10-17 11:03:27.540918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c0f9d2e8b14'
+down_revision: Union[str, None] = '3b7e21c4d9a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_contacts_name_trgm', 'contacts', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index('ix_contacts_email_trgm', 'contacts', ['email'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'})
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE contacts_fts USING fts5("
+                   "name, email, content='contacts', content_rowid='id', tokenize='trigram')")
+        op.execute("CREATE TRIGGER contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+                   "INSERT INTO contacts_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END")
+        op.execute("CREATE TRIGGER contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+                   "INSERT INTO contacts_fts(contacts_fts, rowid, name, email) "
+                   "VALUES ('delete', old.id, old.name, old.email); END")
+        op.execute("CREATE TRIGGER contacts_fts_au AFTER UPDATE OF name, email ON contacts BEGIN "
+                   "INSERT INTO contacts_fts(contacts_fts, rowid, name, email) "
+                   "VALUES ('delete', old.id, old.name, old.email); "
+                   "INSERT INTO contacts_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END")
+        op.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_contacts_email_trgm', table_name='contacts')
+        op.drop_index('ix_contacts_name_trgm', table_name='contacts')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS contacts_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS contacts_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS contacts_fts_ai')
+        op.execute('DROP TABLE IF EXISTS contacts_fts')
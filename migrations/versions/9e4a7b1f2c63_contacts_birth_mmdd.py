@@ -0,0 +1,34 @@
+"""contacts birth_mmdd
+
+Revision ID: 9e4a7b1f2c63
+Revises: 6c0f9d2e8b14
+Create Date: 2026-10-17 12:41:09.118372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4a7b1f2c63'
+down_revision: Union[str, None] = '6c0f9d2e8b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('birth_mmdd', sa.Integer(), nullable=True))
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("UPDATE contacts SET birth_mmdd = CAST(strftime('%m', birth_date) AS INTEGER) * 100 "
+                   "+ CAST(strftime('%d', birth_date) AS INTEGER) WHERE birth_date IS NOT NULL")
+    else:
+        op.execute("UPDATE contacts SET birth_mmdd = EXTRACT(MONTH FROM birth_date) * 100 "
+                   "+ EXTRACT(DAY FROM birth_date) WHERE birth_date IS NOT NULL")
+    op.create_index('ix_contacts_user_id_birth_mmdd', 'contacts', ['user_id', 'birth_mmdd'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_user_id_birth_mmdd', table_name='contacts')
+    op.drop_column('contacts', 'birth_mmdd')
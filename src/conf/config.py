@@ -1,20 +1,69 @@
+from typing import Dict, List
+
 from pydantic.v1 import BaseSettings
 
 
 class Settings(BaseSettings):
     sqlalchemy_database_url: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_slow_query_threshold: float = 0.2
     secret_key: str
     algorithm: str
+    jwt_backend: str = "jose"
+    jwt_claims_cache_size: int = 4096
+    refresh_token_ttl: int = 7 * 24 * 3600
     mail_username: str
     mail_password: str
     mail_from: str
     mail_port: int
     mail_server: str
+    mail_from_name: str = "Desired Name"
+    mail_starttls: bool = False
+    mail_ssl_tls: bool = True
+    mail_use_credentials: bool = True
+    mail_validate_certs: bool = True
+    mail_queue_batch_size: int = 50
+    mail_smtp_pool_size: int = 2
+    mail_max_attempts: int = 5
+    mail_retry_backoff: float = 30
     redis_host: str = 'localhost'
     redis_port: int = 6379
+    redis_max_connections: int = 50
+    user_cache_ttl: int = 900
+    user_cache_local_ttl: int = 30
+    user_cache_maxsize: int = 1024
+    response_cache_ttl: int = 300
+    response_cache_version_ttl: int = 86400
+    response_cache_routes: List[str] = ["get_contacts", "search_birthdays", "get_contacts_query", "get_contact"]
+    rate_limits: Dict[str, str] = {}
+    rate_limit_lease_size: int = 10
+    rate_limit_lease_fraction: float = 0.2
+    rate_limit_redis_timeout: float = 0.05
+    rate_limit_local_maxsize: int = 10000
+    password_hash_workers: int = 0
+    password_hash_use_processes: bool = True
+    password_hash_max_pending: int = 64
+    password_hash_max_wait: float = 5.0
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    avatar_storage: str = "cloudinary"
+    avatar_storage_path: str = "static/avatars"
+    avatar_base_url: str = "/static/avatars"
+    avatar_size: int = 250
+    metrics_enabled: bool = False
+    internal_api_token: str = ""
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0
+    server_preload: bool = True
+    server_graceful_timeout: int = 30
+    server_backlog: int = 2048
+    debug: bool = False
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
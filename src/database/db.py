@@ -1,17 +1,241 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import bisect
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.conf.config import  settings
 SQLALCHEMY_DATABASE_URL =settings.sqlalchemy_database_url
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_url(url: str) -> str:
+    """
+        Converts a synchronous database URL into its async driver equivalent.
+
+        :param url: The database URL, e.g. postgresql://... or sqlite:///...
+        :type url: str
+        :return: The URL with an async driver (asyncpg / aiosqlite).
+        :rtype: str
+        """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS and url.drivername != ASYNC_DRIVERS[backend]:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url.render_as_string(hide_password=False)
+
+
+class PoolWaitStats:
+    """
+        Histogram of the time spent waiting for a pooled connection.
+        """
+    buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        """
+            Returns the histogram with cumulative bucket counts, keyed by upper bound in seconds.
+
+            :return: Wait time statistics.
+            :rtype: dict
+            """
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"buckets": buckets, "count": self.count, "sum": self.sum, "max": self.max, "timeouts": self.timeouts}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+        AsyncAdaptedQueuePool that records how long every checkout waits for a connection.
+        """
+    wait_stats = PoolWaitStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            self.wait_stats.observe(time.perf_counter() - start)
+
+
+def parameters_shape(parameters, executemany: bool = False) -> str:
+    """
+        Describes statement parameters by their names and types, never their values.
+
+        :param parameters: The DBAPI parameters of a statement.
+        :param executemany: Whether the parameters are a sequence of parameter sets.
+        :type executemany: bool
+        :return: E.g. ``{email: str, limit_1: int}`` or ``500 x (int, str)``.
+        :rtype: str
+        """
+    if executemany:
+        parameters = list(parameters)
+        return f"{len(parameters)} x {parameters_shape(parameters[0])}" if parameters else "0 x ()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+
+class QueryProfile:
+    """
+        Statements executed while handling one request.
+        """
+    __slots__ = ("count", "duration", "slowest", "slowest_duration", "executions")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest: str | None = None
+        self.slowest_duration = 0.0
+        self.executions: Counter = Counter()
+
+    def record(self, statement: str, parameters, duration: float, executemany: bool = False) -> None:
+        self.count += 1
+        self.duration += duration
+        if duration >= self.slowest_duration:
+            self.slowest, self.slowest_duration = statement, duration
+        if not executemany:
+            self.executions[(statement, repr(parameters))] += 1
+
+    def repeated(self) -> dict[str, int]:
+        """
+            Returns the statements executed more than once with identical parameters.
+
+            :return: Executions per repeated statement.
+            :rtype: dict[str, int]
+            """
+        repeated = {}
+        for (statement, _), count in self.executions.items():
+            if count > 1:
+                repeated[statement] = max(repeated.get(statement, 0), count)
+        return repeated
+
+
+class QueryProfiler:
+    """
+        Times every statement through engine events.
+
+        Statements slower than ``slow_threshold`` seconds are logged with the shape of their
+        parameters. While a :meth:`profile` block is active, e.g. around one request, the
+        statements are also counted into its :class:`QueryProfile`. The profile is kept in a
+        context variable, which SQLAlchemy's async greenlets share with the calling task.
+        """
+
+    def __init__(self, slow_threshold: float):
+        self.slow_threshold = slow_threshold
+        self.slow_queries = 0
+        self._current: ContextVar[QueryProfile | None] = ContextVar("query_profile", default=None)
+
+    def attach(self, sync_engine) -> None:
+        event.listen(sync_engine, "before_cursor_execute", self._before_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_execute)
+        event.listen(sync_engine, "handle_error", self._handle_error)
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _handle_error(exception_context):
+        # A statement that failed in the driver has no after_cursor_execute to pop its start time.
+        if exception_context.execution_context is not None and exception_context.statement is not None:
+            starts = exception_context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        profile = self._current.get()
+        if profile is not None:
+            profile.record(statement, parameters, duration, executemany)
+        if duration >= self.slow_threshold:
+            self.slow_queries += 1
+            logger.warning("Slow query (%.1f ms): %s -- parameters %s", duration * 1000,
+                           " ".join(statement.split()), parameters_shape(parameters, executemany))
+
+    @contextmanager
+    def profile(self):
+        """
+            Collects the statements executed inside the block.
+
+            :return: The profile, filled in as statements run.
+            :rtype: QueryProfile
+            """
+        profile = QueryProfile()
+        token = self._current.set(profile)
+        try:
+            yield profile
+        finally:
+            self._current.reset(token)
+
+
+query_profiler = QueryProfiler(slow_threshold=settings.db_slow_query_threshold)
+
+
+engine = create_async_engine(
+    get_async_url(SQLALCHEMY_DATABASE_URL),
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+)
+
+query_profiler.attach(engine.sync_engine)
+
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def pool_status() -> dict:
+    """
+        Returns live statistics of the application connection pool.
+
+        :return: Pool size, checked in/out and overflow connections and the checkout wait histogram.
+        :rtype: dict
+        """
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.db_max_overflow,
+        "timeout": settings.db_pool_timeout,
+        "wait": InstrumentedQueuePool.wait_stats.snapshot(),
+    }
 
 
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
-
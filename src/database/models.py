@@ -1,22 +1,50 @@
-from sqlalchemy import Column, Integer, String,func,ForeignKey,Boolean
+from sqlalchemy import Column, Integer, String,func,ForeignKey,Boolean,Index,DDL,event
 from sqlalchemy.sql.sqltypes import DateTime
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 Base = declarative_base()
 
 
+def birthday_key(value) -> int | None:
+    """
+        Returns the month and day of a date as a sortable MMDD integer, e.g. 1231 for December 31.
+
+        :param value: A date or datetime.
+        :return: The MMDD key, or None for an empty date.
+        :rtype: int | None
+        """
+    if value is None:
+        return None
+    return value.month * 100 + value.day
+
+
 class Contact(Base):
     __tablename__ = "contacts"
     id = Column(Integer, primary_key=True)
     name = Column(String(50), nullable=False)
     email = Column(String(50), nullable=False)
     birth_date = Column('birth_date', DateTime)
+    birth_mmdd = Column('birth_mmdd', Integer, nullable=True)
     phone_number = Column('phone_number',String(50),nullable=False)
     additional_data = Column('additional_data',String(150), nullable=False)
     user_id = Column('user_id', ForeignKey('users.id', ondelete='CASCADE'), default=None)
     user = relationship('User', backref="notes")
 
+    @validates('birth_date')
+    def validate_birth_date(self, key, value):
+        self.birth_mmdd = birthday_key(value)
+        return value
+
+    __table_args__ = (
+        Index('ix_contacts_user_id_id', 'user_id', 'id'),
+        Index('ix_contacts_user_id_birth_mmdd', 'user_id', 'birth_mmdd'),
+        Index('ix_contacts_name_trgm', 'name', postgresql_using='gin',
+              postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        Index('ix_contacts_email_trgm', 'email', postgresql_using='gin',
+              postgresql_ops={'email': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
 
 class User(Base):
     __tablename__ = "users"
@@ -30,3 +58,24 @@ class User(Base):
     confirmed = Column(Boolean, default=False)
 
 
+# Search indexes: pg_trgm GIN indexes on Postgres, an external content FTS5 table with a trigram
+# tokenizer (kept in sync by triggers) on SQLite.
+event.listen(Base.metadata, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
+CONTACTS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5("
+    "name, email, content='contacts', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN "
+    "INSERT INTO contacts_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE OF name, email ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, name, email) VALUES ('delete', old.id, old.name, old.email); "
+    "INSERT INTO contacts_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+]
+for statement in CONTACTS_FTS_DDL:
+    event.listen(Contact.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Contact.__table__, "before_drop",
+             DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"))
+
@@ -1,17 +1,34 @@
-from datetime import datetime, timedelta
-from typing import List
+from datetime import date, timedelta
+from typing import AsyncIterator, List, Sequence
 
-from sqlalchemy import or_, extract,and_
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, or_, and_, bindparam, case, delete, insert, select, update, func, table, column, \
+    literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import Contact,User
-from src.schemas import ContactModel
+from src.database.models import Contact, User, birthday_key
+from src.schemas import ContactModel, ContactPatch, ContactUpdate
+from src.services.cache import response_cache
 
+CONTACT_COLUMNS = (Contact.id, Contact.name, Contact.email, Contact.phone_number, Contact.birth_date,
+                   Contact.additional_data)
 
-async def get_contacts(skip: int, limit: int,user: User , db: Session) -> List[Contact]:
+
+def _select_contacts(rows: bool):
+    return select(*CONTACT_COLUMNS) if rows else select(Contact)
+
+
+def _fetch(result, rows: bool) -> list:
+    return list(result.all() if rows else result.scalars().all())
+
+
+async def get_contacts(skip: int, limit: int,user: User , db: AsyncSession, after_id: int | None = None,
+                       rows: bool = False) -> List[Contact] | List[Row]:
     """
         Retrieves a list of contacts for a specific user with specified pagination parameters.
 
+        Contacts are ordered by id. When ``after_id`` is given the page starts right after that
+        contact (keyset pagination over the (user_id, id) index) and ``skip`` is ignored.
+
         :param skip: The number of contacts to skip.
         :type skip: int
         :param limit: The maximum number of contacts to return.
@@ -19,14 +36,52 @@ async def get_contacts(skip: int, limit: int,user: User , db: Session) -> List[C
         :param user: The user to retrieve contacts for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
+        :param after_id: The id of the last contact of the previous page.
+        :type after_id: int | None
+        :param rows: Return plain ``CONTACT_COLUMNS`` tuples instead of ORM objects.
+        :type rows: bool
         :return: A list of contacts.
-        :rtype: List[Contacts]
+        :rtype: List[Contacts] | List[Row]
         """
-    return db.query(Contact).filter(Contact.user_id==user.id).offset(skip).limit(limit).all()
+    stmt = _select_contacts(rows).filter(Contact.user_id == user.id).order_by(Contact.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.filter(Contact.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+    result = await db.execute(stmt)
+    return _fetch(result, rows)
 
 
-async def get_contact(contact_id: int, user: User ,db: Session) -> Contact:
+async def stream_contacts(user: User, db: AsyncSession, partition_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+    """
+        Streams all contacts of a specific user through a server-side cursor.
+
+        Rows are plain tuples (id, name, email, phone_number, birth_date, additional_data) rather
+        than ORM objects and arrive in partitions, so memory stays constant regardless of the
+        number of contacts.
+
+        :param user: The user to retrieve contacts for.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :param partition_size: The number of rows fetched from the cursor at a time.
+        :type partition_size: int
+        :return: Partitions of contact rows ordered by id.
+        :rtype: AsyncIterator[Sequence[Row]]
+        """
+    stmt = (
+        select(*CONTACT_COLUMNS)
+        .filter(Contact.user_id == user.id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=partition_size)
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def get_contact(contact_id: int, user: User ,db: AsyncSession) -> Contact:
     """
         Retrieves a single contact with the specified ID for a specific user.
 
@@ -35,14 +90,16 @@ async def get_contact(contact_id: int, user: User ,db: Session) -> Contact:
         :param user: The user to retrieve the contact for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :return: The contact with the specified ID, or None if it does not exist.
         :rtype: Note | None
         """
-    return db.query(Contact).filter(and_(Contact.id == contact_id,Contact.user_id==user.id )).first()
+    stmt = select(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id))
+    result = await db.execute(stmt)
+    return result.scalars().first()
 
 
-async def create_contact(body: ContactModel, user: User , db: Session) -> Contact:
+async def create_contact(body: ContactModel, user: User , db: AsyncSession) -> Contact:
     """
        Creates a new contact for a specific user.
 
@@ -51,7 +108,7 @@ async def create_contact(body: ContactModel, user: User , db: Session) -> Contac
        :param user: The user to create the contact for.
        :type user: User
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :return: The newly created contact.
        :rtype: Contact
        """
@@ -64,15 +121,69 @@ async def create_contact(body: ContactModel, user: User , db: Session) -> Contac
         user_id = user.id
     )
     db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    await db.commit()
+    await db.refresh(contact)
+    await response_cache.bump(user.id)
     return contact
 
 
-async def update_contact(contact_id: int, body: ContactModel,user: User , db: Session) -> Contact | None:
+async def create_contacts(bodies: List[ContactModel], user: User, db: AsyncSession) -> int:
+    """
+       Creates a batch of contacts for a specific user with a single executemany INSERT.
+
+       :param bodies: The data for the contacts to create.
+       :type bodies: List[ContactModel]
+       :param user: The user to create the contacts for.
+       :type user: User
+       :param db: The database session.
+       :type db: AsyncSession
+       :return: The number of created contacts.
+       :rtype: int
+       """
+    if not bodies:
+        return 0
+    await db.execute(insert(Contact), [
+        {
+            "name": body.name,
+            "email": body.email,
+            "phone_number": body.phone_number,
+            "birth_date": body.birth_date,
+            "birth_mmdd": birthday_key(body.birth_date),
+            "additional_data": body.additional_data,
+            "user_id": user.id,
+        }
+        for body in bodies
+    ])
+    await db.commit()
+    await response_cache.bump(user.id)
+    return len(bodies)
+
+
+async def _update_contact(contact_id: int, values: dict, user: User, db: AsyncSession) -> Contact | None:
+    if not values:
+        return await get_contact(contact_id, user, db)
+    if "birth_date" in values:
+        values["birth_mmdd"] = birthday_key(values["birth_date"])
+    stmt = update(Contact).where(Contact.id == contact_id, Contact.user_id == user.id).values(**values)
+    if db.get_bind().dialect.update_returning:
+        result = await db.execute(stmt.returning(Contact))
+        contact = result.scalars().first()
+    else:
+        result = await db.execute(stmt)
+        contact = await get_contact(contact_id, user, db) if result.rowcount else None
+    await db.commit()
+    if contact:
+        await response_cache.bump(user.id)
+    return contact
+
+
+async def update_contact(contact_id: int, body: ContactModel,user: User , db: AsyncSession) -> Contact | None:
     """
         Updates a single note with the specified ID for a specific user.
 
+        Runs a single UPDATE ... RETURNING statement; databases without RETURNING read the row
+        back in the same transaction.
+
         :param contact_id: The ID of the note to update.
         :type contact_id: int
         :param body: The updated data for the contact.
@@ -80,88 +191,243 @@ async def update_contact(contact_id: int, body: ContactModel,user: User , db: Se
         :param user: The user to update the contact for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :return: The updated contact, or None if it does not exist.
         :rtype: Contact | None
         """
-    contact = db.query(Contact).filter(and_(Contact.id == contact_id,Contact.user_id==user.id)).first()
-    if contact:
-        contact.name = body.name
-        contact.email = body.email
-        contact.phone_number = body.phone_number
-        contact.birth_date = body.birth_date
-        contact.additional_data = body.additional_data
-        db.commit()
-    return contact
+    return await _update_contact(contact_id, body.model_dump(), user, db)
+
+
+async def patch_contact(contact_id: int, body: ContactPatch, user: User, db: AsyncSession) -> Contact | None:
+    """
+        Updates only the fields of a contact that were sent, with a single UPDATE ... RETURNING statement.
+
+        :param contact_id: The ID of the contact to update.
+        :type contact_id: int
+        :param body: The fields to change; fields that are missing or null are left as they are.
+        :type body: ContactPatch
+        :param user: The user to update the contact for.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :return: The updated contact, or None if it does not exist.
+        :rtype: Contact | None
+        """
+    return await _update_contact(contact_id, body.model_dump(exclude_unset=True, exclude_none=True), user, db)
 
 
-async def remove_contact(contact_id: int,user: User , db: Session) -> Contact | None:
+async def remove_contact(contact_id: int,user: User , db: AsyncSession) -> Contact | None:
     """
         Removes a single contact with the specified ID for a specific user.
 
+        Runs a single DELETE ... RETURNING statement; databases without RETURNING read the row
+        first in the same transaction.
+
         :param contact_id: The ID of the contact to remove.
         :type contact_id: int
         :param user: The user to remove the contact for.
         :type user: User
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :return: The removed contact, or None if it does not exist.
         :rtype: Contact| None
         """
-    contact = db.query(Contact).filter(and_(Contact.id == contact_id,Contact.user_id==user.id)).first()
+    stmt = delete(Contact).where(Contact.id == contact_id, Contact.user_id == user.id)
+    if db.get_bind().dialect.delete_returning:
+        result = await db.execute(stmt.returning(Contact))
+        contact = result.scalars().first()
+    else:
+        contact = await get_contact(contact_id, user, db)
+        if contact:
+            await db.execute(stmt)
+    await db.commit()
     if contact:
-        db.delete(contact)
-        db.commit()
+        await response_cache.bump(user.id)
     return contact
 
 
-async def search_contacts(query: str,user: User , db: Session)-> List[Contact]:
+async def get_contacts_by_ids(ids: Sequence[int], user: User, db: AsyncSession) -> List[Contact]:
+    """
+        Retrieves the user's contacts with the given IDs in a single IN query.
+
+        :param ids: The IDs of the contacts to retrieve.
+        :type ids: Sequence[int]
+        :param user: The user to retrieve the contacts for.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :return: The found contacts ordered by id; IDs that do not exist are left out.
+        :rtype: List[Contact]
+        """
+    if not ids:
+        return []
+    result = await db.execute(
+        select(Contact).filter(Contact.user_id == user.id, Contact.id.in_(set(ids))).order_by(Contact.id)
+    )
+    return list(result.scalars().all())
+
+
+async def update_contacts(bodies: List[ContactUpdate], user: User, db: AsyncSession) -> set[int]:
+    """
+        Updates a batch of the user's contacts in one transaction with a single executemany UPDATE.
+
+        :param bodies: The new data of the contacts, each with the ID of the contact to update.
+        :type bodies: List[ContactUpdate]
+        :param user: The user to update the contacts for.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :return: The IDs of the updated contacts.
+        :rtype: set[int]
+        """
+    if not bodies:
+        return set()
+    result = await db.execute(
+        select(Contact.id).filter(Contact.user_id == user.id, Contact.id.in_({body.id for body in bodies}))
+    )
+    found = set(result.scalars().all())
+    if found:
+        contacts = Contact.__table__
+        await db.execute(
+            update(contacts).where(contacts.c.id == bindparam("contact_id"), contacts.c.user_id == user.id),
+            [
+                {
+                    "contact_id": body.id,
+                    "name": body.name,
+                    "email": body.email,
+                    "phone_number": body.phone_number,
+                    "birth_date": body.birth_date,
+                    "birth_mmdd": birthday_key(body.birth_date),
+                    "additional_data": body.additional_data,
+                }
+                for body in bodies if body.id in found
+            ],
+        )
+        await db.commit()
+        await response_cache.bump(user.id)
+    return found
+
+
+async def remove_contacts(ids: Sequence[int], user: User, db: AsyncSession) -> set[int]:
+    """
+        Removes a batch of the user's contacts with a single DELETE.
+
+        Uses DELETE ... RETURNING where the database supports it, otherwise looks up the
+        existing IDs first in the same transaction.
+
+        :param ids: The IDs of the contacts to remove.
+        :type ids: Sequence[int]
+        :param user: The user to remove the contacts for.
+        :type user: User
+        :param db: The database session.
+        :type db: AsyncSession
+        :return: The IDs of the removed contacts.
+        :rtype: set[int]
+        """
+    if not ids:
+        return set()
+    criteria = (Contact.user_id == user.id, Contact.id.in_(set(ids)))
+    if db.get_bind().dialect.delete_returning:
+        result = await db.execute(delete(Contact).where(*criteria).returning(Contact.id))
+        removed = set(result.scalars().all())
+    else:
+        result = await db.execute(select(Contact.id).filter(*criteria))
+        removed = set(result.scalars().all())
+        await db.execute(delete(Contact).where(*criteria))
+    await db.commit()
+    if removed:
+        await response_cache.bump(user.id)
+    return removed
+
+
+FTS_MIN_QUERY_LENGTH = 3
+
+contacts_fts = table("contacts_fts", column("rowid"))
+
+
+async def search_contacts(query: str,user: User , db: AsyncSession, skip: int = 0, limit: int = 50,
+                          rows: bool = False)-> List[Contact] | List[Row]:
     """
            Retrieves contacts with the specified name or email for a specific user.
 
+           Matches are case-insensitive substrings of name or email, ordered by relevance.
+           On Postgres the filter is served by the pg_trgm GIN indexes and ranked by trigram
+           similarity, on SQLite by the contacts_fts FTS5 table ranked by bm25. Queries shorter
+           than a trigram fall back to a plain LIKE filter.
+
            :param query: The filter of the contact to retrieve.
            :type query: str
            :param user: The user to retrieve the contact for.
            :type user: User
            :param db: The database session.
-           :type db: Session
+           :type db: AsyncSession
+           :param skip: The number of matches to skip.
+           :type skip: int
+           :param limit: The maximum number of matches to return.
+           :type limit: int
+           :param rows: Return plain ``CONTACT_COLUMNS`` tuples instead of ORM objects.
+           :type rows: bool
            :return: a list of contacts.
-           :rtype: List[Contact]
+           :rtype: List[Contact] | List[Row]
            """
-    contacts = (
-        db.query(Contact)
-        .filter(and_(
-            or_(
-                Contact.name.contains(query),
-                Contact.email.contains(query)
-            ),Contact.user_id==user.id)
+    dialect = db.get_bind().dialect.name
+    stmt = _select_contacts(rows).filter(Contact.user_id == user.id)
+    if dialect == "sqlite" and len(query) >= FTS_MIN_QUERY_LENGTH:
+        phrase = '"' + query.replace('"', '""') + '"'
+        stmt = (
+            stmt.join(contacts_fts, contacts_fts.c.rowid == Contact.id)
+            .filter(literal_column("contacts_fts").op("MATCH")(phrase))
+            .order_by(func.bm25(literal_column("contacts_fts")), Contact.id)
         )
-        .all()
-    )
-    return contacts
+    else:
+        stmt = stmt.filter(or_(
+            Contact.name.icontains(query, autoescape=True),
+            Contact.email.icontains(query, autoescape=True)
+        ))
+        if dialect == "postgresql":
+            stmt = stmt.order_by(
+                func.greatest(func.similarity(Contact.name, query), func.similarity(Contact.email, query)).desc(),
+                Contact.id,
+            )
+        else:
+            stmt = stmt.order_by(Contact.id)
+    result = await db.execute(stmt.offset(skip).limit(limit))
+    return _fetch(result, rows)
 
 
-async def get_birthdays(user: User ,db: Session) -> List[Contact]:
+async def get_birthdays(user: User ,db: AsyncSession, days: int = 7, today: date | None = None,
+                        rows: bool = False) -> List[Contact] | List[Row]:
     """
                Retrieves contacts with the specified birthday for a specific user.
 
+               Uses the indexed birth_mmdd column, so the lookup is a range scan on
+               (user_id, birth_mmdd). A window that crosses the new year is split into
+               two ranges; contacts are returned in upcoming order.
+
                :param user: The user to retrieve the contact for.
                :type user: User
                :param db: The database session.
-               :type db: Session
+               :type db: AsyncSession
+               :param days: The number of days ahead to look for birthdays, today included.
+               :type days: int
+               :param today: The first day of the window, defaults to the current date.
+               :type today: date | None
+               :param rows: Return plain ``CONTACT_COLUMNS`` tuples instead of ORM objects.
+               :type rows: bool
                :return: a list of contacts with specified birthday.
-               :rtype: List[Contact]
+               :rtype: List[Contact] | List[Row]
                """
-    today = datetime.today()
-    end_date = today + timedelta(days=7)
-    contacts = (
-        db.query(Contact)
-        .filter(and_(
-            ((extract('month', Contact.birth_date) == today.month) & (
-                    extract('day', Contact.birth_date) >= today.day)) |
-            ((extract('month', Contact.birth_date) == end_date.month) & (
-                    extract('day', Contact.birth_date) <= end_date.day))
-        ),Contact.user_id==user.id)
-        .all()
-    )
-    return contacts
+    today = today or date.today()
+    end_date = today + timedelta(days=days)
+    start_key = birthday_key(today)
+    end_key = birthday_key(end_date)
+    stmt = _select_contacts(rows).filter(Contact.user_id == user.id)
+    if days >= 365:
+        stmt = stmt.filter(Contact.birth_mmdd.is_not(None))
+    elif end_date.year == today.year:
+        stmt = stmt.filter(Contact.birth_mmdd.between(start_key, end_key))
+    else:
+        stmt = stmt.filter(or_(Contact.birth_mmdd >= start_key, Contact.birth_mmdd <= end_key))
+    stmt = stmt.order_by(case((Contact.birth_mmdd >= start_key, 0), else_=1), Contact.birth_mmdd, Contact.id)
+    result = await db.execute(stmt)
+    return _fetch(result, rows)
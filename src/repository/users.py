@@ -1,47 +1,51 @@
 from libgravatar import Gravatar
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
+from src.services.cache import user_cache
 from src.schemas import UserModel
 
 
-async def confirmed_email(email: str, db: Session) -> None:
+async def confirmed_email(email: str, db: AsyncSession) -> None:
     """
        Confirms the user's email address in the database and saves this change.
 
        :param email: A string representing the user's email address to be confirmed.
        :type email: str
-       :param db: Session for interacting with the database.
-       :type db: Session
+       :param db: AsyncSession for interacting with the database.
+       :type db: AsyncSession
        :return: None
        :rtype: None
        """
     user = await get_user_by_email(email, db)
     user.confirmed = True
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(email)
 
-async def get_user_by_email(email: str, db: Session) -> User:
+async def get_user_by_email(email: str, db: AsyncSession) -> User:
     """
        Retrieves a user by their email address from the database.
 
        :param email: A string representing the email address of the user to search for.
        :type email: str
-       :param db: Session for interacting with the database.
-       :type db: Session
+       :param db: AsyncSession for interacting with the database.
+       :type db: AsyncSession
        :return: A user object.
        :rtype: User
        """
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).filter(User.email == email))
+    return result.scalars().first()
 
 
-async def create_user(body: UserModel, db: Session) -> User:
+async def create_user(body: UserModel, db: AsyncSession) -> User:
     """
        Creates a new user in the database based on the provided UserModel data.
 
        :param body: An instance of UserModel containing data for the new user.
        :type body: UserModel
-       :param db: Session for interacting with the database.
-       :type db: Session
+       :param db: AsyncSession for interacting with the database.
+       :type db: AsyncSession
        :return: The newly created user.
        :rtype: User
        """
@@ -53,12 +57,12 @@ async def create_user(body: UserModel, db: Session) -> User:
         print(e)
     new_user = User(**body.dict(),avatar=avatar)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 
-async def update_token(user: User, token: str | None, db: Session) -> None:
+async def update_token(user: User, token: str | None, db: AsyncSession) -> None:
     """
         Updates the refresh token for a user in the database.
 
@@ -66,16 +70,17 @@ async def update_token(user: User, token: str | None, db: Session) -> None:
         :type user: User
         :param token: A string representing the new refresh token. It can be None.
         :type token: str | None
-        :param db: Session for interacting with the database.
-        :type db: Session
+        :param db: AsyncSession for interacting with the database.
+        :type db: AsyncSession
         :return: None
         :rtype: None
         """
     user.refresh_token = token
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(user.email)
 
 
-async def update_avatar(email, url: str, db: Session) -> User:
+async def update_avatar(email, url: str, db: AsyncSession) -> User:
     """
        Updates the user's avatar in the database based on their email address.
 
@@ -83,12 +88,13 @@ async def update_avatar(email, url: str, db: Session) -> User:
        :type email: str
        :param url: A string representing the new avatar URL.
        :type url: str
-       :param db: Session for interacting with the database.
-       :type db: Session
+       :param db: AsyncSession for interacting with the database.
+       :type db: AsyncSession
        :return: The updated user object.
        :rtype: User
        """
     user = await get_user_by_email(email, db)
     user.avatar = url
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(email)
     return user
\ No newline at end of file
@@ -2,20 +2,49 @@ from typing import List
 
 from fastapi import APIRouter, HTTPException, Depends, status, Security, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.services.email import send_email
 from src.database.db import get_db
+from src.database.models import User
 from src.schemas import UserModel, UserResponse, TokenModel,RequestEmail
 from src.repository import users as repository_users
 from src.services.auth import auth_service
+from src.services.refresh_tokens import refresh_tokens, ROTATED, REUSED, UNKNOWN
 
 router = APIRouter(prefix='/auth', tags=["auth"])
 security = HTTPBearer()
 
 
+async def start_session(user: User, db: AsyncSession) -> str:
+    """
+       Create the refresh token of a new session.
+
+       The session is kept in the Redis refresh token store. Only if Redis is unavailable the
+       token is written to ``users.refresh_token`` instead.
+
+       :param user: The authenticated user.
+       :type user: User
+       :param db: The database session.
+       :type db: AsyncSession
+       :return: The refresh token.
+       :rtype: str
+       """
+    sid, jti = refresh_tokens.new_id(), refresh_tokens.new_id()
+    token = await auth_service.create_refresh_token(data={"sub": user.email, "sid": sid, "jti": jti})
+    try:
+        await refresh_tokens.issue(user.email, sid, jti)
+    except RedisError:
+        await repository_users.update_token(user, token, db)
+        return token
+    if user.refresh_token is not None:
+        await repository_users.update_token(user, None, db)
+    return token
+
+
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def signup(body: UserModel, background_tasks: BackgroundTasks, request: Request, db: Session = Depends(get_db)):
+async def signup(body: UserModel, background_tasks: BackgroundTasks, request: Request, db: AsyncSession = Depends(get_db)):
     """
        Register a new user.
 
@@ -26,28 +55,28 @@ async def signup(body: UserModel, background_tasks: BackgroundTasks, request: Re
        :param request: The request object for accessing the base URL.
        :type request: Request
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :return: User registration response.
        :rtype: UserResponse
        """
     exist_user = await repository_users.get_user_by_email(body.email, db)
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.get_password_hash(body.password)
     new_user = await repository_users.create_user(body, db)
     background_tasks.add_task(send_email, new_user.email, new_user.username, request.base_url)
     return {"user": new_user, "detail": "User successfully created"}
 
 
 @router.post("/login", response_model=TokenModel)
-async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """
        Authenticate a user and return an access token.
 
        :param body: The user login data.
        :type body: OAuth2PasswordRequestForm
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :return: Token response with access and refresh tokens.
        :rtype: TokenModel
        """
@@ -56,23 +85,22 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
     if not user.confirmed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed")
-    if not auth_service.verify_password(body.password, user.password):
+    if not await auth_service.verify_password(body.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
     # Generate JWT
     access_token = await auth_service.create_access_token(data={"sub": user.email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
-    await repository_users.update_token(user, refresh_token, db)
+    refresh_token = await start_session(user, db)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 @router.get('/confirmed_email/{token}')
-async def confirmed_email(token: str, db: Session = Depends(get_db)):
+async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
     """
        Confirm a user's email address with a confirmation token.
 
        :param token: The confirmation token.
        :type token: str
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :return: Confirmation response.
        """
     email = await auth_service.get_email_from_token(token)
@@ -85,32 +113,47 @@ async def confirmed_email(token: str, db: Session = Depends(get_db)):
     return {"message": "Email confirmed"}
 
 @router.get('/refresh_token', response_model=TokenModel)
-async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
+async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: AsyncSession = Depends(get_db)):
     """
        Refresh an access token using a refresh token.
 
+       The refresh token is rotated: the presented one stops being valid, and presenting it again
+       ends its session. Tokens not known to the Redis store are checked against ``users.refresh_token``.
+
        :param credentials: The HTTP bearer token containing the refresh token.
        :type credentials: HTTPAuthorizationCredentials
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :return: Token response with a new access token and refresh token.
        :rtype: TokenModel
        """
     token = credentials.credentials
-    email = await auth_service.decode_refresh_token(token)
-    user = await repository_users.get_user_by_email(email, db)
-    if user.refresh_token != token:
-        await repository_users.update_token(user, None, db)
+    claims = await auth_service.decode_refresh_claims(token)
+    email, sid, jti = claims["sub"], claims.get("sid"), claims.get("jti")
+    state, new_jti = UNKNOWN, refresh_tokens.new_id()
+    if sid and jti:
+        try:
+            state = await refresh_tokens.rotate(email, sid, jti, new_jti)
+        except RedisError:
+            state = UNKNOWN
+    if state == REUSED:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    if state == ROTATED:
+        refresh_token = await auth_service.create_refresh_token(data={"sub": email, "sid": sid, "jti": new_jti})
+    else:
+        user = await repository_users.get_user_by_email(email, db)
+        if user is None or user.refresh_token != token:
+            if user is not None and user.refresh_token is not None:
+                await repository_users.update_token(user, None, db)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        refresh_token = await start_session(user, db)
 
     access_token = await auth_service.create_access_token(data={"sub": email})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": email})
-    await repository_users.update_token(user, refresh_token, db)
     return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 @router.post('/request_email')
 async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
-                        db: Session = Depends(get_db)):
+                        db: AsyncSession = Depends(get_db)):
     """
        Request email confirmation for a user.
 
@@ -121,7 +164,7 @@ async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, r
        :param request: The request object for accessing the base URL.
        :type request: Request
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :return: User
        """
     user = await repository_users.get_user_by_email(body.email, db)
@@ -1,81 +1,314 @@
+import base64
+import binascii
+from datetime import date
 from typing import List
-from fastapi_limiter.depends import RateLimiter
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, status, Response, Query, Request, Body
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.models import User
 from src.database.db import get_db
-from src.schemas import ContactModel,ResponseContact
+from src.schemas import ContactModel,ContactPatch,ContactUpdate,ResponseContact,ImportReport,ImportRowError,BatchContacts,\
+    BatchItemResult,BatchResult
 from src.repository import contacts as repository_contacts
 from src.services.auth import auth_service
+from src.services import contacts_io
+from src.services.cache import response_cache
+from src.services.rate_limit import RateLimit
+from src.services.serializers import dump_contact_rows
 router = APIRouter(prefix='/contacts', tags=["contacts"])
 
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+BATCH_MAX_SIZE = 500
+
+contacts_adapter = TypeAdapter(List[ResponseContact])
+contact_adapter = TypeAdapter(ResponseContact)
+
+
+def encode_cursor(contact_id: int) -> str:
+    """
+        Builds an opaque pagination cursor pointing after the given contact.
+
+        :param contact_id: The id of the last contact on the page.
+        :type contact_id: int
+        :return: The cursor.
+        :rtype: str
+        """
+    return base64.urlsafe_b64encode(str(contact_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+        Decodes a cursor built by encode_cursor.
+
+        :param cursor: The cursor sent by the client.
+        :type cursor: str
+        :return: The id of the last contact of the previous page.
+        :rtype: int
+        """
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def json_response(body: bytes, headers: dict | None = None, etag: str | None = None) -> Response:
+    """
+        Wraps an already serialized JSON body into a response.
+
+        :param body: The JSON body.
+        :type body: bytes
+        :param headers: Extra response headers.
+        :type headers: dict | None
+        :param etag: The ETag of the body; clients are asked to revalidate it on every use.
+        :type etag: str | None
+        :return: The response.
+        :rtype: Response
+        """
+    headers = dict(headers or {})
+    if etag is not None:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "private, no-cache"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def etag_matches(request: Request, etag: str | None) -> bool:
+    """
+        Checks the If-None-Match request header against an ETag (weak comparison, RFC 9110).
+
+        :param request: The request.
+        :type request: Request
+        :param etag: The current ETag of the resource.
+        :type etag: str | None
+        :return: True if the client already has this version.
+        :rtype: bool
+        """
+    header = request.headers.get("if-none-match")
+    if etag is None or not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={"ETag": etag, "Cache-Control": "private, no-cache"})
 
 
 @router.get("/", response_model=List[ResponseContact], description='No more than 10 requests per minute',
-            dependencies=[Depends(RateLimiter(times=10, seconds=60))])
-async def get_contacts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db),
-                    current_user: User = Depends(auth_service.get_current_user)):
+            dependencies=[Depends(RateLimit("get_contacts", times=10, seconds=60))])
+async def get_contacts(request: Request, skip: int = 0, limit: int = 100, cursor: str | None = None,
+                       db: AsyncSession = Depends(get_db),
+                       current_user: User = Depends(auth_service.get_current_user)):
     """
         Get a list of contacts for the current user with rate limiting.
 
+        When the page is full, the X-Next-Cursor response header holds the cursor of the next page.
+        Passing it back as ``cursor`` continues the listing with an index range scan instead of
+        an offset; ``skip`` is still honoured when no cursor is sent. Responses are cached per
+        user in Redis until the user's contacts change, and carry an ETag: a matching
+        If-None-Match is answered with 304 before the query runs.
+
+        :param request: The request object for the If-None-Match header.
+        :type request: Request
         :param skip: The number of contacts to skip.
         :type skip: int
         :param limit: The maximum number of contacts to return.
         :type limit: int
+        :param cursor: The X-Next-Cursor value of the previous page.
+        :type cursor: str | None
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :param current_user: The currently authenticated user.
         :type current_user: User
         :return: List of contacts.
         :rtype: List[ResponseContact]
         """
-
-
-    contacts = await repository_contacts.get_contacts(skip, limit,current_user, db)
+    params = {"skip": skip, "limit": limit, "cursor": cursor}
+    version = await response_cache.get_version(current_user.id)
+    etag = response_cache.make_etag("get_contacts", current_user.id, version, params)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    key = response_cache.make_key("get_contacts", current_user.id, version, params)
+    cached = await response_cache.get("get_contacts", key)
+    if cached is not None:
+        return json_response(*cached, etag=etag)
+    after_id = decode_cursor(cursor) if cursor is not None else None
+    contacts = await repository_contacts.get_contacts(skip, limit,current_user, db, after_id=after_id, rows=True)
     if contacts is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contacts
+    headers = {}
+    if contacts and len(contacts) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(contacts[-1].id)
+    body = dump_contact_rows(contacts)
+    await response_cache.set(key, body, headers)
+    return json_response(body, headers, etag=etag)
 
 @router.get("/birthdays", response_model=List[ResponseContact])
-async def search_birthdays(db: Session = Depends(get_db),
-                    current_user: User = Depends(auth_service.get_current_user)):
+async def search_birthdays(days: int = Query(default=7, ge=0, le=366), db: AsyncSession = Depends(get_db),
+                           current_user: User = Depends(auth_service.get_current_user)):
     """
         Search for upcoming birthdays among the user's contacts.
 
+        :param days: The number of days ahead to look for birthdays.
+        :type days: int
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :param current_user: The currently authenticated user.
         :type current_user: User
         :return: List of contacts with upcoming birthdays.
         :rtype: List[Contact]
         """
-    contacts = await repository_contacts.get_birthdays(current_user,db)
+    today = date.today()
+    version = await response_cache.get_version(current_user.id)
+    key = response_cache.make_key("search_birthdays", current_user.id, version,
+                                  {"days": days, "today": today.isoformat()})
+    cached = await response_cache.get("search_birthdays", key)
+    if cached is not None:
+        return json_response(*cached)
+    contacts = await repository_contacts.get_birthdays(current_user, db, days=days, today=today, rows=True)
     if contacts is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contacts
+    body = dump_contact_rows(contacts)
+    await response_cache.set(key, body)
+    return json_response(body)
 
 @router.get("/query/{query}", response_model=List[ResponseContact])
-async def get_contacts_query(query: str, db: Session = Depends(get_db),
-                    current_user: User = Depends(auth_service.get_current_user)):
+async def get_contacts_query(query: str, skip: int = 0, limit: int = Query(default=50, ge=1, le=100),
+                             db: AsyncSession = Depends(get_db),
+                             current_user: User = Depends(auth_service.get_current_user)):
     """
-    Search for contacts based on a query string.
+    Search for contacts based on a query string, most relevant first.
 
     :param query: The search query.
     :type query: str
+    :param skip: The number of matches to skip.
+    :type skip: int
+    :param limit: The maximum number of matches to return.
+    :type limit: int
     :param db: The database session.
-    :type db: Session
+    :type db: AsyncSession
     :param current_user: The currently authenticated user.
     :type current_user: User
     :return: List of matching contacts.
     :rtype: List[Contact]
     """
-    contacts = await repository_contacts.search_contacts(query, current_user,db)
+    version = await response_cache.get_version(current_user.id)
+    key = response_cache.make_key("get_contacts_query", current_user.id, version,
+                                  {"query": query, "skip": skip, "limit": limit})
+    cached = await response_cache.get("get_contacts_query", key)
+    if cached is not None:
+        return json_response(*cached)
+    contacts = await repository_contacts.search_contacts(query, current_user, db, skip=skip, limit=limit,
+                                                         rows=True)
     if contacts is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contacts
+    body = dump_contact_rows(contacts)
+    await response_cache.set(key, body)
+    return json_response(body)
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_contacts(fmt: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv|vcf)$"),
+                          db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+        Export all contacts of the current user as NDJSON, CSV or vCard.
+
+        Rows are read through a server-side cursor and written to the response as they arrive,
+        so the export runs in constant memory.
+
+        :param fmt: The export format: ndjson, csv or vcf.
+        :type fmt: str
+        :param db: The database session.
+        :type db: AsyncSession
+        :param current_user: The currently authenticated user.
+        :type current_user: User
+        :return: The streamed export file.
+        :rtype: StreamingResponse
+        """
+    async def content():
+        if fmt == "csv":
+            yield contacts_io.format_csv([], header=True)
+        async for rows in repository_contacts.stream_contacts(current_user, db):
+            if fmt == "csv":
+                yield contacts_io.format_csv(rows)
+            elif fmt == "vcf":
+                yield contacts_io.format_vcard(rows)
+            else:
+                yield contacts_io.format_ndjson(rows)
+
+    return StreamingResponse(content(), media_type=contacts_io.EXPORT_MEDIA_TYPES[fmt],
+                             headers={"Content-Disposition": f'attachment; filename="contacts.{fmt}"'})
+
+
+@router.get("/batch", response_model=BatchContacts)
+async def get_contacts_batch(ids: List[int] = Query(default=[], max_length=BATCH_MAX_SIZE),
+                             db: AsyncSession = Depends(get_db),
+                             current_user: User = Depends(auth_service.get_current_user)):
+    """
+        Get many contacts by ID with a single query, e.g. ``/batch?ids=1&ids=2``.
+
+        :param ids: The IDs of the contacts to retrieve, at most 500.
+        :type ids: List[int]
+        :param db: The database session.
+        :type db: AsyncSession
+        :param current_user: The currently authenticated user.
+        :type current_user: User
+        :return: The found contacts and the IDs that were not found.
+        :rtype: BatchContacts
+        """
+    contacts = await repository_contacts.get_contacts_by_ids(ids, current_user, db)
+    found = {contact.id for contact in contacts}
+    return BatchContacts(contacts=contacts_adapter.validate_python(contacts, from_attributes=True),
+                         missing=sorted(set(ids) - found))
+
+
+@router.put("/batch", response_model=BatchResult)
+async def update_contacts_batch(body: List[ContactUpdate] = Body(min_length=1, max_length=BATCH_MAX_SIZE),
+                                db: AsyncSession = Depends(get_db),
+                                current_user: User = Depends(auth_service.get_current_user)):
+    """
+        Update many contacts in one transaction.
+
+        :param body: The new contact data, each with the ID of the contact to update, at most 500.
+        :type body: List[ContactUpdate]
+        :param db: The database session.
+        :type db: AsyncSession
+        :param current_user: The currently authenticated user.
+        :type current_user: User
+        :return: ``updated`` or ``not_found`` for every ID.
+        :rtype: BatchResult
+        """
+    updated = await repository_contacts.update_contacts(body, current_user, db)
+    ids = dict.fromkeys(item.id for item in body)
+    return BatchResult(results=[BatchItemResult(id=contact_id, status="updated" if contact_id in updated else "not_found")
+                                for contact_id in ids])
+
+
+@router.delete("/batch", response_model=BatchResult)
+async def remove_contacts_batch(ids: List[int] = Query(default=[], max_length=BATCH_MAX_SIZE),
+                                db: AsyncSession = Depends(get_db),
+                                current_user: User = Depends(auth_service.get_current_user)):
+    """
+        Remove many contacts by ID with a single statement, e.g. ``/batch?ids=1&ids=2``.
+
+        :param ids: The IDs of the contacts to remove, at most 500.
+        :type ids: List[int]
+        :param db: The database session.
+        :type db: AsyncSession
+        :param current_user: The currently authenticated user.
+        :type current_user: User
+        :return: ``deleted`` or ``not_found`` for every ID.
+        :rtype: BatchResult
+        """
+    removed = await repository_contacts.remove_contacts(ids, current_user, db)
+    return BatchResult(results=[BatchItemResult(id=contact_id, status="deleted" if contact_id in removed else "not_found")
+                                for contact_id in dict.fromkeys(ids)])
+
 
 @router.get("/{contact_id}", response_model=ResponseContact)
-async def get_contact(contact_id: int, db: Session = Depends(get_db),
+async def get_contact(contact_id: int, request: Request, db: AsyncSession = Depends(get_db),
                     current_user: User = Depends(auth_service.get_current_user)):
     """
        Get a specific contact by ID.
@@ -83,22 +316,33 @@ async def get_contact(contact_id: int, db: Session = Depends(get_db),
        :param contact_id: The ID of the contact to retrieve.
        :type contact_id: int
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :param current_user: The currently authenticated user.
        :type current_user: User
        :return: The requested contact.
        :rtype: List[Contact]
        """
 
+    params = {"contact_id": contact_id}
+    version = await response_cache.get_version(current_user.id)
+    etag = response_cache.make_etag("get_contact", current_user.id, version, params)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    key = response_cache.make_key("get_contact", current_user.id, version, params)
+    cached = await response_cache.get("get_contact", key)
+    if cached is not None:
+        return json_response(*cached, etag=etag)
     contact = await repository_contacts.get_contact(contact_id,current_user, db)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
-    return contact
+    body = contact_adapter.dump_json(contact_adapter.validate_python(contact, from_attributes=True))
+    await response_cache.set(key, body)
+    return json_response(body, etag=etag)
 
 
 @router.post("/", response_model=ResponseContact,description='No more than 10 requests per minute',
-            dependencies=[Depends(RateLimiter(times=10, seconds=60))])
-async def create_contact(body: ContactModel, db: Session = Depends(get_db),
+            dependencies=[Depends(RateLimit("create_contact", times=10, seconds=60))])
+async def create_contact(body: ContactModel, db: AsyncSession = Depends(get_db),
                     current_user: User = Depends(auth_service.get_current_user)):
     """
         Create a new contact with rate limiting.
@@ -106,7 +350,7 @@ async def create_contact(body: ContactModel, db: Session = Depends(get_db),
         :param body: The contact data to create.
         :type body: ContactModel
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :param current_user: The currently authenticated user.
         :type current_user: User
         :return: The created contact.
@@ -115,8 +359,58 @@ async def create_contact(body: ContactModel, db: Session = Depends(get_db),
     return await repository_contacts.create_contact(body, current_user,db)
 
 
+@router.post("/import", response_model=ImportReport, status_code=status.HTTP_201_CREATED)
+async def import_contacts(request: Request, db: AsyncSession = Depends(get_db),
+                          current_user: User = Depends(auth_service.get_current_user)):
+    """
+        Bulk import contacts from a CSV (text/csv) or NDJSON (application/x-ndjson) request body.
+
+        The body is read as a stream: rows are validated one by one with ContactModel and inserted
+        in batches, so the file is never held in memory. Valid rows are stored even if other rows
+        fail; the report lists the failed rows (up to the first 1000) with their errors.
+
+        :param request: The request whose body holds the file.
+        :type request: Request
+        :param db: The database session.
+        :type db: AsyncSession
+        :param current_user: The currently authenticated user.
+        :type current_user: User
+        :return: The number of imported and failed rows with per-row errors.
+        :rtype: ImportReport
+        """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in contacts_io.CSV_MEDIA_TYPES:
+        rows = contacts_io.iter_csv_rows(request.stream())
+    elif content_type in contacts_io.NDJSON_MEDIA_TYPES:
+        rows = contacts_io.iter_ndjson_rows(request.stream())
+    else:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail="Use text/csv or application/x-ndjson")
+
+    report = ImportReport()
+    batch = []
+    async for row, data in rows:
+        errors = None
+        if isinstance(data, contacts_io.RowError):
+            errors = [str(data)]
+        else:
+            try:
+                batch.append(ContactModel(**data))
+            except ValidationError as e:
+                errors = [f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()]
+        if errors:
+            report.failed += 1
+            if len(report.errors) < IMPORT_MAX_ERRORS:
+                report.errors.append(ImportRowError(row=row, errors=errors))
+        elif len(batch) >= IMPORT_BATCH_SIZE:
+            report.inserted += await repository_contacts.create_contacts(batch, current_user, db)
+            batch = []
+    report.inserted += await repository_contacts.create_contacts(batch, current_user, db)
+    return report
+
+
 @router.put("/{contact_id}", response_model=ResponseContact)
-async def update_contact(body: ContactModel, contact_id: int, db: Session = Depends(get_db),
+async def update_contact(body: ContactModel, contact_id: int, db: AsyncSession = Depends(get_db),
                     current_user: User = Depends(auth_service.get_current_user)):
     """
         Update a specific contact by ID.
@@ -126,7 +420,7 @@ async def update_contact(body: ContactModel, contact_id: int, db: Session = Depe
         :param contact_id: The ID of the contact to update.
         :type contact_id: int
         :param db: The database session.
-        :type db: Session
+        :type db: AsyncSession
         :param current_user: The currently authenticated user.
         :type current_user: User
         :return: The updated contact.
@@ -138,8 +432,31 @@ async def update_contact(body: ContactModel, contact_id: int, db: Session = Depe
     return contact
 
 
+@router.patch("/{contact_id}", response_model=ResponseContact)
+async def patch_contact(body: ContactPatch, contact_id: int, db: AsyncSession = Depends(get_db),
+                        current_user: User = Depends(auth_service.get_current_user)):
+    """
+        Change some fields of a specific contact by ID; fields that are not sent are left as they are.
+
+        :param body: The fields to change.
+        :type body: ContactPatch
+        :param contact_id: The ID of the contact to update.
+        :type contact_id: int
+        :param db: The database session.
+        :type db: AsyncSession
+        :param current_user: The currently authenticated user.
+        :type current_user: User
+        :return: The updated contact.
+        :rtype: Contact
+        """
+    contact = await repository_contacts.patch_contact(contact_id, body, current_user, db)
+    if contact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
+    return contact
+
+
 @router.delete("/{contact_id}", response_model=ResponseContact)
-async def remove_contact(contact_id: int, db: Session = Depends(get_db),
+async def remove_contact(contact_id: int, db: AsyncSession = Depends(get_db),
                     current_user: User = Depends(auth_service.get_current_user)):
     """
        Remove a specific contact by ID.
@@ -147,7 +464,7 @@ async def remove_contact(contact_id: int, db: Session = Depends(get_db),
        :param contact_id: The ID of the contact to remove.
        :type contact_id: int
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :param current_user: The currently authenticated user.
        :type current_user: User
        :return: The removed contact.
@@ -0,0 +1,90 @@
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Security, status
+from fastapi.security import APIKeyHeader
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import settings
+from src.database.db import get_db, pool_status
+from src.services.cache import user_cache, response_cache
+from src.services.mail_queue import mail_queue
+from src.services.passwords import password_pool
+from src.services.rate_limit import rate_limiter
+from src.services.resources import Resources, get_resources
+from src.services.tokens import token_decoder
+
+internal_token_header = APIKeyHeader(name="X-Internal-Token", auto_error=False)
+
+
+async def require_internal_token(token: str | None = Security(internal_token_header)) -> None:
+    """
+        Admits only callers presenting ``settings.internal_api_token`` in the ``X-Internal-Token`` header.
+
+        Without a configured token the internal endpoints are disabled and answer 404.
+
+        :param token: The token sent by the caller.
+        :type token: str | None
+        :raises HTTPException: 404 when disabled, 401 when the token is missing or wrong.
+        """
+    if not settings.internal_api_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if token is None or not secrets.compare_digest(token.encode(), settings.internal_api_token.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal token")
+
+
+router = APIRouter(prefix='/internal', tags=["internal"], include_in_schema=False,
+                   dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/db/pool")
+async def get_pool_status():
+    """
+        Get live statistics of the database connection pool.
+
+        :return: Pool size, checked out and overflow connections and the checkout wait histogram.
+        :rtype: dict
+        """
+    return pool_status()
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """
+        Get hit/miss counters of the user, response and token caches, the rate limiter and the password pool queue.
+
+        :return: Cache, rate limiter and password pool statistics.
+        :rtype: dict
+        """
+    return {
+        "users": user_cache.stats(),
+        "responses": response_cache.stats(),
+        "passwords": password_pool.stats(),
+        "tokens": token_decoder.stats(),
+        "rate_limit": rate_limiter.stats(),
+    }
+
+
+@router.get("/mail")
+async def get_mail_queue_stats():
+    """
+        Get the lengths of the mail queue, retry set and dead letter list.
+
+        :return: Queued, retrying and dead mail jobs.
+        :rtype: dict
+        """
+    return await mail_queue.stats()
+
+
+@router.get("/health")
+async def get_health(db: AsyncSession = Depends(get_db), resources: Resources = Depends(get_resources)):
+    """
+        Check that the worker's Redis and database connections answer.
+
+        :param db: The database session.
+        :type db: AsyncSession
+        :param resources: The shared resources of the worker.
+        :type resources: Resources
+        :return: Whether Redis and the database are reachable.
+        :rtype: dict
+        """
+    return await resources.check(db)
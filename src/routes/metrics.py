@@ -0,0 +1,94 @@
+import asyncio
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from redis.exceptions import RedisError
+
+from src.database.db import pool_status, query_profiler
+from src.routes.internal import require_internal_token
+from src.services.cache import user_cache, response_cache
+from src.services.mail_queue import mail_queue
+from src.services.metrics import registry
+from src.services.passwords import password_pool
+from src.services.rate_limit import rate_limiter
+from src.services.resources import resources
+from src.services.tokens import token_decoder
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(tags=["metrics"], include_in_schema=False, dependencies=[Depends(require_internal_token)])
+
+db_pool = registry.gauge("db_pool_connections", "Database pool connections by state.", ("state",))
+db_pool_wait = registry.histogram("db_pool_wait_seconds", "Time spent waiting for a pooled database connection.")
+db_pool_timeouts = registry.counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection.")
+db_slow_queries = registry.counter("db_slow_queries_total", "Statements slower than the slow query threshold.")
+redis_pool = registry.gauge("redis_pool_connections", "Redis client pool connections by state.", ("state",))
+cache_events = registry.counter("cache_events_total", "Cache lookups by cache and outcome.", ("cache", "outcome"))
+cache_size = registry.gauge("cache_entries", "Entries held in process by cache.", ("cache",))
+rate_limit_events = registry.counter("rate_limit_events_total", "Rate limiter decisions by outcome.", ("outcome",))
+password_pending = registry.gauge("password_pool_pending", "Password hashing jobs queued or running.")
+password_jobs = registry.counter("password_pool_jobs_total", "Finished password hashing jobs by outcome.",
+                                 ("outcome",))
+mail_jobs = registry.gauge("mail_queue_jobs", "Mail jobs by state; absent while Redis is unavailable.", ("state",))
+tasks = registry.gauge("asyncio_tasks", "Tasks alive on the worker's event loop.")
+
+
+@registry.collector
+async def collect() -> None:
+    pool = pool_status()
+    for state in ("size", "checked_in", "checked_out", "overflow"):
+        db_pool.set((state,), pool[state])
+    wait = pool["wait"]
+    db_pool_wait.set_cumulative((), wait["buckets"], wait["sum"])
+    db_pool_timeouts.set_total((), wait["timeouts"])
+    db_slow_queries.set_total((), query_profiler.slow_queries)
+
+    connections = resources.redis.connection_pool
+    redis_pool.set(("in_use",), len(getattr(connections, "_in_use_connections", ())))
+    redis_pool.set(("available",), len(getattr(connections, "_available_connections", ())))
+
+    users = user_cache.stats()
+    for outcome in ("local_hits", "redis_hits", "misses"):
+        cache_events.set_total(("users", outcome), users[outcome])
+    cache_size.set(("users",), users["size"])
+    for route, stats in response_cache.stats().items():
+        cache_events.set_total((f"responses:{route}", "hits"), stats["hits"])
+        cache_events.set_total((f"responses:{route}", "misses"), stats["misses"])
+    tokens = token_decoder.stats()
+    cache_events.set_total(("tokens", "hits"), tokens["hits"])
+    cache_events.set_total(("tokens", "misses"), tokens["misses"])
+    cache_size.set(("tokens",), tokens["size"])
+
+    limiter = rate_limiter.stats()
+    for outcome in ("local_hits", "leases", "rejected", "fallbacks"):
+        rate_limit_events.set_total((outcome,), limiter[outcome])
+    cache_size.set(("rate_limit",), limiter["size"])
+
+    passwords = password_pool.stats()
+    password_pending.set((), passwords["pending"])
+    for outcome in ("completed", "rejected", "timeouts"):
+        password_jobs.set_total((outcome,), passwords[outcome])
+
+    try:
+        queue = await mail_queue.stats()
+    except RedisError:
+        mail_jobs.series.clear()
+    else:
+        for state, count in queue.items():
+            mail_jobs.set((state,), count)
+
+    tasks.set((), len(asyncio.all_tasks()))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+        Get the metrics of this worker in Prometheus text format.
+
+        Pool, cache, queue and task metrics are collected only here, when the endpoint is scraped.
+        Like the internal API, it requires the ``X-Internal-Token`` header.
+
+        :return: The metrics.
+        :rtype: PlainTextResponse
+        """
+    return PlainTextResponse(await registry.render(), media_type=CONTENT_TYPE)
@@ -1,13 +1,11 @@
 from fastapi import APIRouter, Depends, status, UploadFile, File
-from sqlalchemy.orm import Session
-import cloudinary
-import cloudinary.uploader
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.database.models import User
 from src.repository import users as repository_users
 from src.services.auth import auth_service
-from src.conf.config import settings
+from src.services.avatars import avatar_service
 from src.schemas import UserDb
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -28,28 +26,21 @@ async def read_users_me(current_user: User = Depends(auth_service.get_current_us
 
 @router.patch('/avatar', response_model=UserDb)
 async def update_avatar_user(file: UploadFile = File(), current_user: User = Depends(auth_service.get_current_user),
-                             db: Session = Depends(get_db)):
+                             db: AsyncSession = Depends(get_db)):
     """
        Update the user's avatar with a new image file.
 
+       The image is cropped and scaled to the avatar size before it is uploaded.
+
        :param file: The uploaded image file for the new avatar.
        :type file: UploadFile
        :param current_user: The currently authenticated user.
        :type current_user: User
        :param db: The database session.
-       :type db: Session
+       :type db: AsyncSession
        :return: The updated user with the new avatar.
        :rtype: User
        """
-    cloudinary.config(
-        cloud_name=settings.cloudinary_name,
-        api_key=settings.cloudinary_api_key,
-        api_secret=settings.cloudinary_api_secret,
-        secure=True
-    )
-
-    r = cloudinary.uploader.upload(file.file, public_id=f'NotesApp/{current_user.username}', overwrite=True)
-    src_url = cloudinary.CloudinaryImage(f'NotesApp/{current_user.username}')\
-                        .build_url(width=250, height=250, crop='fill', version=r.get('version'))
+    src_url = await avatar_service.update(file, f'NotesApp/{current_user.username}')
     user = await repository_users.update_avatar(current_user.email, src_url, db)
     return user
\ No newline at end of file
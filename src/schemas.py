@@ -1,12 +1,23 @@
 from pydantic import BaseModel,Field,EmailStr
 from datetime import date, datetime
+from typing import List
 
 class ContactModel(BaseModel):
-    name: str
-    email: str
-    phone_number: str
+    name: str = Field(max_length=50)
+    email: str = Field(max_length=50)
+    phone_number: str = Field(max_length=50)
     birth_date: date
-    additional_data: str
+    additional_data: str = Field(max_length=150)
+
+class ContactPatch(BaseModel):
+    name: str | None = Field(None, max_length=50)
+    email: str | None = Field(None, max_length=50)
+    phone_number: str | None = Field(None, max_length=50)
+    birth_date: date | None = None
+    additional_data: str | None = Field(None, max_length=150)
+
+class ContactUpdate(ContactModel):
+    id: int
 
 class ResponseContact(BaseModel):
     id: int
@@ -19,6 +30,31 @@ class ResponseContact(BaseModel):
     class Config:
         orm_mode = True
 
+class BatchContacts(BaseModel):
+    contacts: List[ResponseContact]
+    missing: List[int] = []
+
+
+class BatchItemResult(BaseModel):
+    id: int
+    status: str
+
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]
+
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class ImportReport(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+
+
 class RequestEmail(BaseModel):
     email: EmailStr
 
@@ -0,0 +1,254 @@
+"""
+    Pre-fork production server: one master process and ``--workers`` uvicorn workers sharing a socket.
+
+    Run from the project root::
+
+        python -m src.server --workers 8 --port 8000
+
+    With ``--preload`` (the default) the master imports the application once and forks the
+    workers from it, so modules, compiled templates and other startup work are shared
+    copy-on-write instead of being repeated per worker. Each worker drops the Redis, database
+    and password pools it inherited before serving (see ``Resources.after_fork``).
+
+    Signals to the master:
+
+    * ``SIGTERM`` / ``SIGINT`` - graceful stop: workers stop accepting, finish in-flight requests
+      for up to ``--graceful-timeout`` seconds and run the application shutdown.
+    * ``SIGHUP`` - graceful restart: a new set of workers is started, then the old ones drain and
+      exit. Without ``--preload`` the new workers load the current code.
+
+    Workers that die are replaced. POSIX only.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+from src.conf.config import settings
+
+logger = logging.getLogger(__name__)
+
+APP = "main:app"
+BOOT_WINDOW = 2.0
+MAX_BOOT_FAILURES = 5
+
+
+def cpu_count() -> int:
+    """
+        Returns the number of CPUs this process may run on, honouring affinity masks and cgroups cpusets.
+
+        :return: The CPU count.
+        :rtype: int
+        """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    """
+        Opens the listening socket shared by all workers.
+
+        :param host: The interface to listen on.
+        :type host: str
+        :param port: The port; 0 picks a free one.
+        :type port: int
+        :param backlog: The accept queue length.
+        :type backlog: int
+        :return: The bound, listening socket.
+        :rtype: socket.socket
+        """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """
+        Master process forking and supervising the uvicorn workers.
+
+        ``app`` is an import string; with ``preload`` it is imported by the master before the
+        first fork, otherwise by every worker after it.
+        """
+
+    def __init__(self, app: str, host: str, port: int, workers: int, preload: bool, graceful_timeout: int,
+                 backlog: int = 2048):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = preload
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.sock: socket.socket | None = None
+        self.loaded_app = None
+        self.children: dict[int, float] = {}
+        self.retiring: dict[int, float] = {}
+        self.boot_failures = 0
+        self.stopping = False
+        self.reload_requested = False
+
+    def load(self) -> None:
+        self.loaded_app = import_from_string(self.app)
+        gc.collect()
+        gc.freeze()
+
+    def worker_config(self) -> uvicorn.Config:
+        return uvicorn.Config(
+            self.loaded_app if self.loaded_app is not None else self.app,
+            lifespan="on",
+            timeout_graceful_shutdown=self.graceful_timeout,
+            backlog=self.backlog,
+        )
+
+    def run_worker(self) -> None:
+        """
+            Body of a forked worker: resets the inherited resources and serves until signalled.
+            """
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        from src.services.resources import resources
+        password_workers = None if settings.password_hash_workers else max(1, cpu_count() // self.workers)
+        resources.after_fork(password_workers)
+        uvicorn.Server(self.worker_config()).run(sockets=[self.sock])
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.run_worker()
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            code = os.waitstatus_to_exitcode(status)
+            if pid in self.retiring:
+                self.retiring.pop(pid)
+                logger.info("Worker %d stopped", pid)
+                continue
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            logger.warning("Worker %d exited with %d", pid, code)
+            if time.monotonic() - started < BOOT_WINDOW:
+                self.boot_failures += 1
+            else:
+                self.boot_failures = 0
+
+    def retire(self, pids) -> None:
+        for pid in list(pids):
+            self.children.pop(pid, None)
+            self.retiring[pid] = time.monotonic()
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.retiring.pop(pid)
+
+    def kill_overdue(self) -> None:
+        deadline = self.graceful_timeout + 5
+        for pid, since in list(self.retiring.items()):
+            if time.monotonic() - since > deadline:
+                logger.warning("Worker %d did not stop in time, killing it", pid)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    self.retiring.pop(pid)
+
+    def handle_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def handle_reload(self, signum, frame) -> None:
+        self.reload_requested = True
+
+    def reload(self) -> None:
+        self.reload_requested = False
+        old = list(self.children)
+        logger.info("Restarting %d workers", len(old))
+        for _ in range(self.workers):
+            self.spawn()
+        self.retire(old)
+
+    def run(self) -> int:
+        """
+            Binds the socket, forks the workers and supervises them until stopped.
+
+            :return: The process exit code.
+            :rtype: int
+            """
+        self.sock = bind(self.host, self.port, self.backlog)
+        self.port = self.sock.getsockname()[1]
+        if self.preload:
+            self.load()
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+        logger.info("Listening on %s:%d with %d workers%s", self.host, self.port, self.workers,
+                    " (preloaded)" if self.preload else "")
+        try:
+            while not self.stopping:
+                self.reap()
+                if self.boot_failures >= MAX_BOOT_FAILURES:
+                    logger.error("Workers keep failing on startup, giving up")
+                    self.stopping = True
+                    break
+                if self.reload_requested:
+                    self.reload()
+                while len(self.children) < self.workers:
+                    self.spawn()
+                self.kill_overdue()
+                time.sleep(0.2)
+        finally:
+            self.retire(self.children)
+            while self.retiring:
+                self.reap()
+                self.kill_overdue()
+                time.sleep(0.1)
+            self.sock.close()
+        return 1 if self.boot_failures >= MAX_BOOT_FAILURES else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API with pre-forked workers")
+    parser.add_argument("--app", default=APP, help="application import string")
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument("--workers", type=int, default=settings.server_workers,
+                        help="number of workers; 0 means one per available CPU")
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=settings.server_preload,
+                        help="import the application in the master before forking")
+    parser.add_argument("--graceful-timeout", type=int, default=settings.server_graceful_timeout,
+                        help="seconds a stopping worker may spend finishing in-flight requests")
+    parser.add_argument("--backlog", type=int, default=settings.server_backlog)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+    server = PreforkServer(args.app, args.host, args.port, args.workers or cpu_count(), args.preload,
+                           args.graceful_timeout, args.backlog)
+    sys.exit(server.run())
@@ -1,27 +1,28 @@
 from typing import Optional
-import redis.asyncio as redis
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.db import get_db
 from src.repository import users as repository_users
 from src.conf.config import settings
+from src.services.cache import user_cache
+from src.services.passwords import pwd_context, password_pool
+from src.services.tokens import token_decoder
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = pwd_context
     SECRET_KEY = settings.secret_key
     ALGORITHM = settings.algorithm
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-    r = redis.Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+    token_decoder = token_decoder
 
 
-    def verify_password(self, plain_password, hashed_password):
+    async def verify_password(self, plain_password, hashed_password):
         """
-                Verify a user's password against a hashed password.
+                Verify a user's password against a hashed password in the password worker pool.
 
                 :param plain_password: The plain text password to verify.
                 :type plain_password: str
@@ -30,18 +31,18 @@ class Auth:
                 :return: True if the passwords match, False otherwise.
                 :rtype: bool
                 """
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return await password_pool.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
+    async def get_password_hash(self, password: str):
         """
-               Generate a password hash from a plain text password.
+               Generate a password hash from a plain text password in the password worker pool.
 
                :param password: The plain text password to hash.
                :type password: str
                :return: The hashed password.
                :rtype: str
                """
-        return self.pwd_context.hash(password)
+        return await password_pool.hash(password)
 
     # define a function to generate a new access token
     async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
@@ -80,38 +81,49 @@ class Auth:
         if expires_delta:
             expire = datetime.utcnow() + timedelta(seconds=expires_delta)
         else:
-            expire = datetime.utcnow() + timedelta(days=7)
+            expire = datetime.utcnow() + timedelta(seconds=settings.refresh_token_ttl)
         to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "refresh_token"})
         encoded_refresh_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
         return encoded_refresh_token
 
-    async def decode_refresh_token(self, refresh_token: str):
+    async def decode_refresh_claims(self, refresh_token: str) -> dict:
         """
                 Decode and validate a refresh token.
 
                 :param refresh_token: The refresh token to decode.
                 :type refresh_token: str
-                :return: The email associated with the token.
-                :rtype: str
+                :return: The token claims (``sub`` and, for session tokens, ``sid`` and ``jti``).
+                :rtype: dict
                 """
 
         try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.token_decoder.decode(refresh_token)
             if payload['scope'] == 'refresh_token':
-                email = payload['sub']
-                return email
+                return payload
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid scope for token')
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    async def decode_refresh_token(self, refresh_token: str):
+        """
+                Decode and validate a refresh token.
+
+                :param refresh_token: The refresh token to decode.
+                :type refresh_token: str
+                :return: The email associated with the token.
+                :rtype: str
+                """
+        payload = await self.decode_refresh_claims(refresh_token)
+        return payload['sub']
+
+    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
         """
                 Get the currently authenticated user.
 
                 :param token: The user's access token.
                 :type token: str
                 :param db: The database session.
-                :type db: Session
+                :type db: AsyncSession
                 :return: The currently authenticated user.
                 :rtype: User
                 """
@@ -122,8 +134,8 @@ class Auth:
         )
 
         try:
-            # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            # Decode JWT, verified claims are cached until the token expires
+            payload = self.token_decoder.decode(token)
             if payload['scope'] == 'access_token':
                 email = payload["sub"]
                 if email is None:
@@ -133,9 +145,12 @@ class Auth:
         except JWTError as e:
             raise credentials_exception
 
-        user = await repository_users.get_user_by_email(email, db)
+        user = await user_cache.get(email)
         if user is None:
-            raise credentials_exception
+            user = await repository_users.get_user_by_email(email, db)
+            if user is None:
+                raise credentials_exception
+            await user_cache.set(user)
         return user
 
     def create_email_token(self, data: dict):
@@ -163,7 +178,7 @@ class Auth:
                 :rtype: str
                 """
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self.token_decoder.decode(token)
             email = payload["sub"]
             return email
         except JWTError as e:
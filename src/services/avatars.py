@@ -0,0 +1,146 @@
+import asyncio
+import io
+import time
+from pathlib import Path
+
+import cloudinary
+import cloudinary.uploader
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.conf.config import settings
+
+
+def resize_avatar(data: bytes, size: int) -> bytes:
+    """
+        Crops the image to a centered square, scales it to ``size`` x ``size`` and re-encodes it as JPEG.
+
+        JPEG sources are decoded at a reduced scale right away, so a large phone photo is never
+        decoded at full resolution.
+
+        :param data: The uploaded image.
+        :type data: bytes
+        :param size: The side of the avatar in pixels.
+        :type size: int
+        :return: The JPEG encoded avatar.
+        :rtype: bytes
+        :raises ValueError: If the data is not a readable image.
+        """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.draft("RGB", (size * 2, size * 2))
+            image = ImageOps.exif_transpose(image)
+            avatar = ImageOps.fit(image.convert("RGB"), (size, size), Image.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Invalid image: {e}") from e
+    output = io.BytesIO()
+    avatar.save(output, format="JPEG", quality=85, optimize=True)
+    return output.getvalue()
+
+
+class InvalidAvatarId(ValueError):
+    """
+        An avatar public id that does not map to a location inside the storage.
+        """
+
+
+class CloudinaryStorage:
+    """
+        Stores avatars in Cloudinary; the client is configured once when the storage is created.
+        """
+
+    def __init__(self, cloud_name: str, api_key: str, api_secret: str):
+        cloudinary.config(cloud_name=cloud_name, api_key=api_key, api_secret=api_secret, secure=True)
+
+    def upload(self, data: bytes, public_id: str) -> str:
+        result = cloudinary.uploader.upload(io.BytesIO(data), public_id=public_id, overwrite=True)
+        return str(result.get("version"))
+
+    def url(self, public_id: str, version: str, width: int, height: int) -> str:
+        return cloudinary.CloudinaryImage(public_id).build_url(width=width, height=height, crop="fill",
+                                                               version=version)
+
+
+class FileSystemStorage:
+    """
+        Stores avatars as files under ``root``, served from ``base_url``. Stands in for Cloudinary
+        in tests and local development.
+        """
+
+    def __init__(self, root: str | Path, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, public_id: str) -> Path:
+        """
+            Returns the file of an avatar.
+
+            :param public_id: The storage id of the avatar.
+            :type public_id: str
+            :return: The file path under ``root``.
+            :rtype: Path
+            :raises InvalidAvatarId: If the id would resolve outside ``root``.
+            """
+        root = self.root.resolve()
+        path = (root / f"{public_id}.jpg").resolve()
+        if not path.is_relative_to(root):
+            raise InvalidAvatarId(f"Avatar id {public_id!r} escapes the storage root")
+        return path
+
+    def upload(self, data: bytes, public_id: str) -> str:
+        path = self.path(public_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return str(time.time_ns())
+
+    def url(self, public_id: str, version: str, width: int, height: int) -> str:
+        return f"{self.base_url}/{public_id}.jpg?v={version}"
+
+
+class AvatarService:
+    """
+        Resizes uploaded avatars locally and uploads them, both in a worker thread so the
+        event loop is never blocked.
+        """
+
+    def __init__(self, storage: CloudinaryStorage | FileSystemStorage, size: int):
+        self.storage = storage
+        self.size = size
+
+    def _process(self, data: bytes, public_id: str) -> str:
+        return self.storage.upload(resize_avatar(data, self.size), public_id)
+
+    async def update(self, file: UploadFile, public_id: str) -> str:
+        """
+            Stores the uploaded image as the avatar ``public_id``.
+
+            :param file: The uploaded image.
+            :type file: UploadFile
+            :param public_id: The storage id of the avatar.
+            :type public_id: str
+            :return: The URL of the avatar.
+            :rtype: str
+            """
+        data = await file.read()
+        try:
+            version = await asyncio.to_thread(self._process, data, public_id)
+        except InvalidAvatarId:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid avatar id")
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image file")
+        return self.storage.url(public_id, version, self.size, self.size)
+
+
+def get_storage() -> CloudinaryStorage | FileSystemStorage:
+    """
+        Returns the avatar storage selected by ``settings.avatar_storage``.
+
+        :return: The storage backend.
+        :rtype: CloudinaryStorage | FileSystemStorage
+        """
+    if settings.avatar_storage == "filesystem":
+        return FileSystemStorage(settings.avatar_storage_path, settings.avatar_base_url)
+    return CloudinaryStorage(settings.cloudinary_name, settings.cloudinary_api_key, settings.cloudinary_api_secret)
+
+
+avatar_service = AvatarService(get_storage(), settings.avatar_size)
@@ -0,0 +1,356 @@
+import hashlib
+import json
+import secrets
+import time
+from datetime import datetime
+from collections import Counter, OrderedDict
+from urllib.parse import urlencode
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+from src.services.resources import resources
+
+
+class UserCache:
+    """
+        Two level cache of authenticated users keyed by email.
+
+        The first level is an in-process LRU with a short TTL, the second one is Redis,
+        shared by all workers. Entries are JSON of the ``FIELDS`` columns only, never the password
+        hash or refresh token, and every hit returns a new detached ``User`` that is never bound
+        to another request's session.
+
+        ``invalidate`` clears Redis and the local level of the worker making the change; other
+        workers may keep serving their local copy for up to ``local_ttl`` seconds. Code that needs
+        the current password, refresh token or a just-changed field must read the user from the
+        database.
+        """
+
+    FIELDS = ("id", "username", "email", "avatar", "created_at", "confirmed")
+
+    def __init__(self, client: redis.Redis, ttl: int, local_ttl: int, maxsize: int):
+        self.redis = client
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.maxsize = maxsize
+        self._local: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(email: str) -> str:
+        return f"user:{email}"
+
+    @classmethod
+    def dumps(cls, user: User) -> bytes:
+        data = {field: getattr(user, field) for field in cls.FIELDS}
+        if data["created_at"] is not None:
+            data["created_at"] = data["created_at"].isoformat()
+        return json.dumps(data).encode()
+
+    @classmethod
+    def loads(cls, data: bytes) -> User | None:
+        try:
+            fields = json.loads(data)
+        except ValueError:
+            return None
+        if not isinstance(fields, dict) or set(fields) != set(cls.FIELDS):
+            return None
+        if fields["created_at"] is not None:
+            fields["created_at"] = datetime.fromisoformat(fields["created_at"])
+        return User(**fields)
+
+    def _store_local(self, email: str, data: bytes) -> None:
+        self._local[email] = (time.monotonic() + self.local_ttl, data)
+        self._local.move_to_end(email)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    async def get(self, email: str) -> User | None:
+        """
+            Returns the cached user for the email, or None on a miss.
+
+            :param email: The user's email address.
+            :type email: str
+            :return: A detached user object or None.
+            :rtype: User | None
+            """
+        entry = self._local.get(email)
+        if entry is not None:
+            expires_at, data = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(email)
+                self.local_hits += 1
+                return self.loads(data)
+            del self._local[email]
+        try:
+            data = await self.redis.get(self.key(email))
+        except RedisError:
+            data = None
+        user = self.loads(data) if data is not None else None
+        if user is None:
+            self.misses += 1
+            return None
+        self.redis_hits += 1
+        self._store_local(email, data)
+        return user
+
+    async def set(self, user: User) -> None:
+        """
+            Stores the user in both cache levels.
+
+            :param user: The user to cache.
+            :type user: User
+            """
+        data = self.dumps(user)
+        self._store_local(user.email, data)
+        try:
+            await self.redis.set(self.key(user.email), data, ex=self.ttl)
+        except RedisError:
+            pass
+
+    async def invalidate(self, email: str) -> None:
+        """
+            Drops the user from both cache levels after it has been changed.
+
+            :param email: The user's email address.
+            :type email: str
+            """
+        self._local.pop(email, None)
+        try:
+            await self.redis.delete(self.key(email))
+        except RedisError:
+            pass
+
+    def stats(self) -> dict:
+        """
+            Returns hit/miss counters of the cache.
+
+            :return: Counters for local hits, Redis hits and misses.
+            :rtype: dict
+            """
+        hits = self.local_hits + self.redis_hits
+        total = hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "hits": hits,
+            "misses": self.misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "size": len(self._local),
+        }
+
+
+class ResponseCache:
+    """
+        Redis cache of serialized contact read responses.
+
+        Keys and ETags include a per-user version, so every write to a user's contacts makes all of
+        that user's cached responses unreachable with a single SET; stale entries expire by TTL.
+        Only routes listed in ``routes`` are cached.
+
+        Versions are random tokens rather than counters, so a version lost to a Redis restart,
+        an eviction or ``version_ttl`` is replaced by one that never matches an earlier ETag. A
+        write whose version could not be replaced is remembered: the worker serves no cached
+        response or ETag for any user until it has replayed the missed writes to Redis. Other
+        workers learn of it from a dirty marker kept for ``ttl`` seconds, if Redis accepts that
+        write, and serve no cached response or ETag for the user while it exists. If neither the
+        marker nor a replay reaches Redis, for example because the worker stops first, other
+        workers may serve the old version until it expires, so staleness is bounded by
+        ``version_ttl`` (``response_cache_version_ttl``).
+        """
+
+    def __init__(self, client: redis.Redis, ttl: int, routes: list[str], version_ttl: int = 86400):
+        self.redis = client
+        self.ttl = ttl
+        self.routes = set(routes)
+        self.version_ttl = version_ttl
+        self.unbumped: set[int] = set()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @staticmethod
+    def version_key(user_id: int) -> str:
+        return f"contacts_version:{user_id}"
+
+    @staticmethod
+    def dirty_key(user_id: int) -> str:
+        return f"contacts_dirty:{user_id}"
+
+    @staticmethod
+    def new_version() -> str:
+        return secrets.token_hex(8)
+
+    async def _replay_bumps(self) -> None:
+        for user_id in list(self.unbumped):
+            await self.redis.set(self.version_key(user_id), self.new_version(), ex=self.version_ttl)
+            await self.redis.delete(self.dirty_key(user_id))
+            self.unbumped.discard(user_id)
+
+    async def get_version(self, user_id: int) -> str | None:
+        """
+            Returns the current contacts version of the user, starting a new one if there is none.
+
+            :param user_id: The user's id.
+            :type user_id: int
+            :return: The version, or None when Redis is unavailable or has missed a write.
+            :rtype: str | None
+            """
+        key = self.version_key(user_id)
+        try:
+            await self._replay_bumps()
+            version, dirty = await self.redis.mget(key, self.dirty_key(user_id))
+            if dirty is not None:
+                return None
+            if version is None:
+                version = self.new_version()
+                if not await self.redis.set(key, version, ex=self.version_ttl, nx=True):
+                    version = await self.redis.get(key)
+        except RedisError:
+            return None
+        if isinstance(version, bytes):
+            version = version.decode()
+        return version
+
+    async def bump(self, user_id: int) -> None:
+        """
+            Invalidates all cached responses and ETags of the user by replacing its version.
+
+            :param user_id: The user's id.
+            :type user_id: int
+            """
+        try:
+            await self.redis.set(self.version_key(user_id), self.new_version(), ex=self.version_ttl)
+        except RedisError:
+            self.unbumped.add(user_id)
+            try:
+                await self.redis.set(self.dirty_key(user_id), 1, ex=self.ttl)
+            except RedisError:
+                pass
+        else:
+            self.unbumped.discard(user_id)
+
+    def make_key(self, route: str, user_id: int, version: str | None, params: dict) -> str | None:
+        """
+            Builds the cache key of a response, or returns None if the route is not cached.
+
+            :param route: The route name.
+            :type route: str
+            :param user_id: The user's id.
+            :type user_id: int
+            :param version: The user's contacts version from get_version.
+            :type version: str | None
+            :param params: The request parameters that affect the response.
+            :type params: dict
+            :return: The cache key.
+            :rtype: str | None
+            """
+        if route not in self.routes or version is None:
+            return None
+        return f"response:{user_id}:{version}:{route}:{self.encode_params(params)}"
+
+    @staticmethod
+    def encode_params(params: dict) -> str:
+        return urlencode(sorted((name, value) for name, value in params.items() if value is not None))
+
+    @classmethod
+    def make_etag(cls, route: str, user_id: int, version: str | None, params: dict) -> str | None:
+        """
+            Builds a strong ETag for a response from the user's contacts version.
+
+            The tag changes whenever any contact of the user changes, so it can be compared
+            before running the query.
+
+            :param route: The route name.
+            :type route: str
+            :param user_id: The user's id.
+            :type user_id: int
+            :param version: The user's contacts version from get_version.
+            :type version: str | None
+            :param params: The request parameters that affect the response.
+            :type params: dict
+            :return: The quoted ETag, or None when the version is unknown.
+            :rtype: str | None
+            """
+        if version is None:
+            return None
+        material = f"{user_id}:{version}:{route}:{cls.encode_params(params)}"
+        return '"' + hashlib.blake2b(material.encode(), digest_size=12).hexdigest() + '"'
+
+    async def get(self, route: str, key: str | None) -> tuple[bytes, dict] | None:
+        """
+            Returns the cached body and headers for the key, or None on a miss.
+
+            :param route: The route name, used for the hit/miss counters.
+            :type route: str
+            :param key: The key built by make_key.
+            :type key: str | None
+            :return: The response body and headers.
+            :rtype: tuple[bytes, dict] | None
+            """
+        if key is None:
+            return None
+        try:
+            data = await self.redis.get(key)
+        except RedisError:
+            data = None
+        if data is None:
+            self.misses[route] += 1
+            return None
+        self.hits[route] += 1
+        headers, body = data.split(b"\n", 1)
+        return body, json.loads(headers)
+
+    async def set(self, key: str | None, body: bytes, headers: dict | None = None) -> None:
+        """
+            Stores a response body and its headers under the key.
+
+            :param key: The key built by make_key.
+            :type key: str | None
+            :param body: The serialized response body.
+            :type body: bytes
+            :param headers: Response headers to replay on a hit.
+            :type headers: dict | None
+            """
+        if key is None:
+            return
+        try:
+            await self.redis.set(key, json.dumps(headers or {}).encode() + b"\n" + body, ex=self.ttl)
+        except RedisError:
+            pass
+
+    def stats(self) -> dict:
+        """
+            Returns hit/miss counters and hit ratio per route.
+
+            :return: Per route cache statistics.
+            :rtype: dict
+            """
+        routes = {}
+        for route in sorted(self.routes):
+            total = self.hits[route] + self.misses[route]
+            routes[route] = {
+                "hits": self.hits[route],
+                "misses": self.misses[route],
+                "hit_ratio": self.hits[route] / total if total else 0.0,
+            }
+        return routes
+
+
+user_cache = UserCache(
+    resources.redis,
+    ttl=settings.user_cache_ttl,
+    local_ttl=settings.user_cache_local_ttl,
+    maxsize=settings.user_cache_maxsize,
+)
+
+response_cache = ResponseCache(
+    user_cache.redis,
+    ttl=settings.response_cache_ttl,
+    routes=settings.response_cache_routes,
+    version_ttl=settings.response_cache_version_ttl,
+)
@@ -0,0 +1,330 @@
+import codecs
+import csv
+import io
+import json
+from collections import deque
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, Iterator, Sequence
+
+CSV_MEDIA_TYPES = ("text/csv", "application/csv")
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+CSV_MAX_RECORD_SIZE = 64 * 1024
+CSV_MAX_RECORD_LINES = 100
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class RowError(ValueError):
+    """
+        A row of an uploaded file that could not be parsed.
+        """
+
+
+class LineSplitter:
+    """
+        Splits decoded text into lines, carrying the unterminated tail over to the next chunk.
+
+        Only the newly decoded text is split, so every character is scanned once. A line longer
+        than ``max_length`` characters is dropped up to the next newline and reported as a RowError
+        instead of being buffered.
+        """
+
+    def __init__(self, max_length: int = MAX_LINE_LENGTH):
+        self.max_length = max_length
+        self.pending: list[str] = []
+        self.size = 0
+        self.skipping = False
+
+    def _error(self) -> RowError:
+        return RowError(f"line longer than {self.max_length} characters")
+
+    def feed(self, text: str) -> Iterator[str | RowError]:
+        """
+            Adds decoded text.
+
+            :param text: The next piece of the input.
+            :type text: str
+            :return: The completed lines without the line terminator, a RowError for each one over the limit.
+            :rtype: Iterator[str | RowError]
+            """
+        *lines, tail = text.split("\n")
+        for line in lines:
+            if self.skipping:
+                self.skipping = False
+                continue
+            if self.pending:
+                line = "".join(self.pending) + line
+                self.pending = []
+                self.size = 0
+            line = line.rstrip("\r")
+            yield self._error() if len(line) > self.max_length else line
+        if tail and not self.skipping:
+            self.pending.append(tail)
+            self.size += len(tail)
+            if self.size > self.max_length:
+                self.pending = []
+                self.size = 0
+                self.skipping = True
+                yield self._error()
+
+    def close(self) -> Iterator[str]:
+        """
+            Ends the input.
+
+            :return: The last line if it has no line terminator.
+            :rtype: Iterator[str]
+            """
+        if self.pending:
+            line = "".join(self.pending)
+            self.pending = []
+            self.size = 0
+            yield line.rstrip("\r")
+        self.skipping = False
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_length: int = MAX_LINE_LENGTH) -> AsyncIterator[str | RowError]:
+    """
+        Decodes a stream of UTF-8 byte chunks into lines without buffering the whole body.
+
+        :param chunks: The request body chunks.
+        :type chunks: AsyncIterator[bytes]
+        :param max_length: The longest line kept, see :class:`LineSplitter`.
+        :type max_length: int
+        :return: Lines without the line terminator, a RowError for each one over ``max_length``.
+        :rtype: AsyncIterator[str | RowError]
+        """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    lines = LineSplitter(max_length)
+    async for chunk in chunks:
+        for line in lines.feed(decoder.decode(chunk)):
+            yield line
+    for line in lines.feed(decoder.decode(b"", final=True)):
+        yield line
+    for line in lines.close():
+        yield line
+
+
+class CsvRecords:
+    """
+        Groups CSV lines into records, joining lines of quoted fields that contain newlines.
+
+        Quote parity is tracked per line, so every line is scanned once. A record longer than
+        ``max_lines`` lines or ``max_size`` characters, quoted or not, or one still open at the end
+        of the input, is reported as a RowError and its lines after the first are read again as
+        new records: a stray quote costs one bad row instead of the rest of the file.
+        """
+
+    def __init__(self, max_size: int = CSV_MAX_RECORD_SIZE, max_lines: int = CSV_MAX_RECORD_LINES):
+        self.max_size = max_size
+        self.max_lines = max_lines
+        self.pending: list[str] = []
+        self.size = 0
+        self.quoted = False
+
+    def _resync(self) -> list[str]:
+        rest = self.pending[1:]
+        self.pending = []
+        self.size = 0
+        self.quoted = False
+        return rest
+
+    def feed(self, line: str) -> Iterator[str | RowError]:
+        """
+            Adds a line.
+
+            :param line: A line without the line terminator.
+            :type line: str
+            :return: The completed records, a RowError for each one over the limits.
+            :rtype: Iterator[str | RowError]
+            """
+        lines = deque([line])
+        while lines:
+            line = lines.popleft()
+            self.pending.append(line)
+            self.size += len(line) + 1
+            if line.count('"') % 2:
+                self.quoted = not self.quoted
+            if self.size > self.max_size or len(self.pending) > self.max_lines:
+                lines.extendleft(reversed(self._resync()))
+                yield RowError(f"record longer than {self.max_size} characters or {self.max_lines} lines")
+            elif not self.quoted:
+                record = "\n".join(self.pending)
+                self.pending = []
+                self.size = 0
+                yield record
+
+    def close(self) -> Iterator[str | RowError]:
+        """
+            Ends the input.
+
+            :return: The records completed by re-reading the lines of an unterminated one.
+            :rtype: Iterator[str | RowError]
+            """
+        while self.pending:
+            rest = self._resync()
+            yield RowError("unterminated quoted field")
+            for line in rest:
+                yield from self.feed(line)
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | RowError]]:
+    """
+        Parses a CSV stream with a header line into dicts, one record at a time.
+
+        Quoted fields spanning several lines are joined before parsing (see :class:`CsvRecords`).
+
+        :param chunks: The request body chunks.
+        :type chunks: AsyncIterator[bytes]
+        :return: Pairs of the 1-based row number and the row dict or a RowError.
+        :rtype: AsyncIterator[tuple[int, dict | RowError]]
+        """
+    header = None
+    row = 0
+    records = CsvRecords()
+
+    def parse(record: str | RowError) -> dict | RowError | None:
+        nonlocal header
+        if isinstance(record, RowError):
+            return record
+        if not record.strip():
+            return None
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as e:
+            return RowError(f"invalid CSV: {e}")
+        if header is None:
+            header = [value.strip() for value in values]
+            return None
+        if len(values) != len(header):
+            return RowError(f"expected {len(header)} fields, got {len(values)}")
+        return dict(zip(header, values))
+
+    async for line in iter_lines(chunks):
+        if isinstance(line, RowError):
+            completed = [*records.close(), line]
+        else:
+            completed = records.feed(line)
+        for record in completed:
+            data = parse(record)
+            if data is not None:
+                row += 1
+                yield row, data
+    for record in records.close():
+        data = parse(record)
+        if data is not None:
+            row += 1
+            yield row, data
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | RowError]]:
+    """
+        Parses a newline delimited JSON stream into dicts, one line at a time.
+
+        :param chunks: The request body chunks.
+        :type chunks: AsyncIterator[bytes]
+        :return: Pairs of the 1-based row number and the row dict or a RowError.
+        :rtype: AsyncIterator[tuple[int, dict | RowError]]
+        """
+    row = 0
+    async for line in iter_lines(chunks):
+        if isinstance(line, str) and not line.strip():
+            continue
+        row += 1
+        if isinstance(line, RowError):
+            yield row, line
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row, RowError(f"invalid JSON: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield row, RowError("expected a JSON object")
+        else:
+            yield row, data
+
+
+EXPORT_FIELDS = ("id", "name", "email", "phone_number", "birth_date", "additional_data")
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "vcf": "text/vcard",
+}
+
+
+def _date(value: date | datetime | None) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.isoformat()
+
+
+def format_ndjson(rows: Iterable[Sequence]) -> str:
+    """
+        Formats contact rows (in EXPORT_FIELDS order) as newline delimited JSON.
+
+        :param rows: Contact rows.
+        :type rows: Iterable[Sequence]
+        :return: One JSON object per line.
+        :rtype: str
+        """
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, (*row[:4], _date(row[4]), row[5]))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def format_csv(rows: Iterable[Sequence], header: bool = False) -> str:
+    """
+        Formats contact rows (in EXPORT_FIELDS order) as CSV.
+
+        :param rows: Contact rows.
+        :type rows: Iterable[Sequence]
+        :param header: Whether to start with the header line.
+        :type header: bool
+        :return: CSV lines.
+        :rtype: str
+        """
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows((*row[:4], _date(row[4]), row[5]) for row in rows)
+    return output.getvalue()
+
+
+def _vcard_escape(value: str | None) -> str:
+    if not value:
+        return ""
+    return (value.replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def format_vcard(rows: Iterable[Sequence]) -> str:
+    """
+        Formats contact rows (in EXPORT_FIELDS order) as vCard 3.0 entries.
+
+        :param rows: Contact rows.
+        :type rows: Iterable[Sequence]
+        :return: vCard entries.
+        :rtype: str
+        """
+    cards = []
+    for contact_id, name, email, phone_number, birth_date, additional_data in rows:
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            f"UID:{contact_id}",
+            f"FN:{_vcard_escape(name)}",
+            f"N:{_vcard_escape(name)};;;;",
+            f"EMAIL:{_vcard_escape(email)}",
+            f"TEL:{_vcard_escape(phone_number)}",
+        ]
+        if birth_date is not None:
+            lines.append(f"BDAY:{_date(birth_date)}")
+        if additional_data:
+            lines.append(f"NOTE:{_vcard_escape(additional_data)}")
+        lines.append("END:VCARD")
+        cards.append("\r\n".join(lines) + "\r\n")
+    return "".join(cards)
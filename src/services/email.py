@@ -1,30 +1,115 @@
+import logging
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+from fastapi_mail import MessageSchema, MessageType
 from fastapi_mail.errors import ConnectionErrors
+from jinja2 import Environment, FileSystemLoader, Template
 from pydantic import EmailStr
+from redis.exceptions import RedisError
+
 from src.conf.config import settings
 from src.services.auth import auth_service
+from src.services.mail_queue import mail_queue
+from src.services.resources import resources
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateRenderer:
+    """
+        Email templates compiled once and kept in memory.
+
+        All templates of the folder are loaded and compiled when the renderer is created, and the
+        environment never checks the files again, so rendering is a call of the compiled template
+        code with the static parts of the HTML already baked in as constants.
+        """
+
+    def __init__(self, folder: Path):
+        self.env = Environment(loader=FileSystemLoader(folder), auto_reload=False, cache_size=-1)
+        self.templates: dict[str, Template] = {name: self.env.get_template(name) for name in self.env.list_templates()}
+
+    def get(self, template: str) -> Template:
+        compiled = self.templates.get(template)
+        if compiled is None:
+            compiled = self.templates[template] = self.env.get_template(template)
+        return compiled
+
+    def render(self, template: str, body: dict) -> str:
+        """
+            Render an email template.
+
+            :param template: The template file name.
+            :type template: str
+            :param body: The template variables.
+            :type body: dict
+            :return: The rendered HTML.
+            :rtype: str
+            """
+        return self.get(template).render(body)
+
+    def render_batch(self, template: str, bodies: list[dict]) -> list[str]:
+        """
+            Render one template for many messages in a single pass.
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_from,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME="Desired Name",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
-)
+            :param template: The template file name.
+            :type template: str
+            :param bodies: The template variables of every message.
+            :type bodies: list[dict]
+            :return: The rendered HTML of every message, in order.
+            :rtype: list[str]
+            """
+        render = self.get(template).render
+        return [render(body) for body in bodies]
+
+
+templates = TemplateRenderer(resources.mail.config.TEMPLATE_FOLDER)
+
+
+def render_template(template: str, body: dict) -> str:
+    """
+        Render an email template.
+
+        :param template: The template file name.
+        :type template: str
+        :param body: The template variables.
+        :type body: dict
+        :return: The rendered HTML.
+        :rtype: str
+        """
+    return templates.render(template, body)
+
+
+def build_message(subject: str, recipients: list[str], html: str) -> EmailMessage:
+    """
+        Build an HTML email message from the configured sender.
+
+        :param subject: The email subject.
+        :type subject: str
+        :param recipients: The recipients' email addresses.
+        :type recipients: list[str]
+        :param html: The HTML body.
+        :type html: str
+        :return: The message.
+        :rtype: EmailMessage
+        """
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = formataddr((settings.mail_from_name, settings.mail_from))
+    message["To"] = ", ".join(recipients)
+    message.set_content(html, subtype="html")
+    return message
 
 
 async def send_email(email: EmailStr, username: str, host: str):
     """
         Send an email for email verification to a user.
 
+        The email is put on the Redis mail queue and delivered by the mail worker
+        (``python -m src.services.mail_worker``). If the queue is unavailable the email
+        is sent directly.
+
         :param email: The recipient's email address.
         :type email: EmailStr
         :param username: The user's username.
@@ -32,16 +117,22 @@ async def send_email(email: EmailStr, username: str, host: str):
         :param host: The host URL for email verification link.
         :type host: str
         """
+    token_verification = auth_service.create_email_token({"sub": email})
+    subject = "Confirm your email "
+    template_body = {"host": str(host), "username": username, "token": token_verification}
+    try:
+        await mail_queue.enqueue(subject, [email], "email_template.html", template_body)
+        return
+    except RedisError as err:
+        logger.warning("Mail queue unavailable, sending directly: %s", err)
     try:
-        token_verification = auth_service.create_email_token({"sub": email})
         message = MessageSchema(
-            subject="Confirm your email ",
+            subject=subject,
             recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
+            body=render_template("email_template.html", template_body),
             subtype=MessageType.html
         )
 
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
+        await resources.mail.send_message(message)
     except ConnectionErrors as err:
-        print(err)
+        logger.error("Could not send email to %s: %s", email, err)
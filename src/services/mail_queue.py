@@ -0,0 +1,218 @@
+import json
+import time
+import uuid
+
+import redis.asyncio as redis
+
+from src.conf.config import settings
+from src.services.cache import user_cache
+
+QUEUE_KEY = "mail:queue"
+RETRY_KEY = "mail:retry"
+DEAD_KEY = "mail:dead"
+
+
+def parse_job(payload: bytes) -> dict | None:
+    """
+        Decodes a raw job payload.
+
+        :param payload: The raw job payload.
+        :type payload: bytes
+        :return: The job, or None if the payload is not a well-formed job.
+        :rtype: dict | None
+        """
+    try:
+        job = json.loads(payload)
+    except ValueError:
+        return None
+    if not (isinstance(job, dict) and isinstance(job.get("subject"), str) and isinstance(job.get("body"), dict)
+            and isinstance(job.get("recipients"), list) and all(isinstance(r, str) for r in job["recipients"])
+            and isinstance(job.get("attempts", 0), int)):
+        return None
+    return job
+
+
+class MailQueue:
+    """
+        Durable Redis queue of outgoing emails.
+
+        Producers LPUSH jobs onto ``mail:queue``. A worker atomically moves the jobs it is sending
+        to its own ``mail:processing:<worker>`` list and removes them only after delivery, so jobs
+        of a worker that died are put back with ``recover``. Failed jobs wait in the ``mail:retry``
+        sorted set (scored by the time of the next attempt, with exponential backoff) and end up
+        in ``mail:dead`` after ``max_attempts``. Payloads that are not well-formed jobs go to
+        ``mail:dead`` at once, wrapped as ``{"payload": ..., "error": ...}``.
+        """
+
+    def __init__(self, client: redis.Redis, max_attempts: int, retry_backoff: float):
+        self.redis = client
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    @staticmethod
+    def processing_key(worker: str) -> str:
+        return f"mail:processing:{worker}"
+
+    async def enqueue(self, subject: str, recipients: list[str], template: str, body: dict) -> str:
+        """
+            Adds an email to the queue.
+
+            :param subject: The email subject.
+            :type subject: str
+            :param recipients: The recipients' email addresses.
+            :type recipients: list[str]
+            :param template: The template file name.
+            :type template: str
+            :param body: The template variables.
+            :type body: dict
+            :return: The job id.
+            :rtype: str
+            """
+        job = {
+            "id": uuid.uuid4().hex,
+            "subject": subject,
+            "recipients": recipients,
+            "template": template,
+            "body": body,
+            "attempts": 0,
+        }
+        await self.redis.lpush(QUEUE_KEY, json.dumps(job))
+        return job["id"]
+
+    async def reserve(self, worker: str, batch_size: int, timeout: float) -> list[bytes]:
+        """
+            Moves up to ``batch_size`` jobs to the worker's processing list.
+
+            Blocks up to ``timeout`` seconds for the first job.
+
+            :param worker: The worker name.
+            :type worker: str
+            :param batch_size: The maximum number of jobs to reserve.
+            :type batch_size: int
+            :param timeout: Seconds to wait for the first job.
+            :type timeout: float
+            :return: The raw job payloads.
+            :rtype: list[bytes]
+            """
+        processing = self.processing_key(worker)
+        first = await self.redis.blmove(QUEUE_KEY, processing, timeout, "RIGHT", "LEFT")
+        if first is None:
+            return []
+        payloads = [first]
+        if batch_size > 1:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for _ in range(batch_size - 1):
+                    pipe.lmove(QUEUE_KEY, processing, "RIGHT", "LEFT")
+                payloads += [payload for payload in await pipe.execute() if payload is not None]
+        return payloads
+
+    async def ack(self, worker: str, payloads: list[bytes]) -> None:
+        """
+            Removes delivered jobs from the worker's processing list.
+
+            :param worker: The worker name.
+            :type worker: str
+            :param payloads: The raw job payloads.
+            :type payloads: list[bytes]
+            """
+        if not payloads:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for payload in payloads:
+                pipe.lrem(self.processing_key(worker), 1, payload)
+            await pipe.execute()
+
+    async def retry(self, worker: str, payload: bytes, error: str) -> bool:
+        """
+            Schedules a failed job for another attempt, or moves it to the dead letter list.
+
+            :param worker: The worker name.
+            :type worker: str
+            :param payload: The raw job payload.
+            :type payload: bytes
+            :param error: The delivery error.
+            :type error: str
+            :return: True if the job will be retried.
+            :rtype: bool
+            """
+        job = parse_job(payload)
+        if job is None:
+            await self.dead_letter(worker, payload, error)
+            return False
+        job["attempts"] = job.get("attempts", 0) + 1
+        job["error"] = error
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key(worker), 1, payload)
+            if job["attempts"] >= self.max_attempts:
+                pipe.lpush(DEAD_KEY, json.dumps(job))
+            else:
+                due = time.time() + self.retry_backoff * 2 ** (job["attempts"] - 1)
+                pipe.zadd(RETRY_KEY, {json.dumps(job): due})
+            await pipe.execute()
+        return job["attempts"] < self.max_attempts
+
+    async def dead_letter(self, worker: str, payload: bytes, error: str) -> None:
+        """
+            Moves a job to the dead letter list as is, without decoding it.
+
+            :param worker: The worker name.
+            :type worker: str
+            :param payload: The raw job payload.
+            :type payload: bytes
+            :param error: Why the job cannot be delivered.
+            :type error: str
+            """
+        entry = json.dumps({"payload": payload.decode("utf-8", "replace"), "error": error})
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key(worker), 1, payload)
+            pipe.lpush(DEAD_KEY, entry)
+            await pipe.execute()
+
+    async def promote_due(self) -> int:
+        """
+            Moves retries whose backoff has elapsed back to the queue.
+
+            :return: The number of promoted jobs.
+            :rtype: int
+            """
+        promoted = 0
+        for payload in await self.redis.zrangebyscore(RETRY_KEY, "-inf", time.time()):
+            if await self.redis.zrem(RETRY_KEY, payload):
+                await self.redis.rpush(QUEUE_KEY, payload)
+                promoted += 1
+        return promoted
+
+    async def recover(self, worker: str) -> int:
+        """
+            Puts back jobs a previous run of the worker reserved but never finished.
+
+            :param worker: The worker name.
+            :type worker: str
+            :return: The number of recovered jobs.
+            :rtype: int
+            """
+        recovered = 0
+        while await self.redis.lmove(self.processing_key(worker), QUEUE_KEY, "LEFT", "RIGHT") is not None:
+            recovered += 1
+        return recovered
+
+    async def stats(self) -> dict:
+        """
+            Returns the queue lengths.
+
+            :return: Queued, retrying and dead jobs.
+            :rtype: dict
+            """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.llen(QUEUE_KEY)
+            pipe.zcard(RETRY_KEY)
+            pipe.llen(DEAD_KEY)
+            queued, retrying, dead = await pipe.execute()
+        return {"queued": queued, "retrying": retrying, "dead": dead}
+
+
+mail_queue = MailQueue(
+    user_cache.redis,
+    max_attempts=settings.mail_max_attempts,
+    retry_backoff=settings.mail_retry_backoff,
+)
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import logging
+import signal
+import socket
+
+import aiosmtplib
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.services.email import build_message, templates
+from src.services.mail_queue import MailQueue, parse_job
+from src.services.resources import resources
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPPool:
+    """
+        A fixed set of persistent SMTP connections.
+
+        Connections are opened on first use and reused for every following batch; a connection
+        the server dropped is reopened once before the message is reported as failed.
+        """
+
+    def __init__(self, size: int, **smtp_options):
+        self.size = max(size, 1)
+        self.smtp_options = smtp_options
+        self._clients: list[aiosmtplib.SMTP | None] = [None] * self.size
+
+    async def _client(self, index: int) -> aiosmtplib.SMTP:
+        client = self._clients[index]
+        if client is None or not client.is_connected:
+            client = aiosmtplib.SMTP(**self.smtp_options)
+            await client.connect()
+            self._clients[index] = client
+        return client
+
+    def _discard(self, index: int) -> None:
+        client = self._clients[index]
+        if client is not None and client.is_connected:
+            client.close()
+        self._clients[index] = None
+
+    async def _send(self, index: int, message) -> None:
+        try:
+            client = await self._client(index)
+            await client.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            self._discard(index)
+            client = await self._client(index)
+            await client.send_message(message)
+
+    async def _send_chunk(self, index: int, messages: list) -> list[Exception | None]:
+        results = []
+        for message in messages:
+            try:
+                await self._send(index, message)
+                results.append(None)
+            except aiosmtplib.SMTPResponseException as e:
+                results.append(e)
+            except (aiosmtplib.SMTPException, OSError) as e:
+                self._discard(index)
+                results.append(e)
+        return results
+
+    async def send_batch(self, messages: list) -> list[Exception | None]:
+        """
+            Sends messages over all pooled connections concurrently.
+
+            :param messages: The messages to send.
+            :type messages: list[EmailMessage]
+            :return: None for every delivered message, the error otherwise, in input order.
+            :rtype: list[Exception | None]
+            """
+        chunks = [messages[index::self.size] for index in range(self.size)]
+        chunk_results = await asyncio.gather(*(self._send_chunk(index, chunk) for index, chunk in enumerate(chunks)))
+        results = [None] * len(messages)
+        for index, chunk_result in enumerate(chunk_results):
+            results[index::self.size] = chunk_result
+        return results
+
+    async def close(self) -> None:
+        for client in self._clients:
+            if client is not None and client.is_connected:
+                try:
+                    await client.quit()
+                except aiosmtplib.SMTPException:
+                    client.close()
+        self._clients = [None] * self.size
+
+
+class MailWorker:
+    """
+        Takes batches of jobs from the mail queue, renders them and delivers them over the SMTP pool.
+        """
+
+    def __init__(self, queue: MailQueue, pool: SMTPPool, name: str, batch_size: int, poll_timeout: float = 1):
+        self.queue = queue
+        self.pool = pool
+        self.name = name
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.sent = 0
+        self.failed = 0
+
+    async def run_once(self) -> int:
+        """
+            Processes one batch of jobs.
+
+            Every job fails on its own: malformed jobs and jobs whose message cannot be built are
+            dead-lettered, rendering and delivery errors are retried.
+
+            :return: The number of delivered emails.
+            :rtype: int
+            """
+        await self.queue.promote_due()
+        payloads = await self.queue.reserve(self.name, self.batch_size, self.poll_timeout)
+        if not payloads:
+            return 0
+        jobs = {}
+        for payload in payloads:
+            job = parse_job(payload)
+            if job is None:
+                logger.error("Dropping malformed mail job: %r", payload[:200])
+                self.failed += 1
+                await self.queue.dead_letter(self.name, payload, "malformed job")
+            else:
+                jobs[payload] = job
+        ready, messages = [], []
+        for payload, html in (await self.render(jobs)).items():
+            if isinstance(html, Exception):
+                logger.error("Could not render mail job: %r", html)
+                self.failed += 1
+                await self.queue.retry(self.name, payload, repr(html))
+                continue
+            job = jobs[payload]
+            try:
+                messages.append(build_message(job["subject"], job["recipients"], html))
+            except Exception as e:
+                logger.error("Could not build mail message: %r", e)
+                self.failed += 1
+                await self.queue.dead_letter(self.name, payload, repr(e))
+            else:
+                ready.append(payload)
+        delivered = []
+        for payload, error in zip(ready, await self.pool.send_batch(messages)):
+            if error is None:
+                delivered.append(payload)
+            else:
+                logger.warning("Mail delivery failed: %s", error)
+                self.failed += 1
+                await self.queue.retry(self.name, payload, repr(error))
+        await self.queue.ack(self.name, delivered)
+        self.sent += len(delivered)
+        return len(delivered)
+
+    async def render(self, jobs: dict[bytes, dict]) -> dict[bytes, str | Exception]:
+        """
+            Renders the jobs of a batch, one render_batch pass per template.
+
+            If a pass fails, its jobs are rendered one by one so only the broken ones fail.
+
+            :param jobs: Decoded jobs keyed by their raw payload.
+            :type jobs: dict[bytes, dict]
+            :return: The HTML, or the rendering error, keyed by raw payload.
+            :rtype: dict[bytes, str | Exception]
+            """
+        by_template = {}
+        for payload, job in jobs.items():
+            by_template.setdefault(job.get("template"), []).append(payload)
+        results = {}
+        for template, group in by_template.items():
+            try:
+                results.update(zip(group, templates.render_batch(template, [jobs[payload]["body"] for payload in group])))
+            except Exception:
+                for payload in group:
+                    try:
+                        results[payload] = templates.render(template, jobs[payload]["body"])
+                    except Exception as e:
+                        results[payload] = e
+        return results
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """
+            Processes batches until ``stop`` is set, then closes the SMTP connections.
+
+            :param stop: The event that stops the worker after the current batch.
+            :type stop: asyncio.Event
+            """
+        recovered = await self.queue.recover(self.name)
+        if recovered:
+            logger.info("Recovered %d unfinished mail jobs", recovered)
+        try:
+            while not stop.is_set():
+                try:
+                    await self.run_once()
+                except RedisError as e:
+                    logger.warning("Mail queue unavailable: %s", e)
+                    await asyncio.sleep(self.poll_timeout)
+                except Exception:
+                    logger.exception("Mail batch failed")
+                    await asyncio.sleep(self.poll_timeout)
+        finally:
+            await self.pool.close()
+
+
+def smtp_options() -> dict:
+    """
+        Returns aiosmtplib connection options from the settings.
+
+        :return: Keyword arguments for aiosmtplib.SMTP.
+        :rtype: dict
+        """
+    options = {
+        "hostname": settings.mail_server,
+        "port": settings.mail_port,
+        "use_tls": settings.mail_ssl_tls,
+        "start_tls": settings.mail_starttls,
+        "validate_certs": settings.mail_validate_certs,
+    }
+    if settings.mail_use_credentials:
+        options.update(username=settings.mail_username, password=settings.mail_password)
+    return options
+
+
+async def main(name: str) -> None:
+    queue = MailQueue(resources.redis, max_attempts=settings.mail_max_attempts, retry_backoff=settings.mail_retry_backoff)
+    pool = SMTPPool(settings.mail_smtp_pool_size, **smtp_options())
+    worker = MailWorker(queue, pool, name, settings.mail_queue_batch_size)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await worker.run(stop)
+    finally:
+        await resources.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deliver queued emails")
+    parser.add_argument("--name", default=socket.gethostname(),
+                        help="stable worker name; unfinished jobs of the same name are recovered on start")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(parser.parse_args().name))
@@ -0,0 +1,271 @@
+import asyncio
+import bisect
+import logging
+import time
+from typing import Awaitable, Callable, Iterable
+
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.database.db import QueryProfile, QueryProfiler
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """
+        Base of the metric types: a name, help text, label names and one series per label values.
+        """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.series: dict[tuple, object] = {}
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def set_total(self, labels: tuple, value: float) -> None:
+        """
+            Sets a series to a running total kept elsewhere, e.g. the counters of a service's ``stats()``.
+            """
+        self.series[labels] = value
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{format_labels(self.labels, labels)} {format_value(value)}"
+                for labels, value in self.series.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple, value: float) -> None:
+        self.series[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def set_cumulative(self, labels: tuple, buckets: dict[str, int], total: float) -> None:
+        """
+            Replaces a series with already cumulative bucket counts keyed by upper bound,
+            e.g. the pool wait histogram of ``PoolWaitStats.snapshot``.
+            """
+        self.series[labels] = (buckets, total)
+
+    def render(self) -> list[str]:
+        lines = []
+        for labels, series in self.series.items():
+            if isinstance(series[0], dict):
+                buckets, total = series
+                cumulative = list(buckets.items())
+            else:
+                counts, total = series
+                running, cumulative = 0, []
+                for bound, count in zip((*self.buckets, "+Inf"), counts):
+                    running += count
+                    cumulative.append((bound, running))
+            for bound, count in cumulative:
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, labels, le)} {count}")
+            label_text = format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative[-1][1]}")
+        return lines
+
+
+class Registry:
+    """
+        Metrics of this worker, rendered in the Prometheus text exposition format.
+
+        Request metrics are updated as requests finish. Everything else (pool, caches, queues)
+        is read by collectors only when ``/metrics`` is scraped, so nothing is spent on it between scrapes.
+        """
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self.collectors: list[Callable[[], Awaitable[None] | None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, function: Callable[[], Awaitable[None] | None]) -> Callable:
+        self.collectors.append(function)
+        return function
+
+    async def render(self) -> str:
+        """
+            Runs the collectors and renders all metrics.
+
+            :return: The metrics in Prometheus text format 0.0.4.
+            :rtype: str
+            """
+        for collect in self.collectors:
+            result = collect()
+            if asyncio.iscoroutine(result):
+                await result
+        lines = []
+        for metric in self.metrics:
+            samples = metric.render()
+            if samples:
+                lines += metric.header() + samples
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status.",
+                                 ("method", "route", "status"))
+http_latency = registry.histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                                  ("method", "route"))
+http_response_size = registry.histogram("http_response_size_bytes", "HTTP response body size by route.",
+                                        ("method", "route"), buckets=SIZE_BUCKETS)
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being processed.", ("method",))
+db_queries = registry.histogram("db_queries_per_request", "SQL statements executed per request by route.",
+                                ("method", "route"), buckets=QUERY_BUCKETS)
+db_time = registry.histogram("db_request_duration_seconds", "Time spent in SQL statements per request by route.",
+                             ("method", "route"))
+db_repeated = registry.counter("db_repeated_queries_total",
+                               "Statements repeated with identical parameters within one request.", ("method", "route"))
+
+
+class MetricsMiddleware:
+    """
+        ASGI middleware recording latency, status, response size and in-flight requests per route.
+
+        Requests are labelled with the route template (``/api/contacts/{contact_id}``), never the
+        raw path, so the number of series stays bounded. Paths in ``exclude`` are not recorded.
+
+        With a ``profiler`` the SQL statements of each request are counted and timed too, and
+        statements repeated with identical parameters are logged. ``debug_headers`` adds the
+        request's query count, DB time and slowest statement to the response headers.
+        """
+
+    def __init__(self, app: ASGIApp, routes: list[BaseRoute], exclude: Iterable[str] = ("/metrics",),
+                 profiler: QueryProfiler | None = None, debug_headers: bool = False):
+        self.app = app
+        self.routes = routes
+        self.exclude = set(exclude)
+        self.profiler = profiler
+        self.debug_headers = debug_headers
+        self._templates: dict[Callable, str] | None = None
+
+    def template(self, scope: Scope, status: int) -> str:
+        if self._templates is None:
+            self._templates = {route.endpoint: route.path for route in self.routes if hasattr(route, "endpoint")}
+        endpoint = scope.get("endpoint")
+        if endpoint in self._templates:
+            return self._templates[endpoint]
+        return "unmatched" if status == 404 else "other"
+
+    @staticmethod
+    def profile_headers(profile: QueryProfile) -> list[tuple[bytes, bytes]]:
+        headers = [
+            (b"x-db-queries", str(profile.count).encode()),
+            (b"x-db-time", f"{profile.duration * 1000:.2f}".encode()),
+            (b"x-db-repeated", str(len(profile.repeated())).encode()),
+        ]
+        if profile.slowest is not None:
+            statement = " ".join(profile.slowest.split())[:200]
+            headers.append((b"x-db-slowest", f"{profile.slowest_duration * 1000:.2f}ms {statement}"
+                            .encode("latin-1", errors="replace")))
+        return headers
+
+    def record_profile(self, method: str, route: str, profile: QueryProfile) -> None:
+        db_queries.observe((method, route), profile.count)
+        db_time.observe((method, route), profile.duration)
+        repeated = profile.repeated()
+        if repeated:
+            db_repeated.inc((method, route), sum(count - 1 for count in repeated.values()))
+            for statement, count in repeated.items():
+                logger.warning("Query repeated %d times in %s %s: %s", count, method, route,
+                               " ".join(statement.split()))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status, size = 500, 0
+        profile = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.debug_headers and profile is not None:
+                    message = {**message, "headers": [*message.get("headers", ()), *self.profile_headers(profile)]}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc((method,))
+        start = time.perf_counter()
+        try:
+            if self.profiler is None:
+                await self.app(scope, receive, send_wrapper)
+            else:
+                with self.profiler.profile() as profile:
+                    await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec((method,))
+            route = self.template(scope, status)
+            http_requests.inc((method, route, str(status)))
+            http_latency.observe((method, route), elapsed)
+            http_response_size.observe((method, route), size)
+            if profile is not None:
+                self.record_profile(method, route, profile)
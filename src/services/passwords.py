@@ -0,0 +1,168 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from src.conf.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def mp_context() -> multiprocessing.context.BaseContext:
+    """
+        Returns the start method of the hashing processes: ``forkserver`` where available, else ``spawn``.
+
+        :return: The multiprocessing context.
+        :rtype: multiprocessing.context.BaseContext
+        """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+class PasswordPool:
+    """
+        Runs bcrypt hashing and verification off the event loop.
+
+        Work goes to a size-limited process pool (or a thread pool when processes are disabled
+        or cannot be started). Callers that would exceed ``max_pending`` queued jobs, or that wait
+        longer than ``max_wait`` seconds for a free worker, get a 503 instead of piling up behind a
+        login storm. Jobs are handed to the executor only when a worker is free, so ``max_wait``
+        bounds the time spent queued and never cuts off a hash that has already started.
+
+        Worker processes are started with ``forkserver`` (``spawn`` where it is unavailable), not
+        by forking the multi-threaded application process.
+        """
+
+    def __init__(self, max_workers: int, use_processes: bool, max_pending: int, max_wait: float):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.max_pending = max_pending
+        self.max_wait = max_wait
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp_context())
+                except (OSError, NotImplementedError, ValueError):
+                    self.use_processes = False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="password-hash")
+        return self._executor
+
+    def _get_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def _fallback_to_threads(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.use_processes = False
+
+    async def run(self, fn, *args):
+        """
+            Runs ``fn(*args)`` in the pool and awaits its result.
+
+            :param fn: A module level (picklable) function.
+            :param args: Arguments for the function.
+            :return: The function result.
+            :raises HTTPException: 503 when the pool queue is full or no worker frees up within max_wait.
+            """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Server is busy, try again later", headers={"Retry-After": "1"})
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        slots = self._get_slots(loop)
+        try:
+            try:
+                await asyncio.wait_for(slots.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                    detail="Server is busy, try again later", headers={"Retry-After": "1"})
+            try:
+                result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            except BrokenProcessPool:
+                self._fallback_to_threads()
+                result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            finally:
+                slots.release()
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(_verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """
+            Returns queue depth and outcome counters of the pool.
+
+            :return: Pool metrics.
+            :rtype: dict
+            """
+        return {
+            "workers": self.max_workers,
+            "backend": "process" if self.use_processes else "thread",
+            "pending": self.pending,
+            "max_pending_seen": self.max_pending_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+    def after_fork(self, max_workers: int | None = None) -> None:
+        """
+            Forgets an executor inherited from the parent process; the child starts its own on first use.
+
+            :param max_workers: New pool size, e.g. this worker's share of the CPUs.
+            :type max_workers: int | None
+            """
+        self._executor = None
+        self._slots = None
+        if max_workers:
+            self.max_workers = max_workers
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(
+    max_workers=settings.password_hash_workers,
+    use_processes=settings.password_hash_use_processes,
+    max_pending=settings.password_hash_max_pending,
+    max_wait=settings.password_hash_max_wait,
+)
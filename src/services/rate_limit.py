@@ -0,0 +1,173 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+
+import redis.asyncio as redis
+from fastapi import Depends, HTTPException, status
+from redis.exceptions import RedisError
+
+from src.conf.config import settings
+from src.database.models import User
+from src.services.auth import auth_service
+from src.services.cache import user_cache
+
+
+def parse_limit(limit: str) -> tuple[int, int]:
+    """
+        Parses a ``"<times>/<seconds>"`` limit, e.g. ``"10/60"``.
+
+        :param limit: The limit.
+        :type limit: str
+        :return: Allowed requests and window length in seconds.
+        :rtype: tuple[int, int]
+        """
+    times, _, seconds = limit.partition("/")
+    return int(times), int(seconds or 1)
+
+
+class Bucket:
+    __slots__ = ("window", "tokens", "granted", "exhausted")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.tokens = 0
+        self.granted = 0
+        self.exhausted = False
+
+
+class RateLimiter:
+    """
+        Fixed window rate limiter with per-worker token buckets leasing quota from Redis.
+
+        Redis keeps one counter per route, identity and window. A worker does not ask Redis for
+        every request: it leases a batch of ``lease_fraction`` of the limit (at least one token,
+        at most ``lease_size``) with a single INCRBY and spends it from an in-process bucket, so
+        the hot path is a dictionary lookup. The counters only grow by what was leased, so all
+        workers together never admit more than the limit. Once Redis refuses a lease the bucket
+        stays closed until the window ends.
+
+        Tokens leased by one worker cannot be spent by another, so a larger fraction saves Redis
+        round trips at the cost of rejecting up to ``lease_fraction * times`` requests early per
+        worker the identity's traffic is spread across.
+
+        If Redis fails or does not answer within ``redis_timeout`` the worker keeps limiting on
+        its own, allowing the full limit per worker for that window.
+        """
+
+    def __init__(self, client: redis.Redis, lease_size: int, redis_timeout: float, maxsize: int,
+                 lease_fraction: float = 0.2):
+        self.redis = client
+        self.lease_size = lease_size
+        self.lease_fraction = lease_fraction
+        self.redis_timeout = redis_timeout
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[tuple[str, str], Bucket] = OrderedDict()
+        self.local_hits = 0
+        self.leases = 0
+        self.rejected = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def key(route: str, identity: str, window: int) -> str:
+        return f"ratelimit:{route}:{identity}:{window}"
+
+    async def _lease(self, route: str, identity: str, bucket: Bucket, times: int, seconds: int) -> int:
+        size = max(1, min(self.lease_size, math.ceil(times * self.lease_fraction)))
+        key = self.key(route, identity, bucket.window)
+        try:
+            async with asyncio.timeout(self.redis_timeout):
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.incrby(key, size)
+                    pipe.expire(key, seconds + 1)
+                    used, _ = await pipe.execute()
+        except (RedisError, TimeoutError):
+            self.fallbacks += 1
+            return max(times - bucket.granted, 0)
+        self.leases += 1
+        return max(0, min(size, times - (used - size)))
+
+    async def acquire(self, route: str, identity: str, times: int, seconds: int) -> float:
+        """
+            Takes one request from the identity's quota on the route.
+
+            :param route: The route name.
+            :type route: str
+            :param identity: Whom the limit applies to, e.g. the user id.
+            :type identity: str
+            :param times: Allowed requests per window.
+            :type times: int
+            :param seconds: The window length in seconds.
+            :type seconds: int
+            :return: 0 if the request is allowed, otherwise seconds until the window ends.
+            :rtype: float
+            """
+        now = time.time()
+        window = int(now // seconds)
+        key = (route, identity)
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.window != window:
+            bucket = self._buckets[key] = Bucket(window)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+        if bucket.tokens > 0:
+            bucket.tokens -= 1
+            self.local_hits += 1
+            return 0
+        if not bucket.exhausted:
+            granted = await self._lease(route, identity, bucket, times, seconds)
+            if granted > 0:
+                bucket.granted += granted
+                bucket.tokens += granted - 1
+                return 0
+            bucket.exhausted = True
+        self.rejected += 1
+        return (window + 1) * seconds - now
+
+    def stats(self) -> dict:
+        """
+            Returns counters of the limiter.
+
+            :return: Requests served from local buckets, Redis leases, rejected requests,
+                Redis fallbacks and the number of live buckets.
+            :rtype: dict
+            """
+        return {
+            "local_hits": self.local_hits,
+            "leases": self.leases,
+            "rejected": self.rejected,
+            "fallbacks": self.fallbacks,
+            "size": len(self._buckets),
+        }
+
+
+rate_limiter = RateLimiter(
+    user_cache.redis,
+    lease_size=settings.rate_limit_lease_size,
+    lease_fraction=settings.rate_limit_lease_fraction,
+    redis_timeout=settings.rate_limit_redis_timeout,
+    maxsize=settings.rate_limit_local_maxsize,
+)
+
+
+class RateLimit:
+    """
+        Route dependency limiting requests per authenticated user.
+
+        ``times`` and ``seconds`` are the defaults; ``settings.rate_limits`` may override them
+        per route name, e.g. ``RATE_LIMITS='{"get_contacts": "100/60"}'``. A limit of 0 disables it.
+        """
+
+    def __init__(self, route: str, times: int, seconds: int):
+        self.route = route
+        self.times, self.seconds = parse_limit(settings.rate_limits[route]) if route in settings.rate_limits \
+            else (times, seconds)
+
+    async def __call__(self, current_user: User = Depends(auth_service.get_current_user)) -> None:
+        if self.times <= 0:
+            return
+        retry_after = await rate_limiter.acquire(self.route, str(current_user.id), self.times, self.seconds)
+        if retry_after:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too Many Requests",
+                                headers={"Retry-After": str(math.ceil(retry_after))})
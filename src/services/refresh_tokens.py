@@ -0,0 +1,148 @@
+import uuid
+
+import redis.asyncio as redis
+from redis.exceptions import WatchError
+
+from src.conf.config import settings
+from src.services.cache import user_cache
+
+ROTATED = "rotated"
+REUSED = "reused"
+UNKNOWN = "unknown"
+
+
+class RefreshTokenStore:
+    """
+        Redis store of refresh token sessions.
+
+        Every login starts a session ``refresh:<sid>`` that holds the owner's email and the id
+        (``jti``) of the only refresh token currently valid for it, expiring together with that
+        token. A refresh rotates the ``jti``; presenting an already rotated token is treated as
+        theft and ends the session. A user may have any number of sessions, tracked in the
+        ``refresh_sessions:<email>`` set.
+        """
+
+    def __init__(self, client: redis.Redis, ttl: int):
+        self.redis = client
+        self.ttl = ttl
+
+    @staticmethod
+    def session_key(sid: str) -> str:
+        return f"refresh:{sid}"
+
+    @staticmethod
+    def user_key(email: str) -> str:
+        return f"refresh_sessions:{email}"
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    async def issue(self, email: str, sid: str, jti: str) -> None:
+        """
+            Starts a session whose current refresh token is ``jti``.
+
+            :param email: The user's email address.
+            :type email: str
+            :param sid: The session id.
+            :type sid: str
+            :param jti: The refresh token id.
+            :type jti: str
+            """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.session_key(sid), mapping={"email": email, "jti": jti})
+            pipe.expire(self.session_key(sid), self.ttl)
+            pipe.sadd(self.user_key(email), sid)
+            pipe.expire(self.user_key(email), self.ttl)
+            await pipe.execute()
+
+    async def rotate(self, email: str, sid: str, jti: str, new_jti: str) -> str:
+        """
+            Replaces the session's refresh token ``jti`` with ``new_jti``.
+
+            :param email: The email from the presented token.
+            :type email: str
+            :param sid: The session id from the presented token.
+            :type sid: str
+            :param jti: The id of the presented token.
+            :type jti: str
+            :param new_jti: The id of the token that replaces it.
+            :type new_jti: str
+            :return: ROTATED on success, REUSED if the token was already rotated (the session is
+                revoked), UNKNOWN if the session does not exist or expired.
+            :rtype: str
+            """
+        key = self.session_key(sid)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    session = await pipe.hgetall(key)
+                    if not session or session.get(b"email", b"").decode() != email:
+                        await pipe.reset()
+                        return UNKNOWN
+                    pipe.multi()
+                    if session[b"jti"].decode() != jti:
+                        pipe.delete(key)
+                        pipe.srem(self.user_key(email), sid)
+                        await pipe.execute()
+                        return REUSED
+                    pipe.hset(key, "jti", new_jti)
+                    pipe.expire(key, self.ttl)
+                    pipe.expire(self.user_key(email), self.ttl)
+                    await pipe.execute()
+                    return ROTATED
+                except WatchError:
+                    continue
+
+    async def revoke(self, email: str, sid: str) -> None:
+        """
+            Ends one session.
+
+            :param email: The user's email address.
+            :type email: str
+            :param sid: The session id.
+            :type sid: str
+            """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self.session_key(sid))
+            pipe.srem(self.user_key(email), sid)
+            await pipe.execute()
+
+    async def revoke_all(self, email: str) -> int:
+        """
+            Ends every session of the user.
+
+            :param email: The user's email address.
+            :type email: str
+            :return: The number of ended sessions.
+            :rtype: int
+            """
+        sids = await self.redis.smembers(self.user_key(email))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for sid in sids:
+                pipe.delete(self.session_key(sid.decode()))
+            pipe.delete(self.user_key(email))
+            results = await pipe.execute()
+        return sum(results[:-1])
+
+    async def sessions(self, email: str) -> list[str]:
+        """
+            Returns the ids of the user's live sessions.
+
+            :param email: The user's email address.
+            :type email: str
+            :return: Session ids.
+            :rtype: list[str]
+            """
+        sids = [sid.decode() for sid in await self.redis.smembers(self.user_key(email))]
+        if not sids:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for sid in sids:
+                pipe.exists(self.session_key(sid))
+            alive = await pipe.execute()
+        return [sid for sid, exists in zip(sids, alive) if exists]
+
+
+refresh_tokens = RefreshTokenStore(user_cache.redis, ttl=settings.refresh_token_ttl)
@@ -0,0 +1,144 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import redis.asyncio as redis
+from fastapi import FastAPI, Request
+from fastapi_mail import ConnectionConfig, FastMail
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.conf.config import settings
+from src.database.db import engine
+from src.services.avatars import CloudinaryStorage, FileSystemStorage, avatar_service
+from src.services.passwords import PasswordPool, password_pool
+
+
+def mail_config() -> ConnectionConfig:
+    """
+        Builds the SMTP connection settings of the mail transport.
+
+        :return: The fastapi-mail connection config.
+        :rtype: ConnectionConfig
+        """
+    return ConnectionConfig(
+        MAIL_USERNAME=settings.mail_username,
+        MAIL_PASSWORD=settings.mail_password,
+        MAIL_FROM=settings.mail_from,
+        MAIL_PORT=settings.mail_port,
+        MAIL_SERVER=settings.mail_server,
+        MAIL_FROM_NAME=settings.mail_from_name,
+        MAIL_STARTTLS=settings.mail_starttls,
+        MAIL_SSL_TLS=settings.mail_ssl_tls,
+        USE_CREDENTIALS=settings.mail_use_credentials,
+        VALIDATE_CERTS=settings.mail_validate_certs,
+        TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
+    )
+
+
+class Resources:
+    """
+        Clients shared by everything in one worker process: a single bounded Redis connection
+        pool, the database engine, the mail transport, the avatar storage and the password pool.
+
+        Every service is built on these instances, so a worker holds at most
+        ``redis_max_connections`` Redis and ``db_pool_size + db_max_overflow`` database
+        connections. Nothing connects before first use. :func:`lifespan` closes the clients when
+        the application shuts down; they reconnect on next use, so a reloaded or restarted
+        application on a new event loop never inherits connections of the old one.
+
+        The container is built at import because the services (``user_cache``, ``mail_queue``,
+        ``rate_limiter``, ...) are module-level instances bound to its clients, like every other
+        service of the application; they always use this module's ``resources``, so replacing it
+        means patching the services too. Only handlers that need the container itself, such as
+        the health check, resolve it through :func:`get_resources`, which prefers ``app.state``
+        and falls back to the module container when the lifespan has not run.
+        """
+
+    def __init__(self, redis_client: redis.Redis, db_engine: AsyncEngine, mail: FastMail,
+                 storage: CloudinaryStorage | FileSystemStorage, passwords: PasswordPool):
+        self.redis = redis_client
+        self.engine = db_engine
+        self.mail = mail
+        self.storage = storage
+        self.passwords = passwords
+
+    async def check(self, db: AsyncSession) -> dict:
+        """
+            Checks that Redis and the database answer.
+
+            :param db: A database session.
+            :type db: AsyncSession
+            :return: Whether each backend is reachable.
+            :rtype: dict
+            """
+        status = {}
+        try:
+            status["redis"] = bool(await self.redis.ping())
+        except RedisError:
+            status["redis"] = False
+        try:
+            await db.execute(text("SELECT 1"))
+            status["database"] = True
+        except (SQLAlchemyError, OSError):
+            status["database"] = False
+        return status
+
+    def after_fork(self, password_workers: int | None = None) -> None:
+        """
+            Drops connections and executors inherited from the parent process.
+
+            Must run in a freshly forked worker before it serves requests: the Redis pool and the
+            database pool are replaced without closing the parent's sockets, which the parent still
+            owns, and the password pool starts its own executor on first use.
+
+            :param password_workers: Size of this worker's password pool, if it should change.
+            :type password_workers: int | None
+            """
+        self.redis.connection_pool.reset()
+        self.engine.sync_engine.dispose(close=False)
+        self.passwords.after_fork(password_workers)
+
+    async def close(self) -> None:
+        """
+            Closes the Redis and database connection pools and stops the password workers.
+            """
+        await self.redis.close(close_connection_pool=True)
+        await self.engine.dispose()
+        self.passwords.shutdown()
+
+
+resources = Resources(
+    redis.Redis(connection_pool=redis.ConnectionPool(host=settings.redis_host, port=settings.redis_port, db=0,
+                                                     max_connections=settings.redis_max_connections)),
+    engine,
+    FastMail(mail_config()),
+    avatar_service.storage,
+    password_pool,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+        Application lifespan: exposes the resources on ``app.state`` and closes them on shutdown.
+        """
+    app.state.resources = resources
+    try:
+        yield
+    finally:
+        await resources.close()
+
+
+def get_resources(request: Request) -> Resources:
+    """
+        Dependency returning the resources the application published in its lifespan, or the
+        module container if the lifespan has not run.
+
+        :param request: The current request.
+        :type request: Request
+        :return: The shared resources.
+        :rtype: Resources
+        """
+    return getattr(request.app.state, "resources", resources)
@@ -0,0 +1,90 @@
+import asyncio
+
+
+class LocalSMTPServer:
+    """
+        Minimal in-process SMTP server that keeps received messages in memory.
+
+        Stands in for the real mail server in tests and benchmarks. It accepts any credentials
+        (AUTH PLAIN / LOGIN), never uses TLS and can be told to reject the next
+        ``fail_next`` messages with a temporary error.
+        """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages: list[tuple[str, list[str], bytes]] = []
+        self.connections = 0
+        self.fail_next = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> "LocalSMTPServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "LocalSMTPServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        sender, recipients = "", []
+        await reply("220 localhost ESMTP stub")
+        try:
+            while line := await reader.readline():
+                command, _, argument = line.decode().rstrip("\r\n").partition(" ")
+                command = command.upper()
+                if command == "EHLO":
+                    await reply("250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME")
+                elif command == "HELO":
+                    await reply("250 localhost")
+                elif command == "AUTH":
+                    mechanism, _, initial = argument.partition(" ")
+                    prompts = (mechanism.upper() == "LOGIN") + (not initial)
+                    for _ in range(prompts):
+                        await reply("334 ")
+                        await reader.readline()
+                    await reply("235 Authentication successful")
+                elif command == "MAIL":
+                    sender, recipients = argument.partition(":")[2].strip("<> "), []
+                    await reply("250 OK")
+                elif command == "RCPT":
+                    recipients.append(argument.partition(":")[2].strip("<> "))
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while (data_line := await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        data.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                    if self.fail_next:
+                        self.fail_next -= 1
+                        await reply("451 Temporary failure")
+                    else:
+                        self.messages.append((sender, recipients, b"".join(data)))
+                        await reply("250 OK")
+                elif command in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    await reader.read()
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,135 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+from jose import JWTError, jwt
+
+from src.conf.config import settings
+
+
+class JoseBackend:
+    """
+        Verifies tokens with python-jose.
+        """
+    name = "jose"
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict:
+        return jwt.decode(token, key, algorithms=algorithms)
+
+
+class PyJWTBackend:
+    """
+        Verifies tokens with PyJWT, which is noticeably faster for HMAC tokens.
+
+        PyJWT is optional (``poetry install -E fast-jwt``); its errors are re-raised as
+        ``JWTError`` so callers handle both backends the same way.
+        """
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt as pyjwt
+        self.pyjwt = pyjwt
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict:
+        try:
+            return self.pyjwt.decode(token, key, algorithms=algorithms, options={"verify_sub": False})
+        except self.pyjwt.PyJWTError as e:
+            raise JWTError(str(e)) from e
+
+
+BACKENDS = {
+    JoseBackend.name: JoseBackend,
+    PyJWTBackend.name: PyJWTBackend,
+}
+
+
+def get_backend(name: str):
+    """
+        Returns the JWT backend by name.
+
+        :param name: ``jose`` or ``pyjwt``.
+        :type name: str
+        :return: The backend instance.
+        :rtype: JoseBackend | PyJWTBackend
+        """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JWT backend {name!r}, expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+class TokenDecoder:
+    """
+        JWT verification with a bounded LRU of already verified claims.
+
+        Entries are keyed by a hash of the token, so the token itself is not kept in memory,
+        and are dropped once the token's ``exp`` has passed. Only successfully verified tokens
+        are cached; invalid ones are checked again on every call.
+        """
+
+    def __init__(self, secret_key: str, algorithms: list[str], backend: str = "jose", maxsize: int = 4096):
+        self.secret_key = secret_key
+        self.algorithms = algorithms
+        self.backend = get_backend(backend)
+        self.maxsize = maxsize
+        self._claims: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def decode(self, token: str) -> dict:
+        """
+            Verifies the token and returns its claims.
+
+            :param token: The encoded JWT.
+            :type token: str
+            :return: A copy of the verified claims.
+            :rtype: dict
+            :raises JWTError: If the token is invalid or expired.
+            """
+        key = self.key(token)
+        entry = self._claims.get(key)
+        if entry is not None:
+            expires_at, claims = entry
+            if expires_at > time.time():
+                self._claims.move_to_end(key)
+                self.hits += 1
+                return dict(claims)
+            del self._claims[key]
+        self.misses += 1
+        claims = self.backend.decode(token, self.secret_key, self.algorithms)
+        expires_at = claims.get("exp")
+        if self.maxsize > 0 and isinstance(expires_at, (int, float)):
+            self._claims[key] = (expires_at, claims)
+            while len(self._claims) > self.maxsize:
+                self._claims.popitem(last=False)
+        return dict(claims)
+
+    def clear(self) -> None:
+        self._claims.clear()
+
+    def stats(self) -> dict:
+        """
+            Returns hit/miss counters of the claims cache.
+
+            :return: Backend, hits, misses, hit ratio and number of cached tokens.
+            :rtype: dict
+            """
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "size": len(self._claims),
+        }
+
+
+token_decoder = TokenDecoder(
+    settings.secret_key,
+    [settings.algorithm],
+    backend=settings.jwt_backend,
+    maxsize=settings.jwt_claims_cache_size,
+)
@@ -1,6 +1,12 @@
 from unittest.mock import MagicMock
 
+import fakeredis.aioredis
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
 from src.database.models import User
+from src.services.refresh_tokens import refresh_tokens
 
 
 def test_create_user(client, user, monkeypatch):
@@ -49,6 +55,56 @@ def test_login_user(client, session, user):
     assert data["token_type"] == "bearer"
 
 
+def login(client, user):
+    response = client.post(
+        "/api/auth/login",
+        data={"username": user.get('email'), "password": user.get('password')},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["refresh_token"]
+
+
+def refresh(client, token):
+    return client.get("/api/auth/refresh_token", headers={"Authorization": f"Bearer {token}"})
+
+
+def assert_rotation(client, user):
+    first = login(client, user)
+    response = refresh(client, first)
+    assert response.status_code == 200, response.text
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert refresh(client, first).status_code == 401
+    assert refresh(client, second).status_code == 401
+
+
+def test_refresh_token_rotation(client, user):
+    assert_rotation(client, user)
+
+
+@pytest.fixture
+def redis_client(client, monkeypatch):
+    """
+        A client whose requests all run on one event loop, with the refresh token store on fakeredis.
+        """
+    monkeypatch.setattr(refresh_tokens, "redis", fakeredis.aioredis.FakeRedis())
+    with TestClient(app) as loop_client:
+        yield loop_client
+
+
+def test_refresh_token_rotation_redis(redis_client, session, user):
+    assert_rotation(redis_client, user)
+    current_user = session.query(User).filter(User.email == user.get('email')).first()
+    session.refresh(current_user)
+    assert current_user.refresh_token is None
+
+
+def test_refresh_token_sessions_redis(redis_client, user):
+    first, second = login(redis_client, user), login(redis_client, user)
+    assert refresh(redis_client, first).status_code == 200
+    assert refresh(redis_client, second).status_code == 200
+
+
 def test_login_wrong_password(client, user):
     response = client.post(
         "/api/auth/login",
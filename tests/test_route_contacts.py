@@ -0,0 +1,302 @@
+import asyncio
+import datetime
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.database.models import Contact, User
+from src.services.auth import auth_service
+from src.services.cache import response_cache
+
+
+@pytest.fixture(scope="module")
+def token(client, session):
+    current_user = User(username="contacts", email="contacts@example.com", password="afg6546S54", confirmed=True)
+    session.add(current_user)
+    session.commit()
+    names = ["Ivan Petrenko", "Petro Ivanenko", "Olena Kovalenko", "Ivanna Shevchenko"]
+    for name in names:
+        session.add(Contact(name=name, email=f"{name.split()[0].lower()}@example.com", phone_number="+380974682968",
+                            birth_date=datetime.datetime(1990, 1, 1), additional_data="", user_id=current_user.id))
+    today = datetime.date.today()
+    for name, delta in [("Upcoming Birthday", 3), ("Later Birthday", 10), ("Past Birthday", -1)]:
+        birth_date = today + datetime.timedelta(days=delta)
+        if birth_date.month == 2 and birth_date.day == 29:
+            birth_date += datetime.timedelta(days=1)
+        session.add(Contact(name=name, email="birthday@test.com", phone_number="+380974682968",
+                            birth_date=datetime.datetime(1990, birth_date.month, birth_date.day),
+                            additional_data="", user_id=current_user.id))
+    session.commit()
+    return asyncio.run(auth_service.create_access_token(data={"sub": current_user.email}))
+
+
+@pytest.fixture(scope="module")
+def paging_token(client, session):
+    current_user = User(username="paging", email="paging@example.com", password="afg6546S54", confirmed=True)
+    session.add(current_user)
+    session.commit()
+    for i in range(5):
+        session.add(Contact(name=f"Page Contact {i}", email=f"page{i}@example.com", phone_number="+380974682968",
+                            birth_date=datetime.datetime(1990, 1, 1), additional_data="", user_id=current_user.id))
+    session.commit()
+    return asyncio.run(auth_service.create_access_token(data={"sub": current_user.email}))
+
+
+def test_get_contacts_cursor_pages(client, paging_token):
+    headers = {"Authorization": f"Bearer {paging_token}"}
+    names, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client.get("/api/contacts/", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        pages += 1
+        names += [contact["name"] for contact in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert pages == 3
+    assert names == [f"Page Contact {i}" for i in range(5)]
+
+    response = client.get("/api/contacts/", params={"limit": 2, "cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_get_contacts_rate_limited(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    statuses = [client.get("/api/contacts/?limit=2", headers=headers).status_code for _ in range(11)]
+    assert statuses == [200] * 10 + [429]
+
+
+def test_search_contacts(client, token):
+    response = client.get("/api/contacts/query/ivan", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    names = {contact["name"] for contact in response.json()}
+    assert names == {"Ivan Petrenko", "Petro Ivanenko", "Ivanna Shevchenko"}
+
+
+def test_search_contacts_by_email(client, token):
+    response = client.get("/api/contacts/query/OLENA@", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert [contact["name"] for contact in response.json()] == ["Olena Kovalenko"]
+
+
+def test_search_contacts_short_query(client, token):
+    response = client.get("/api/contacts/query/Ol", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert [contact["name"] for contact in response.json()] == ["Olena Kovalenko"]
+
+
+def test_search_contacts_limit(client, token):
+    response = client.get("/api/contacts/query/ivan", params={"limit": 2},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 2
+
+
+def test_birthdays(client, token):
+    response = client.get("/api/contacts/birthdays", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert [contact["name"] for contact in response.json()] == ["Upcoming Birthday"]
+
+
+def test_birthdays_days(client, token):
+    response = client.get("/api/contacts/birthdays", params={"days": 14},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert [contact["name"] for contact in response.json()] == ["Upcoming Birthday", "Later Birthday"]
+
+
+def test_import_contacts_csv(client, token):
+    body = (
+        "name,email,phone_number,birth_date,additional_data\n"
+        "Import One,one@import.com,+380974682968,1990-05-01,\"multi\nline\"\n"
+        "Import Two,two@import.com,+380974682968,not-a-date,\n"
+        "Import Three,three@import.com,+380974682968,1991-06-02\n"
+    )
+    response = client.post("/api/contacts/import", content=body, headers={
+        "Authorization": f"Bearer {token}", "Content-Type": "text/csv"})
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["failed"] == 2
+    assert [error["row"] for error in data["errors"]] == [2, 3]
+    response = client.get("/api/contacts/query/Import One", headers={"Authorization": f"Bearer {token}"})
+    assert response.json()[0]["additional_data"] == "multi\nline"
+
+
+def test_import_contacts_csv_oversized_row(client, token):
+    body = (
+        "name,email,phone_number,birth_date,additional_data\n"
+        f"Huge Row,huge@import.com,+380974682968,1990-05-01,{'x' * 200_000}\n"
+        "After Huge,after@import.com,+380974682968,1990-05-01,\n"
+    )
+    response = client.post("/api/contacts/import", content=body, headers={
+        "Authorization": f"Bearer {token}", "Content-Type": "text/csv"})
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["failed"] == 1
+    assert data["errors"][0]["row"] == 1
+
+
+def test_import_contacts_csv_value_too_long(client, token):
+    body = (
+        "name,email,phone_number,birth_date,additional_data\n"
+        f"{'N' * 51},long@import.com,+380974682968,1990-05-01,\n"
+        f"Long Note,note@import.com,+380974682968,1990-05-01,{'x' * 151}\n"
+        "Fits,fits@import.com,+380974682968,1990-05-01,\n"
+    )
+    response = client.post("/api/contacts/import", content=body, headers={
+        "Authorization": f"Bearer {token}", "Content-Type": "text/csv"})
+    assert response.status_code == 201, response.text
+    data = response.json()
+    assert data["inserted"] == 1
+    assert data["failed"] == 2
+    assert [error["row"] for error in data["errors"]] == [1, 2]
+    assert data["errors"][0]["errors"][0].startswith("name:")
+    assert data["errors"][1]["errors"][0].startswith("additional_data:")
+
+
+def test_import_contacts_ndjson(client, token):
+    body = (
+        '{"name": "Json One", "email": "one@json.com", "phone_number": "1", "birth_date": "1990-05-01", '
+        '"additional_data": ""}\n'
+        '[1, 2]\n'
+        '{"name": "Json Two", "email": "two@json.com", "phone_number": "2", "birth_date": "1990-05-02", '
+        '"additional_data": ""}\n'
+    )
+    response = client.post("/api/contacts/import", content=body, headers={
+        "Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 201, response.text
+    assert response.json() == {"inserted": 2, "failed": 1, "errors": [{"row": 2, "errors": ["expected a JSON object"]}]}
+
+
+def test_import_contacts_unsupported_type(client, token):
+    response = client.post("/api/contacts/import", content="x", headers={
+        "Authorization": f"Bearer {token}", "Content-Type": "text/plain"})
+    assert response.status_code == 415, response.text
+
+
+def test_export_contacts_ndjson(client, token):
+    response = client.get("/api/contacts/export", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows[0]["name"] == "Ivan Petrenko"
+    assert rows[0]["birth_date"] == "1990-01-01"
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+
+def test_export_contacts_csv(client, token):
+    response = client.get("/api/contacts/export", params={"format": "csv"},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    lines = response.text.splitlines()
+    assert lines[0] == "id,name,email,phone_number,birth_date,additional_data"
+    assert "Ivan Petrenko" in lines[1]
+
+
+def test_export_contacts_vcard(client, token):
+    response = client.get("/api/contacts/export", params={"format": "vcf"},
+                          headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    assert response.text.startswith("BEGIN:VCARD\r\nVERSION:3.0\r\n")
+    assert "FN:Ivan Petrenko\r\n" in response.text
+
+
+@pytest.fixture()
+def versioned_cache(monkeypatch):
+    versions = {}
+
+    async def get(key):
+        return versions.get(key)
+
+    async def mget(*keys):
+        return [versions.get(key) for key in keys]
+
+    async def set(key, value, ex=None, nx=False):
+        if nx and key in versions:
+            return None
+        versions[key] = value
+        return True
+
+    fake_redis = AsyncMock()
+    fake_redis.get.side_effect = get
+    fake_redis.mget.side_effect = mget
+    fake_redis.set.side_effect = set
+    monkeypatch.setattr(response_cache, "redis", fake_redis)
+    return versions
+
+
+def test_get_contact_etag(client, token, versioned_cache):
+    headers = {"Authorization": f"Bearer {token}"}
+    contact_id = client.get("/api/contacts/query/Ivan Petrenko", headers=headers).json()[0]["id"]
+    response = client.get(f"/api/contacts/{contact_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["etag"]
+
+    response = client.get(f"/api/contacts/{contact_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    contact = client.get(f"/api/contacts/{contact_id}", headers=headers).json()
+    contact.pop("id")
+    client.put(f"/api/contacts/{contact_id}", json={**contact, "additional_data": "changed"}, headers=headers)
+    response = client.get(f"/api/contacts/{contact_id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["additional_data"] == "changed"
+    assert response.headers["etag"] != etag
+
+
+def test_contacts_batch(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    contacts = client.get("/api/contacts/query/Ivan", headers=headers).json()
+    ids = [contact["id"] for contact in contacts]
+    response = client.get("/api/contacts/batch", params={"ids": ids + [999999]}, headers=headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert sorted(contact["id"] for contact in data["contacts"]) == sorted(ids)
+    assert data["missing"] == [999999]
+
+    updates = [dict(contact, additional_data="synced") for contact in contacts] + [dict(contacts[0], id=999999)]
+    response = client.put("/api/contacts/batch", json=updates, headers=headers)
+    assert response.status_code == 200, response.text
+    statuses = {item["id"]: item["status"] for item in response.json()["results"]}
+    assert statuses == {**dict.fromkeys(ids, "updated"), 999999: "not_found"}
+    data = client.get("/api/contacts/batch", params={"ids": ids}, headers=headers).json()
+    assert {contact["additional_data"] for contact in data["contacts"]} == {"synced"}
+
+    response = client.delete("/api/contacts/batch", params={"ids": ids[:1] + [999999]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["results"] == [{"id": ids[0], "status": "deleted"}, {"id": 999999, "status": "not_found"}]
+    assert client.get(f"/api/contacts/{ids[0]}", headers=headers).status_code == 404
+
+
+def test_contacts_batch_limits(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/contacts/batch", headers=headers).json() == {"contacts": [], "missing": []}
+    assert client.put("/api/contacts/batch", json=[], headers=headers).status_code == 422
+    assert client.delete("/api/contacts/batch", params={"ids": list(range(501))}, headers=headers).status_code == 422
+
+
+def test_patch_contact(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    contact = client.get("/api/contacts/query/Petro", headers=headers).json()[0]
+    response = client.patch(f"/api/contacts/{contact['id']}", json={"phone_number": "+380000000000"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == dict(contact, phone_number="+380000000000")
+    assert client.patch("/api/contacts/999999", json={"name": "x"}, headers=headers).status_code == 404
+
+
+def test_update_contact_birthday(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    contact = client.get("/api/contacts/query/Petro", headers=headers).json()[0]
+    today = datetime.date.today()
+    birth_date = datetime.date(1990, today.month, today.day if (today.month, today.day) != (2, 29) else 28)
+    response = client.put(f"/api/contacts/{contact['id']}", json=dict(contact, birth_date=birth_date.isoformat()),
+                          headers=headers)
+    assert response.status_code == 200, response.text
+    birthdays = client.get("/api/contacts/birthdays", params={"days": 0}, headers=headers).json()
+    assert contact["id"] in [item["id"] for item in birthdays]
@@ -0,0 +1,75 @@
+import pytest
+
+from src.conf.config import settings
+from src.database.db import PoolWaitStats
+
+HEADERS = {"X-Internal-Token": "internal-secret"}
+
+
+@pytest.fixture(autouse=True)
+def internal_token(monkeypatch):
+    monkeypatch.setattr(settings, "internal_api_token", "internal-secret")
+
+
+def test_internal_requires_token(client, monkeypatch):
+    assert client.get("/api/internal/cache").status_code == 401
+    assert client.get("/api/internal/cache", headers={"X-Internal-Token": "wrong"}).status_code == 401
+    monkeypatch.setattr(settings, "internal_api_token", "")
+    assert client.get("/api/internal/cache", headers=HEADERS).status_code == 404
+
+
+def test_pool_status(client):
+    response = client.get("/api/internal/db/pool", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert {"size", "checked_in", "checked_out", "overflow", "wait"} <= data.keys()
+    assert data["wait"]["buckets"]["+Inf"] == data["wait"]["count"]
+
+
+def test_pool_wait_stats():
+    stats = PoolWaitStats()
+    for seconds in (0.0005, 0.02, 0.02, 12):
+        stats.observe(seconds)
+    snapshot = stats.snapshot()
+    assert snapshot["buckets"]["0.001"] == 1
+    assert snapshot["buckets"]["0.05"] == 3
+    assert snapshot["buckets"]["30.0"] == 4
+    assert snapshot["count"] == 4
+    assert snapshot["max"] == 12
+
+
+def test_metrics(client):
+    client.get("/api/internal/db/pool", headers=HEADERS)
+    response = client.get("/metrics", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/api/internal/db/pool",status="200"}' in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/internal/db/pool",le="+Inf"}' in text
+    assert 'db_pool_connections{state="checked_out"}' in text
+    assert 'cache_events_total{cache="users",outcome="misses"}' in text
+    assert "# TYPE cache_events_total counter" in text
+    assert 'password_pool_jobs_total{outcome="completed"}' in text
+    assert "# TYPE password_pool_pending gauge" in text
+    assert "asyncio_tasks" in text
+    assert 'db_queries_per_request_count{method="GET",route="/api/internal/db/pool"}' in text
+    assert 'route="/metrics"' not in text
+
+
+def test_metrics_requires_token(client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-Internal-Token": "wrong"}).status_code == 401
+
+
+def test_health(client):
+    with client:
+        response = client.get("/api/internal/health", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"redis": False, "database": True}
+
+
+def test_health_without_lifespan(client, monkeypatch):
+    monkeypatch.delattr(client.app.state, "resources", raising=False)
+    response = client.get("/api/internal/health", headers=HEADERS)
+    assert response.status_code == 200, response.text
+    assert response.json() == {"redis": False, "database": True}
@@ -0,0 +1,30 @@
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+
+from src.database.models import User
+from src.services.auth import auth_service
+from src.services.avatars import AvatarService, FileSystemStorage
+
+
+@pytest.fixture(scope="module")
+def token(client, session):
+    current_user = User(username="avatar", email="avatar@example.com", password="afg6546S54", confirmed=True)
+    session.add(current_user)
+    session.commit()
+    return asyncio.run(auth_service.create_access_token(data={"sub": current_user.email}))
+
+
+def test_update_avatar(client, token, tmp_path, monkeypatch):
+    storage = FileSystemStorage(tmp_path, "/static/avatars")
+    monkeypatch.setattr("src.routes.users.avatar_service", AvatarService(storage, 250))
+    image = io.BytesIO()
+    Image.new("RGB", (1000, 800), "blue").save(image, format="JPEG")
+    response = client.patch("/api/users/avatar", headers={"Authorization": f"Bearer {token}"},
+                            files={"file": ("photo.jpg", image.getvalue(), "image/jpeg")})
+    assert response.status_code == 200, response.text
+    assert response.json()["avatar"].startswith("/static/avatars/NotesApp/avatar.jpg?v=")
+    with Image.open(storage.path("NotesApp/avatar")) as avatar:
+        assert avatar.size == (250, 250)
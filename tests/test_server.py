@@ -0,0 +1,83 @@
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from src.server import bind, cpu_count
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="the pre-fork server needs os.fork")
+
+
+def start_server(log: Path, *args: str) -> tuple[subprocess.Popen, str]:
+    with log.open("w") as output:
+        process = subprocess.Popen([sys.executable, "-m", "src.server", "--host", "127.0.0.1", "--port", "0", *args],
+                                   stdout=output, stderr=output)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        match = re.search(r"Listening on 127\.0\.0\.1:(\d+)", log.read_text())
+        if match:
+            return process, f"http://127.0.0.1:{match.group(1)}"
+        time.sleep(0.1)
+    process.kill()
+    raise AssertionError("server did not start")
+
+
+def get(url: str, timeout: float = 15) -> httpx.Response:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return httpx.get(url, timeout=5)
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def worker_pids(pid: int) -> set[int]:
+    result = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True)
+    return {int(line) for line in result.stdout.split()}
+
+
+def test_cpu_count():
+    assert cpu_count() >= 1
+
+
+def test_bind_free_port():
+    sock = bind("127.0.0.1", 0, 16)
+    try:
+        assert sock.getsockname()[1] > 0
+        assert sock.get_inheritable()
+    finally:
+        sock.close()
+
+
+def test_serve_restart_and_stop(tmp_path):
+    process, url = start_server(tmp_path / "server.log", "--workers", "2", "--graceful-timeout", "5")
+    try:
+        assert get(url + "/").json() == {"message": "Hello World"}
+        deadline = time.monotonic() + 10
+        while len(workers := worker_pids(process.pid)) < 2 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert len(workers) == 2
+
+        process.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 15
+        while (worker_pids(process.pid) & workers or len(worker_pids(process.pid)) < 2) \
+                and time.monotonic() < deadline:
+            time.sleep(0.1)
+        restarted = worker_pids(process.pid)
+        assert len(restarted) == 2 and not restarted & workers
+        assert get(url + "/").status_code == 200
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=20) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
@@ -0,0 +1,68 @@
+import logging
+import unittest
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database.db import QueryProfile, QueryProfiler, parameters_shape
+
+
+class TestQueryProfiler(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.profiler = QueryProfiler(slow_threshold=10)
+        self.profiler.attach(self.engine.sync_engine)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_profile_counts_statements_of_block(self):
+        async with self.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with self.profiler.profile() as profile:
+                await conn.execute(text("SELECT :x"), {"x": 1})
+                await conn.execute(text("SELECT :x"), {"x": 1})
+                await conn.execute(text("SELECT :x"), {"x": 2})
+            await conn.execute(text("SELECT 2"))
+        self.assertEqual(profile.count, 3)
+        self.assertGreater(profile.duration, 0)
+        self.assertEqual(profile.slowest.strip(), "SELECT ?")
+        self.assertEqual(profile.repeated(), {"SELECT ?": 2})
+
+    async def test_slow_statement_is_logged_with_shape(self):
+        self.profiler.slow_threshold = 0
+        async with self.engine.connect() as conn:
+            with self.assertLogs("src.database.db", logging.WARNING) as logs:
+                await conn.execute(text("SELECT :email"), {"email": "secret@example.com"})
+        self.assertEqual(self.profiler.slow_queries, 1)
+        self.assertIn("SELECT ?", logs.output[0])
+        self.assertIn("(str)", logs.output[0])
+        self.assertNotIn("secret@example.com", logs.output[0])
+
+    async def test_failed_statement_clears_start_time(self):
+        async with self.engine.connect() as conn:
+            with self.assertRaises(DBAPIError):
+                await conn.execute(text("SELECT * FROM missing"))
+            self.assertEqual(conn.sync_connection.info["query_start"], [])
+            with self.profiler.profile() as profile:
+                await conn.execute(text("SELECT 1"))
+            self.assertEqual(conn.sync_connection.info["query_start"], [])
+        self.assertEqual(profile.count, 1)
+
+
+class TestQueryProfile(unittest.TestCase):
+
+    def test_executemany_is_not_repeated(self):
+        profile = QueryProfile()
+        profile.record("INSERT", [(1,), (1,)], 0.1, executemany=True)
+        profile.record("INSERT", [(1,), (1,)], 0.3, executemany=True)
+        self.assertEqual(profile.count, 2)
+        self.assertEqual(profile.slowest_duration, 0.3)
+        self.assertEqual(profile.repeated(), {})
+
+    def test_parameters_shape(self):
+        self.assertEqual(parameters_shape({"id": 1, "name": "a"}), "{id: int, name: str}")
+        self.assertEqual(parameters_shape((1, None)), "(int, NoneType)")
+        self.assertEqual(parameters_shape([(1, "a"), (2, "b")], executemany=True), "2 x (int, str)")
@@ -2,14 +2,18 @@ import datetime
 import unittest
 from unittest.mock import MagicMock
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import Contact, User
-from src.schemas import ContactModel,ResponseContact
+from src.schemas import ContactModel,ContactPatch,ContactUpdate,ResponseContact
 from src.repository.contacts import (
     get_contacts,
     get_contact,
+    get_contacts_by_ids,
+    update_contacts,
+    remove_contacts,
     update_contact,
+    patch_contact,
     create_contact,
     remove_contact,
     search_contacts,
@@ -20,30 +24,40 @@ from src.repository.contacts import (
 class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
         self.user = User(id=1)
 
     async def test_get_contacts(self):
         contacts = [Contact(), Contact(), Contact()]
-        self.session.query().filter().offset().limit().all.return_value = contacts
+        self.result.scalars().all.return_value = contacts
         result = await get_contacts(skip=0, limit=10, user=self.user, db=self.session)
         self.assertEqual(result, contacts)
 
+    async def test_get_contacts_after_cursor(self):
+        contacts = [Contact(id=11), Contact(id=12)]
+        self.result.scalars().all.return_value = contacts
+        result = await get_contacts(skip=0, limit=2, user=self.user, db=self.session, after_id=10)
+        self.assertEqual(result, contacts)
+        sql = str(self.session.execute.call_args.args[0])
+        self.assertIn("contacts.id >", sql)
+        self.assertNotIn("OFFSET", sql)
+
     async def test_get_contact(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalars().first.return_value = contact
         result = await get_contact(contact_id=1,user=self.user, db=self.session)
         self.assertEqual(result, contact)
 
     async def test_get_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalars().first.return_value = None
         result = await get_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
 
     async def test_create_contact(self):
         body = ContactModel(name="test", additional_data="test contact",phone_number="+380974682968",birth_date = datetime.datetime(2023, 11, 17),email= "andriy.dykanan@gmail.com"  )
 
-        self.session.query().filter().all.return_value = body
         result = await create_contact(body=body, user=self.user, db=self.session)
         self.assertEqual(result.name, body.name)
         self.assertEqual(result.additional_data, body.additional_data)
@@ -53,18 +67,36 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
 
     async def test_remove_contact_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.result.scalars().first.return_value = contact
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertEqual(result, contact)
 
     async def test_remove_note_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.result.scalars().first.return_value = None
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
 
+    async def test_get_birthdays(self):
+        contacts = [Contact()]
+        self.result.scalars().all.return_value = contacts
+        result = await get_birthdays(user=self.user, db=self.session, days=7, today=datetime.date(2023, 11, 17))
+        self.assertEqual(result, contacts)
+        sql = str(self.session.execute.call_args.args[0])
+        self.assertIn("contacts.birth_mmdd BETWEEN", sql)
+
+    async def test_get_birthdays_year_wrap(self):
+        self.result.scalars().all.return_value = []
+        await get_birthdays(user=self.user, db=self.session, days=7, today=datetime.date(2023, 12, 28))
+        stmt = self.session.execute.call_args.args[0]
+        params = stmt.compile().params
+        self.assertIn("contacts.birth_mmdd >=", str(stmt))
+        self.assertIn("contacts.birth_mmdd <=", str(stmt))
+        self.assertIn(1228, params.values())
+        self.assertIn(104, params.values())
+
     async def test_update_contact_found(self):
         body = ContactModel(name="test", additional_data="test contact",phone_number="+380974682968",birth_date = datetime.datetime(2023, 11, 17),email= "andriy.dykanan@gmail.com"  )
-        self.session.query().filter().first.return_value = body
+        self.result.scalars().first.return_value = body
         self.session.commit.return_value = None
         result = await update_contact(contact_id=1, body=body, user=self.user, db=self.session)
         self.assertEqual(result, body)
@@ -72,11 +104,67 @@ class TestContacts(unittest.IsolatedAsyncioTestCase):
     async def test_update_contact_not_found(self):
         body = ContactModel(name="test", additional_data="test contact", phone_number="+380974682968",
                             birth_date=datetime.datetime(2023, 11, 17), email="andriy.dykanan@gmail.com")
-        self.session.query().filter().first.return_value = None
+        self.result.scalars().first.return_value = None
         self.session.commit.return_value = None
         result = await update_contact(contact_id=1, body=body, user=self.user, db=self.session)
         self.assertIsNone(result)
 
+    async def test_patch_contact(self):
+        contact = Contact(id=1)
+        self.result.scalars().first.return_value = contact
+        body = ContactPatch(name="new", birth_date=datetime.date(1990, 2, 3))
+        result = await patch_contact(contact_id=1, body=body, user=self.user, db=self.session)
+        self.assertEqual(result, contact)
+        self.assertEqual(self.session.execute.call_count, 1)
+        stmt = self.session.execute.call_args.args[0]
+        sql = str(stmt)
+        self.assertIn("RETURNING", sql)
+        self.assertNotIn("email", sql.split("RETURNING")[0])
+        self.assertIn(203, stmt.compile().params.values())
+
+    async def test_patch_contact_empty(self):
+        contact = Contact(id=1)
+        self.result.scalars().first.return_value = contact
+        result = await patch_contact(contact_id=1, body=ContactPatch(), user=self.user, db=self.session)
+        self.assertEqual(result, contact)
+        self.assertNotIn("UPDATE", str(self.session.execute.call_args.args[0]))
+
+    async def test_update_contact_without_returning(self):
+        self.session.get_bind.return_value.dialect.update_returning = False
+        self.result.rowcount = 0
+        body = ContactModel(name="test", additional_data="test contact", phone_number="+380974682968",
+                            birth_date=datetime.datetime(2023, 11, 17), email="andriy.dykanan@gmail.com")
+        result = await update_contact(contact_id=1, body=body, user=self.user, db=self.session)
+        self.assertIsNone(result)
+        self.assertEqual(self.session.execute.call_count, 1)
+
+    async def test_get_contacts_by_ids(self):
+        contacts = [Contact(id=1), Contact(id=3)]
+        self.result.scalars().all.return_value = contacts
+        result = await get_contacts_by_ids([1, 2, 3], user=self.user, db=self.session)
+        self.assertEqual(result, contacts)
+        self.assertEqual(self.session.execute.call_count, 1)
+        self.assertIn("contacts.id IN", str(self.session.execute.call_args.args[0]))
+
+    async def test_update_contacts(self):
+        bodies = [ContactUpdate(id=contact_id, name="test", additional_data="", phone_number="+380974682968",
+                                birth_date=datetime.date(1990, 11, 17), email="test@example.com")
+                  for contact_id in (1, 2)]
+        self.result.scalars().all.return_value = [2]
+        result = await update_contacts(bodies, user=self.user, db=self.session)
+        self.assertEqual(result, {2})
+        params = self.session.execute.call_args.args[1]
+        self.assertEqual([row["contact_id"] for row in params], [2])
+        self.assertEqual(params[0]["birth_mmdd"], 1117)
+        self.session.commit.assert_awaited_once()
+
+    async def test_remove_contacts(self):
+        self.result.scalars().all.return_value = [1]
+        result = await remove_contacts([1, 2], user=self.user, db=self.session)
+        self.assertEqual(result, {1})
+        self.assertEqual(self.session.execute.call_count, 1)
+        self.assertIn("RETURNING", str(self.session.execute.call_args.args[0]))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
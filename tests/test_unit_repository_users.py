@@ -2,7 +2,7 @@ import datetime
 import unittest
 from unittest.mock import MagicMock
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
 from src.schemas import UserModel,UserResponse
@@ -19,7 +19,9 @@ class TestNotes(unittest.IsolatedAsyncioTestCase):
 
 
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = MagicMock(spec=AsyncSession)
+        self.result = MagicMock()
+        self.session.execute.return_value = self.result
         self.user = User(id=1)
         self.body = UserModel(
             username="testss",
@@ -28,7 +30,7 @@ class TestNotes(unittest.IsolatedAsyncioTestCase):
         )
 
     async def test_get_user_by_email(self):
-        self.session.query().filter().first.return_value = self.user
+        self.result.scalars().first.return_value = self.user
         result = await get_user_by_email(email=self.user.email, db=self.session)
         self.assertEqual(result, self.user)
 
@@ -39,19 +41,19 @@ class TestNotes(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result.password, self.body.password)
 
     async def test_update_token(self):
-        self.session.query().filter().first.return_value = self.user
+        self.result.scalars().first.return_value = self.user
         token = "token"
         await update_token(user=self.user, token=token, db=self.session)
         self.assertTrue(self.user.refresh_token)
         self.assertEqual(self.user.refresh_token, token)
 
     async def test_confirmed_email(self):
-        self.session.query().filter().first.return_value = self.user
+        self.result.scalars().first.return_value = self.user
         await confirmed_email(email=self.user.email, db=self.session)
         self.assertTrue(self.user.confirmed)
 
     async def test_update_avatar(self):
-        self.session.query().filter().first.return_value = self.user
+        self.result.scalars().first.return_value = self.user
         url = "http://newavatar.jpeg"
         result = await update_avatar(email=self.user.email, url=url, db=self.session)
         self.assertEqual(result.avatar, url)
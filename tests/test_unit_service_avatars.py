@@ -0,0 +1,70 @@
+import io
+import tempfile
+import unittest
+
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from src.services.avatars import AvatarService, FileSystemStorage, InvalidAvatarId, resize_avatar
+
+
+def make_image(width, height, format="JPEG"):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(output, format=format)
+    return output.getvalue()
+
+
+class TestResizeAvatar(unittest.TestCase):
+
+    def test_resize_jpeg(self):
+        with Image.open(io.BytesIO(resize_avatar(make_image(4000, 3000), 250))) as avatar:
+            self.assertEqual(avatar.size, (250, 250))
+            self.assertEqual(avatar.format, "JPEG")
+
+    def test_resize_png(self):
+        with Image.open(io.BytesIO(resize_avatar(make_image(100, 300, "PNG"), 250))) as avatar:
+            self.assertEqual(avatar.size, (250, 250))
+
+    def test_invalid_image(self):
+        with self.assertRaises(ValueError):
+            resize_avatar(b"not an image", 250)
+
+
+class TestAvatarService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.storage = FileSystemStorage(self.root.name, "/static/avatars/")
+        self.service = AvatarService(self.storage, 250)
+
+    def tearDown(self):
+        self.root.cleanup()
+
+    async def test_update(self):
+        url = await self.service.update(UploadFile(io.BytesIO(make_image(1200, 900))), "NotesApp/user")
+        self.assertTrue(url.startswith("/static/avatars/NotesApp/user.jpg?v="))
+        with Image.open(self.storage.path("NotesApp/user")) as avatar:
+            self.assertEqual(avatar.size, (250, 250))
+
+    async def test_update_replaces_version(self):
+        first = await self.service.update(UploadFile(io.BytesIO(make_image(300, 300))), "NotesApp/user")
+        second = await self.service.update(UploadFile(io.BytesIO(make_image(300, 300))), "NotesApp/user")
+        self.assertNotEqual(first, second)
+
+    async def test_path_traversal(self):
+        for public_id in ("NotesApp/../../../x", "/etc/x", "NotesApp/../../x"):
+            with self.assertRaises(InvalidAvatarId):
+                self.storage.path(public_id)
+            with self.assertRaises(HTTPException) as e:
+                await self.service.update(UploadFile(io.BytesIO(make_image(300, 300))), public_id)
+            self.assertEqual(e.exception.status_code, 400)
+        self.assertEqual(self.storage.path("NotesApp/..x"), self.storage.root.resolve() / "NotesApp" / "..x.jpg")
+
+    async def test_invalid_upload(self):
+        with self.assertRaises(HTTPException) as e:
+            await self.service.update(UploadFile(io.BytesIO(b"not an image")), "NotesApp/user")
+        self.assertEqual(e.exception.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import json
+import pickle
+import unittest
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from redis.exceptions import ConnectionError
+
+from src.database.models import User
+from src.services.cache import UserCache, ResponseCache
+
+
+class TestUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = AsyncMock()
+        self.redis.get.return_value = None
+        self.cache = UserCache(self.redis, ttl=900, local_ttl=30, maxsize=2)
+        self.user = User(id=1, email="testss@gmail.com", username="testss", password="hash", refresh_token="token",
+                         avatar="", confirmed=True, created_at=datetime(2023, 11, 20, 12, 30))
+
+    async def test_miss(self):
+        result = await self.cache.get(self.user.email)
+        self.assertIsNone(result)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    async def test_local_hit(self):
+        await self.cache.set(self.user)
+        result = await self.cache.get(self.user.email)
+        self.assertEqual(result.id, self.user.id)
+        self.assertIsNot(result, self.user)
+        self.assertEqual(self.cache.stats()["local_hits"], 1)
+        self.redis.get.assert_not_called()
+
+    async def test_redis_hit(self):
+        await self.cache.set(self.user)
+        data = self.redis.set.call_args.args[1]
+        self.cache._local.clear()
+        self.redis.get.return_value = data
+        result = await self.cache.get(self.user.email)
+        self.assertEqual(result.email, self.user.email)
+        self.assertEqual(result.created_at, self.user.created_at)
+        self.assertTrue(result.confirmed)
+        self.assertEqual(self.cache.stats()["redis_hits"], 1)
+
+    async def test_secrets_not_cached(self):
+        await self.cache.set(self.user)
+        data = json.loads(self.redis.set.call_args.args[1])
+        self.assertEqual(set(data), set(UserCache.FIELDS))
+        self.assertIsNone((await self.cache.get(self.user.email)).password)
+
+    async def test_foreign_redis_data_is_a_miss(self):
+        for data in (pickle.dumps(self.user), b"not json", b'{"id": 1}'):
+            self.redis.get.return_value = data
+            self.assertIsNone(await self.cache.get(self.user.email))
+        self.assertEqual(self.cache.stats()["misses"], 3)
+
+    async def test_invalidate(self):
+        await self.cache.set(self.user)
+        await self.cache.invalidate(self.user.email)
+        result = await self.cache.get(self.user.email)
+        self.assertIsNone(result)
+        self.redis.delete.assert_awaited_once_with("user:testss@gmail.com")
+
+    async def test_lru_eviction(self):
+        for i in range(3):
+            await self.cache.set(User(id=i, email=f"user{i}@gmail.com"))
+        self.assertNotIn("user0@gmail.com", self.cache._local)
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+    async def test_redis_unavailable(self):
+        self.redis.mget.side_effect = ConnectionError()
+        self.redis.set.side_effect = ConnectionError()
+        await self.cache.set(self.user)
+        self.cache._local.clear()
+        result = await self.cache.get(self.user.email)
+        self.assertIsNone(result)
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = AsyncMock()
+        self.redis.get.return_value = None
+        self.redis.mget.return_value = [None, None]
+        self.cache = ResponseCache(self.redis, ttl=300, routes=["get_contacts"])
+
+    async def test_get_version(self):
+        self.redis.mget.return_value = [b"3", None]
+        self.assertEqual(await self.cache.get_version(1), "3")
+        self.redis.mget.assert_awaited_once_with("contacts_version:1", "contacts_dirty:1")
+
+    async def test_dirty_version(self):
+        self.redis.mget.return_value = [b"3", b"1"]
+        self.assertIsNone(await self.cache.get_version(1))
+
+    async def test_missing_version_is_new(self):
+        self.redis.set.return_value = True
+        version = await self.cache.get_version(1)
+        self.assertRegex(version, r"^[0-9a-f]{16}$")
+        self.redis.set.assert_awaited_once_with("contacts_version:1", version, ex=86400, nx=True)
+        self.assertNotEqual(version, await self.cache.get_version(1))
+
+    async def test_key_uses_version(self):
+        key = self.cache.make_key("get_contacts", 1, 3, {"skip": 0, "limit": 10, "cursor": None})
+        self.assertEqual(key, "response:1:3:get_contacts:limit=10&skip=0")
+
+    async def test_disabled_route(self):
+        key = self.cache.make_key("get_contact", 1, 3, {"contact_id": 1})
+        self.assertIsNone(key)
+        self.assertIsNone(await self.cache.get("get_contact", key))
+        self.redis.get.assert_not_called()
+
+    async def test_set_and_get(self):
+        await self.cache.set("key", b'[{"id": 1}]', {"X-Next-Cursor": "MQ"})
+        self.redis.get.return_value = self.redis.set.call_args.args[1]
+        result = await self.cache.get("get_contacts", "key")
+        self.assertEqual(result, (b'[{"id": 1}]', {"X-Next-Cursor": "MQ"}))
+        self.assertEqual(self.cache.stats()["get_contacts"]["hits"], 1)
+
+    async def test_miss(self):
+        result = await self.cache.get("get_contacts", "key")
+        self.assertIsNone(result)
+        self.assertEqual(self.cache.stats()["get_contacts"]["misses"], 1)
+
+    async def test_bump(self):
+        await self.cache.bump(1)
+        key, version = self.redis.set.call_args.args
+        self.assertEqual(key, "contacts_version:1")
+        self.assertEqual(self.redis.set.call_args.kwargs, {"ex": 86400})
+
+    async def test_failed_bump_disables_versions_until_replayed(self):
+        self.redis.set.side_effect = ConnectionError()
+        await self.cache.bump(1)
+        self.redis.mget.return_value = [b"3", None]
+        self.assertIsNone(await self.cache.get_version(2))
+        self.redis.set.side_effect = None
+        self.assertEqual(await self.cache.get_version(2), "3")
+        self.assertEqual(self.redis.set.call_args.args[0], "contacts_version:1")
+        self.redis.delete.assert_awaited_once_with("contacts_dirty:1")
+        self.assertEqual(self.cache.unbumped, set())
+
+    async def test_failed_bump_marks_version_dirty(self):
+        self.redis.set.side_effect = [ConnectionError(), True]
+        await self.cache.bump(1)
+        self.redis.set.assert_awaited_with("contacts_dirty:1", 1, ex=300)
+        self.assertEqual(self.cache.unbumped, {1})
+
+    async def test_etag(self):
+        etag = self.cache.make_etag("get_contact", 1, "3", {"contact_id": 1})
+        self.assertRegex(etag, r'^"[0-9a-f]{24}"$')
+        self.assertEqual(etag, self.cache.make_etag("get_contact", 1, "3", {"contact_id": 1}))
+        self.assertNotEqual(etag, self.cache.make_etag("get_contact", 1, "4", {"contact_id": 1}))
+        self.assertIsNone(self.cache.make_etag("get_contact", 1, None, {"contact_id": 1}))
+
+    async def test_redis_unavailable(self):
+        self.redis.mget.side_effect = ConnectionError()
+        version = await self.cache.get_version(1)
+        self.assertIsNone(version)
+        self.assertIsNone(self.cache.make_key("get_contacts", 1, version, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import csv
+import time
+import unittest
+
+from src.services.contacts_io import CsvRecords, LineSplitter, RowError, iter_csv_rows, iter_ndjson_rows
+
+HEADER = "name,email,phone_number,birth_date,additional_data\n"
+
+
+async def chunked(body: str, size: int = 4096):
+    data = body.encode()
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def parse(body: str) -> list:
+    return [item async for item in iter_csv_rows(chunked(body))]
+
+
+class TestIterCsvRows(unittest.IsolatedAsyncioTestCase):
+
+    async def test_multiline_field(self):
+        rows = await parse(HEADER + 'One,one@example.com,1,1990-05-01,"multi\nline"\nTwo,two@example.com,2,,\n')
+        self.assertEqual([row for row, _ in rows], [1, 2])
+        self.assertEqual(rows[0][1]["additional_data"], "multi\nline")
+        self.assertEqual(rows[1][1]["name"], "Two")
+
+    async def test_stray_quote_costs_one_row(self):
+        lines = ['Bob 5" tall,bob@example.com,1,1990-05-01,\n']
+        lines += [f"Contact {i},c{i}@example.com,{i},1990-05-01,\n" for i in range(20000)]
+        started = time.perf_counter()
+        rows = await parse(HEADER + "".join(lines))
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(rows), 20001)
+        self.assertIsInstance(rows[0][1], RowError)
+        self.assertTrue(all(isinstance(data, dict) for _, data in rows[1:]))
+        self.assertEqual(rows[-1], (20001, {"name": "Contact 19999", "email": "c19999@example.com",
+                                            "phone_number": "19999", "birth_date": "1990-05-01",
+                                            "additional_data": ""}))
+        self.assertLess(elapsed, 5)
+
+    async def test_unterminated_at_end(self):
+        rows = await parse(HEADER + 'One,one@example.com,1,,"open\nTwo,two@example.com,2,,\n')
+        self.assertIsInstance(rows[0][1], RowError)
+        self.assertEqual(rows[1], (2, {"name": "Two", "email": "two@example.com", "phone_number": "2",
+                                       "birth_date": "", "additional_data": ""}))
+
+    async def test_csv_error_is_a_row_error(self):
+        limit = csv.field_size_limit(100)
+        try:
+            rows = await parse(HEADER + f"One,one@example.com,1,,{'x' * 200}\nTwo,two@example.com,2,,\n")
+        finally:
+            csv.field_size_limit(limit)
+        self.assertIsInstance(rows[0][1], RowError)
+        self.assertEqual(rows[1][1]["name"], "Two")
+
+    async def test_long_line_is_a_row_error(self):
+        rows = await parse(HEADER + f"One,one@example.com,1,,{'x' * 100_000}\nTwo,two@example.com,2,,\n")
+        self.assertEqual(len(rows), 2)
+        self.assertIsInstance(rows[0][1], RowError)
+        self.assertEqual(rows[1], (2, {"name": "Two", "email": "two@example.com", "phone_number": "2",
+                                       "birth_date": "", "additional_data": ""}))
+
+    async def test_ndjson_long_line_is_a_row_error(self):
+        body = '{"name": "%s"}\n{"name": "Two"}' % ("x" * 100_000)
+        rows = [item async for item in iter_ndjson_rows(chunked(body))]
+        self.assertIsInstance(rows[0][1], RowError)
+        self.assertEqual(rows[1], (2, {"name": "Two"}))
+
+
+class TestLineSplitter(unittest.TestCase):
+
+    def test_lines_split_across_chunks(self):
+        lines = LineSplitter()
+        out = list(lines.feed("a,1\r\nb,")) + list(lines.feed("2\nc")) + list(lines.feed(",3")) + list(lines.close())
+        self.assertEqual(out, ["a,1", "b,2", "c,3"])
+
+    def test_long_line_dropped_to_next_newline(self):
+        lines = LineSplitter(max_length=10)
+        out = []
+        for text in ["a,1\n" + "x" * 8, "x" * 8, "x" * 8, "\nb,2\n", "c" * 11 + "\nd,4"]:
+            out += list(lines.feed(text))
+        out += list(lines.close())
+        self.assertIsInstance(out[1], RowError)
+        self.assertIsInstance(out[3], RowError)
+        self.assertEqual(out[:1] + out[2:3] + out[4:], ["a,1", "b,2", "d,4"])
+        self.assertEqual(len(out), 5)
+        self.assertEqual(lines.pending, [])
+
+
+class TestCsvRecords(unittest.TestCase):
+
+    def test_unquoted_record_size_is_capped(self):
+        records = CsvRecords(max_size=20)
+        out = list(records.feed("a," + "x" * 30)) + list(records.feed("b,1"))
+        self.assertIsInstance(out[0], RowError)
+        self.assertEqual(out[1:], ["b,1"])
+
+    def test_record_size_is_capped(self):
+        records = CsvRecords(max_size=20)
+        out = []
+        for line in ['a,"open', "b,1", "c,2", "d,3", "e,4", "f,5"]:
+            out += list(records.feed(line))
+        out += list(records.close())
+        self.assertIsInstance(out[0], RowError)
+        self.assertEqual(out[1:], ["b,1", "c,2", "d,3", "e,4", "f,5"])
+        self.assertEqual(records.pending, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import unittest
+
+import fakeredis.aioredis
+
+from src.services.email import TemplateRenderer, render_template
+from src.services.mail_queue import MailQueue, QUEUE_KEY, RETRY_KEY, DEAD_KEY
+from src.services.mail_worker import MailWorker, SMTPPool
+from src.services.resources import resources
+from src.services.smtp_stub import LocalSMTPServer
+
+
+class TestMailDelivery(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis = fakeredis.aioredis.FakeRedis()
+        self.queue = MailQueue(self.redis, max_attempts=2, retry_backoff=0)
+        self.smtp = await LocalSMTPServer().start()
+        self.pool = SMTPPool(2, hostname=self.smtp.host, port=self.smtp.port, use_tls=False, start_tls=False,
+                             username="user", password="password")
+        self.worker = MailWorker(self.queue, self.pool, "test", batch_size=10, poll_timeout=0.01)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        await self.smtp.stop()
+
+    async def enqueue(self, count):
+        for i in range(count):
+            await self.queue.enqueue("Confirm your email ", [f"user{i}@example.com"], "email_template.html",
+                                     {"host": "http://test/", "username": f"user{i}", "token": "token"})
+
+    async def test_batch_over_pooled_connections(self):
+        await self.enqueue(5)
+        self.assertEqual(await self.worker.run_once(), 5)
+        await self.enqueue(5)
+        self.assertEqual(await self.worker.run_once(), 5)
+        self.assertEqual(len(self.smtp.messages), 10)
+        self.assertEqual(self.smtp.connections, 2)
+        self.assertIn(b"http://test/api/auth/confirmed_email/token", self.smtp.messages[0][2])
+        self.assertEqual(await self.redis.llen(self.queue.processing_key("test")), 0)
+
+    async def test_retry_then_dead_letter(self):
+        await self.enqueue(1)
+        self.smtp.fail_next = 2
+        self.assertEqual(await self.worker.run_once(), 0)
+        self.assertEqual(await self.redis.zcard(RETRY_KEY), 1)
+        self.assertEqual(await self.worker.run_once(), 0)
+        self.assertEqual(await self.redis.zcard(RETRY_KEY), 0)
+        dead = json.loads(await self.redis.lindex(DEAD_KEY, 0))
+        self.assertEqual(dead["attempts"], 2)
+        self.assertEqual(await self.queue.stats(), {"queued": 0, "retrying": 0, "dead": 1})
+
+    async def test_retry_succeeds(self):
+        await self.enqueue(1)
+        self.smtp.fail_next = 1
+        self.assertEqual(await self.worker.run_once(), 0)
+        self.assertEqual(await self.worker.run_once(), 1)
+        self.assertEqual(len(self.smtp.messages), 1)
+
+    async def test_unknown_template_fails_alone(self):
+        await self.enqueue(2)
+        await self.queue.enqueue("Broken", ["broken@example.com"], "missing.html", {})
+        self.assertEqual(await self.worker.run_once(), 2)
+        self.assertEqual(self.worker.failed, 1)
+        self.assertEqual(await self.redis.zcard(RETRY_KEY), 1)
+
+    async def test_malformed_jobs_dead_lettered(self):
+        await self.enqueue(1)
+        await self.redis.lpush(QUEUE_KEY, b"not json")
+        await self.redis.lpush(QUEUE_KEY, json.dumps({"template": "email_template.html", "body": {}, "attempts": 0}))
+        self.assertEqual(await self.worker.run_once(), 1)
+        self.assertEqual(self.worker.failed, 2)
+        self.assertEqual(await self.redis.llen(self.queue.processing_key("test")), 0)
+        dead = [json.loads(entry) for entry in await self.redis.lrange(DEAD_KEY, 0, -1)]
+        self.assertEqual(sorted(entry["payload"][:8] for entry in dead), ['not json', '{"templa'])
+
+    async def test_unbuildable_message_fails_alone(self):
+        await self.enqueue(1)
+        await self.queue.enqueue("Broken\nBcc: x@example.com", ["broken@example.com"], "email_template.html",
+                                 {"host": "http://test/", "username": "broken", "token": "token"})
+        self.assertEqual(await self.worker.run_once(), 1)
+        self.assertEqual(await self.queue.stats(), {"queued": 0, "retrying": 0, "dead": 1})
+
+    async def test_retry_of_undecodable_payload(self):
+        await self.redis.lpush(QUEUE_KEY, b"\xff{")
+        [payload] = await self.queue.reserve("test", 1, 0.01)
+        self.assertFalse(await self.queue.retry("test", payload, "error"))
+        self.assertEqual(await self.queue.stats(), {"queued": 0, "retrying": 0, "dead": 1})
+
+    async def test_recover(self):
+        await self.enqueue(3)
+        await self.queue.reserve("test", 3, 0.01)
+        self.assertEqual(await self.redis.llen(QUEUE_KEY), 0)
+        self.assertEqual(await self.queue.recover("test"), 3)
+        self.assertEqual(await self.worker.run_once(), 3)
+
+
+class TestTemplateRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.renderer = TemplateRenderer(resources.mail.config.TEMPLATE_FOLDER)
+
+    def test_compiled_once(self):
+        self.assertIn("email_template.html", self.renderer.templates)
+        self.assertIs(self.renderer.get("email_template.html"), self.renderer.get("email_template.html"))
+
+    def test_render_batch(self):
+        bodies = [{"host": "http://test/", "username": f"user{i}", "token": f"token{i}"} for i in range(3)]
+        rendered = self.renderer.render_batch("email_template.html", bodies)
+        self.assertEqual(rendered, [render_template("email_template.html", body) for body in bodies])
+        self.assertIn("http://test/api/auth/confirmed_email/token2", rendered[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
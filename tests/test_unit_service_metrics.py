@@ -0,0 +1,113 @@
+import unittest
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.services import metrics
+from src.database.db import QueryProfiler
+from src.services.metrics import MetricsMiddleware, Registry
+
+
+class TestRegistry(unittest.IsolatedAsyncioTestCase):
+
+    async def test_render_counter_and_gauge(self):
+        registry = Registry()
+        requests = registry.counter("requests_total", "Requests.", ("route",))
+        in_flight = registry.gauge("in_flight", "In flight.")
+        requests.inc(("/a",))
+        requests.inc(("/a",))
+        requests.inc(('/"b"',))
+        requests.set_total(("/c",), 7)
+        in_flight.inc()
+        in_flight.dec()
+        text = await registry.render()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{route="/a"} 2', text)
+        self.assertIn('requests_total{route="/\\"b\\""} 1', text)
+        self.assertIn('requests_total{route="/c"} 7', text)
+        self.assertIn("in_flight 0", text)
+
+    async def test_render_histogram(self):
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3):
+            latency.observe(("/a",), value)
+        lines = (await registry.render()).splitlines()
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{route="/a"} 4.05', lines)
+        self.assertIn('latency_seconds_count{route="/a"} 4', lines)
+
+    async def test_set_cumulative(self):
+        registry = Registry()
+        wait = registry.histogram("wait_seconds", "Wait.")
+        wait.set_cumulative((), {"0.1": 2, "+Inf": 3}, 1.5)
+        lines = (await registry.render()).splitlines()
+        self.assertIn('wait_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn("wait_seconds_count 3", lines)
+
+    async def test_collectors_run_at_render(self):
+        registry = Registry()
+        gauge = registry.gauge("value", "Value.")
+        calls = []
+
+        @registry.collector
+        async def collect():
+            calls.append(1)
+            gauge.set((), len(calls))
+
+        self.assertEqual(calls, [])
+        self.assertIn("value 1", await registry.render())
+        self.assertIn("value 2", await registry.render())
+
+    async def test_empty_metrics_are_skipped(self):
+        registry = Registry()
+        registry.counter("unused_total", "Unused.")
+        self.assertEqual(await registry.render(), "\n")
+
+
+class TestMetricsMiddleware(unittest.TestCase):
+
+    def test_labels_by_route_template(self):
+        async def item(request):
+            return PlainTextResponse("x" * 10)
+
+        routes = [Route("/items/{item_id}", item)]
+        app = Starlette(routes=routes)
+        app.add_middleware(MetricsMiddleware, routes=routes)
+        before = metrics.http_requests.series.get(("GET", "/items/{item_id}", "200"), 0)
+        with TestClient(app) as client:
+            client.get("/items/1")
+            client.get("/items/2")
+            client.get("/missing")
+        self.assertEqual(metrics.http_requests.series[("GET", "/items/{item_id}", "200")], before + 2)
+        self.assertGreaterEqual(metrics.http_requests.series[("GET", "unmatched", "404")], 1)
+        self.assertEqual(metrics.http_in_flight.series[("GET",)], 0)
+        self.assertNotIn(("GET", "/items/1", "200"), metrics.http_requests.series)
+
+
+class TestMetricsMiddlewareProfile(unittest.TestCase):
+
+    def test_debug_headers_and_repeated_queries(self):
+        profiler = QueryProfiler(slow_threshold=10)
+
+        async def item(request):
+            profile = profiler._current.get()
+            profile.record("SELECT * FROM users WHERE id = ?", (1,), 0.002)
+            profile.record("SELECT * FROM users WHERE id = ?", (1,), 0.001)
+            return PlainTextResponse("ok")
+
+        routes = [Route("/profiled", item)]
+        app = Starlette(routes=routes)
+        app.add_middleware(MetricsMiddleware, routes=routes, profiler=profiler, debug_headers=True)
+        before = metrics.db_repeated.series.get(("GET", "/profiled"), 0)
+        with TestClient(app) as client, self.assertLogs("src.services.metrics", "WARNING") as logs:
+            response = client.get("/profiled")
+        self.assertEqual(response.headers["x-db-queries"], "2")
+        self.assertEqual(response.headers["x-db-repeated"], "1")
+        self.assertTrue(response.headers["x-db-slowest"].startswith("2.00ms SELECT * FROM users"))
+        self.assertEqual(metrics.db_repeated.series[("GET", "/profiled")], before + 1)
+        self.assertIn("repeated 2 times", logs.output[0])
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import unittest
+
+from fastapi import HTTPException
+
+from src.services.passwords import PasswordPool, mp_context
+
+
+def slow(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+class TestPasswordPool(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.pool = PasswordPool(max_workers=1, use_processes=False, max_pending=2, max_wait=1.0)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    async def test_hash_and_verify(self):
+        hashed = await self.pool.hash("afg6546S54")
+        self.assertTrue(await self.pool.verify("afg6546S54", hashed))
+        self.assertFalse(await self.pool.verify("password", hashed))
+        self.assertEqual(self.pool.stats()["completed"], 3)
+        self.assertEqual(self.pool.stats()["pending"], 0)
+
+    async def test_queue_full(self):
+        running = [asyncio.create_task(self.pool.run(slow, 0.2)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with self.assertRaises(HTTPException) as cm:
+            await self.pool.run(slow, 0)
+        self.assertEqual(cm.exception.status_code, 503)
+        await asyncio.gather(*running)
+        self.assertEqual(self.pool.stats()["rejected"], 1)
+
+    async def test_max_wait(self):
+        self.pool.max_wait = 0.05
+        running = asyncio.create_task(self.pool.run(slow, 0.2))
+        await asyncio.sleep(0)
+        with self.assertRaises(HTTPException) as cm:
+            await self.pool.run(slow, 0)
+        self.assertEqual(cm.exception.status_code, 503)
+        self.assertEqual(self.pool.stats()["timeouts"], 1)
+        self.assertEqual(await running, 0.2)
+
+    async def test_max_wait_excludes_run_time(self):
+        self.pool.max_wait = 0.05
+        self.assertEqual(await self.pool.run(slow, 0.2), 0.2)
+        self.assertEqual(self.pool.stats()["timeouts"], 0)
+
+    async def test_processes(self):
+        pool = PasswordPool(max_workers=1, use_processes=True, max_pending=2, max_wait=30)
+        try:
+            hashed = await pool.hash("afg6546S54")
+            self.assertTrue(await pool.verify("afg6546S54", hashed))
+            self.assertEqual(pool.stats()["backend"], "process")
+            self.assertEqual(pool._executor._mp_context.get_start_method(), mp_context().get_start_method())
+        finally:
+            pool.shutdown()
+
+    async def test_after_fork(self):
+        await self.pool.hash("afg6546S54")
+        inherited = self.pool._executor
+        self.pool.after_fork(max_workers=3)
+        self.assertEqual(self.pool.max_workers, 3)
+        await self.pool.hash("afg6546S54")
+        self.assertIsNot(self.pool._executor, inherited)
+        inherited.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis.aioredis
+from redis.exceptions import ConnectionError
+
+from src.services.rate_limit import RateLimiter, parse_limit
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis = fakeredis.aioredis.FakeRedis()
+        self.workers = [RateLimiter(self.redis, lease_size=10, redis_timeout=1, maxsize=100) for _ in range(3)]
+
+    async def admitted(self, limiter, count, times=100, identity="1"):
+        results = [await limiter.acquire("route", identity, times, 60) for _ in range(count)]
+        return results.count(0)
+
+    async def test_limit_holds_across_workers(self):
+        admitted = 0
+        for _ in range(5):
+            for worker in self.workers:
+                admitted += await self.admitted(worker, 30)
+        self.assertEqual(admitted, 100)
+
+    async def test_leases_in_batches(self):
+        limiter = self.workers[0]
+        self.assertEqual(await self.admitted(limiter, 25), 25)
+        self.assertEqual(limiter.stats()["leases"], 3)
+        self.assertEqual(limiter.stats()["local_hits"], 22)
+
+    async def test_lease_fraction(self):
+        limiter = RateLimiter(self.redis, lease_size=10, redis_timeout=1, maxsize=100, lease_fraction=0.2)
+        self.assertEqual(await self.admitted(limiter, 12, times=10), 10)
+        self.assertEqual(limiter.stats()["leases"], 6)
+        self.assertEqual(limiter.stats()["local_hits"], 5)
+        limiter = RateLimiter(self.redis, lease_size=10, redis_timeout=1, maxsize=100, lease_fraction=0.5)
+        self.assertEqual(await self.admitted(limiter, 10, times=10, identity="2"), 10)
+        self.assertEqual(limiter.stats()["leases"], 2)
+
+    async def test_rejected_until_window_ends(self):
+        limiter = self.workers[0]
+        self.assertEqual(await self.admitted(limiter, 12, times=10), 10)
+        with patch.object(self.redis, "pipeline") as pipeline:
+            retry_after = await limiter.acquire("route", "1", 10, 60)
+        pipeline.assert_not_called()
+        self.assertTrue(0 < retry_after <= 60)
+
+    async def test_identities_are_separate(self):
+        limiter = self.workers[0]
+        self.assertEqual(await self.admitted(limiter, 10, times=5, identity="1"), 5)
+        self.assertEqual(await self.admitted(limiter, 10, times=5, identity="2"), 5)
+
+    async def test_local_fallback(self):
+        client = MagicMock()
+        client.pipeline.return_value.__aenter__ = AsyncMock(side_effect=ConnectionError())
+        limiter = RateLimiter(client, lease_size=10, redis_timeout=1, maxsize=100)
+        self.assertEqual(await self.admitted(limiter, 15, times=10), 10)
+        self.assertEqual(limiter.stats()["fallbacks"], 2)
+
+
+class TestParseLimit(unittest.TestCase):
+
+    def test_parse_limit(self):
+        self.assertEqual(parse_limit("10/60"), (10, 60))
+        self.assertEqual(parse_limit("5"), (5, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
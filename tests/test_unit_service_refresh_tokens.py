@@ -0,0 +1,50 @@
+import unittest
+
+import fakeredis.aioredis
+
+from src.services.refresh_tokens import RefreshTokenStore, ROTATED, REUSED, UNKNOWN
+
+
+class TestRefreshTokenStore(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis = fakeredis.aioredis.FakeRedis()
+        self.store = RefreshTokenStore(self.redis, ttl=60)
+        self.email = "user@example.com"
+
+    async def test_issue_with_ttl(self):
+        await self.store.issue(self.email, "s1", "j1")
+        self.assertEqual(await self.redis.hget(self.store.session_key("s1"), "jti"), b"j1")
+        self.assertTrue(0 < await self.redis.ttl(self.store.session_key("s1")) <= 60)
+
+    async def test_rotate(self):
+        await self.store.issue(self.email, "s1", "j1")
+        self.assertEqual(await self.store.rotate(self.email, "s1", "j1", "j2"), ROTATED)
+        self.assertEqual(await self.store.rotate(self.email, "s1", "j2", "j3"), ROTATED)
+
+    async def test_reuse_revokes_session(self):
+        await self.store.issue(self.email, "s1", "j1")
+        await self.store.rotate(self.email, "s1", "j1", "j2")
+        self.assertEqual(await self.store.rotate(self.email, "s1", "j1", "j3"), REUSED)
+        self.assertEqual(await self.store.rotate(self.email, "s1", "j2", "j3"), UNKNOWN)
+        self.assertEqual(await self.store.sessions(self.email), [])
+
+    async def test_unknown_session(self):
+        self.assertEqual(await self.store.rotate(self.email, "missing", "j1", "j2"), UNKNOWN)
+        await self.store.issue(self.email, "s1", "j1")
+        self.assertEqual(await self.store.rotate("other@example.com", "s1", "j1", "j2"), UNKNOWN)
+
+    async def test_multiple_sessions(self):
+        await self.store.issue(self.email, "s1", "j1")
+        await self.store.issue(self.email, "s2", "j1")
+        await self.store.rotate(self.email, "s1", "j1", "j2")
+        self.assertEqual(await self.store.rotate(self.email, "s2", "j1", "j2"), ROTATED)
+        self.assertEqual(sorted(await self.store.sessions(self.email)), ["s1", "s2"])
+        await self.store.revoke(self.email, "s1")
+        self.assertEqual(await self.store.sessions(self.email), ["s2"])
+        self.assertEqual(await self.store.revoke_all(self.email), 1)
+        self.assertEqual(await self.store.sessions(self.email), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
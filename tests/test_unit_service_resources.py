@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis.aioredis
+from fastapi import FastAPI
+from redis.exceptions import ConnectionError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.services import resources as resources_module
+from src.services.resources import Resources, get_resources, lifespan
+
+
+class TestResources(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.passwords = MagicMock()
+        self.resources = Resources(fakeredis.aioredis.FakeRedis(), self.engine, MagicMock(), MagicMock(),
+                                   self.passwords)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_check(self):
+        async with AsyncSession(self.engine) as db:
+            self.assertEqual(await self.resources.check(db), {"redis": True, "database": True})
+
+    async def test_check_redis_down(self):
+        self.resources.redis = AsyncMock()
+        self.resources.redis.ping.side_effect = ConnectionError()
+        async with AsyncSession(self.engine) as db:
+            self.assertEqual(await self.resources.check(db), {"redis": False, "database": True})
+
+    async def test_close(self):
+        self.resources.redis = AsyncMock()
+        self.resources.engine = AsyncMock()
+        await self.resources.close()
+        self.resources.redis.close.assert_awaited_once_with(close_connection_pool=True)
+        self.resources.engine.dispose.assert_awaited_once()
+        self.passwords.shutdown.assert_called_once()
+
+    async def test_lifespan_closes_on_shutdown(self):
+        original = resources_module.resources
+        resources_module.resources = self.resources
+        self.resources.close = AsyncMock()
+        app = FastAPI()
+        try:
+            async with lifespan(app):
+                self.assertIs(app.state.resources, self.resources)
+                self.assertIs(get_resources(MagicMock(app=app)), self.resources)
+                self.resources.close.assert_not_awaited()
+        finally:
+            resources_module.resources = original
+        self.resources.close.assert_awaited_once()
+
+    def test_get_resources_without_lifespan(self):
+        self.assertIs(get_resources(MagicMock(app=FastAPI())), resources_module.resources)
+
+    async def test_after_fork(self):
+        self.resources.redis = MagicMock()
+        self.resources.engine = MagicMock()
+        self.resources.after_fork(password_workers=2)
+        self.resources.redis.connection_pool.reset.assert_called_once()
+        self.resources.engine.sync_engine.dispose.assert_called_once_with(close=False)
+        self.passwords.after_fork.assert_called_once_with(2)
@@ -0,0 +1,34 @@
+import unittest
+from datetime import date, datetime
+from typing import List
+from unittest.mock import patch
+
+from pydantic import TypeAdapter
+
+from src.database.models import Contact
+from src.schemas import ResponseContact
+from src.services import serializers
+from src.services.serializers import dump_contact_rows
+
+
+class TestDumpContactRows(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = [
+            (1, "Ivan", "ivan@example.com", "+380501234567", datetime(1990, 5, 17), 'says "hi"\n'),
+            (2, "Олена", "olena@example.com", "+380507654321", date(1985, 12, 31), ""),
+        ]
+        contacts = [Contact(id=row[0], name=row[1], email=row[2], phone_number=row[3], birth_date=row[4],
+                            additional_data=row[5]) for row in self.rows]
+        adapter = TypeAdapter(List[ResponseContact])
+        self.expected = adapter.dump_json(adapter.validate_python(contacts, from_attributes=True))
+
+    def test_matches_response_model(self):
+        self.assertEqual(dump_contact_rows(self.rows), self.expected)
+
+    def test_matches_response_model_without_orjson(self):
+        with patch.object(serializers, "orjson", None):
+            self.assertEqual(dump_contact_rows(self.rows), self.expected)
+
+    def test_empty(self):
+        self.assertEqual(dump_contact_rows([]), b"[]")
@@ -0,0 +1,77 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from jose import JWTError, jwt
+
+from src.services.tokens import TokenDecoder, get_backend
+
+SECRET = "secret"
+
+
+def make_token(sub="user@example.com", expires_in=900, secret=SECRET):
+    now = int(time.time())
+    return jwt.encode({"sub": sub, "iat": now, "exp": now + expires_in, "scope": "access_token"}, secret,
+                      algorithm="HS256")
+
+
+class TestTokenDecoder(unittest.TestCase):
+
+    def setUp(self):
+        self.decoder = TokenDecoder(SECRET, ["HS256"], maxsize=2)
+
+    def test_cached_after_first_decode(self):
+        token = make_token()
+        with patch.object(self.decoder.backend, "decode", wraps=self.decoder.backend.decode) as decode:
+            first = self.decoder.decode(token)
+            first["sub"] = "changed"
+            second = self.decoder.decode(token)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(second["sub"], "user@example.com")
+        self.assertEqual(self.decoder.stats()["hits"], 1)
+
+    def test_invalid_token_not_cached(self):
+        token = make_token(secret="other")
+        for _ in range(2):
+            with self.assertRaises(JWTError):
+                self.decoder.decode(token)
+        self.assertEqual(self.decoder.stats()["size"], 0)
+
+    def test_evicted_at_exp(self):
+        token = make_token(expires_in=1)
+        self.decoder.decode(token)
+        with patch("src.services.tokens.time.time", return_value=time.time() + 5), \
+                patch.object(self.decoder.backend, "decode", side_effect=JWTError("expired")):
+            with self.assertRaises(JWTError):
+                self.decoder.decode(token)
+        self.assertEqual(self.decoder.stats()["size"], 0)
+
+    def test_bounded(self):
+        for i in range(3):
+            self.decoder.decode(make_token(sub=f"user{i}@example.com"))
+        self.assertEqual(self.decoder.stats()["size"], 2)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend("nope")
+
+
+class TestPyJWTBackend(unittest.TestCase):
+
+    def setUp(self):
+        try:
+            self.decoder = TokenDecoder(SECRET, ["HS256"], backend="pyjwt")
+        except ImportError:
+            self.skipTest("PyJWT is not installed")
+
+    def test_same_claims_as_jose(self):
+        token = make_token()
+        self.assertEqual(self.decoder.decode(token), jwt.decode(token, SECRET, algorithms=["HS256"]))
+
+    def test_errors_are_jwt_errors(self):
+        with self.assertRaises(JWTError):
+            self.decoder.decode(make_token(expires_in=-10))
+
+
+if __name__ == '__main__':
+    unittest.main()